@@ -0,0 +1,158 @@
+"""
+Compare the JavaScript page extractor with the CDP DOMSnapshot extractor, and
+measure how much the interned style table shrinks each engine's payload.
+
+Usage (from the backend directory):
+    python benchmarks/extraction_benchmark.py --elements 10000 --runs 5
+    python benchmarks/extraction_benchmark.py https://example.com https://github.com
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from playwright.async_api import async_playwright
+
+from models import CloneOptions
+from page_extractor import PageExtractor, expand_styles
+from services.browser_pool import CHROMIUM_ARGS
+from snapshot_extractor import SnapshotExtractor
+
+ENGINES = {
+    "javascript": PageExtractor(),
+    "snapshot": SnapshotExtractor()
+}
+
+def build_synthetic_page(element_count: int) -> str:
+    """Generate a page with roughly element_count elements across common layout patterns"""
+    sections = []
+    per_card = 5
+    cards = max(element_count // per_card, 1)
+    for i in range(cards):
+        color = f"#{(i * 2654435761) & 0xFFFFFF:06x}"
+        sections.append(
+            f'<div class="card item-{i % 50}" style="display:{"flex" if i % 3 else "grid"};'
+            f'padding:{i % 5 * 4}px;margin:{i % 4 * 2}px;background-color:{color}">'
+            f'<h3>Card {i}</h3><p class="content">Body text for card {i}</p>'
+            f'<a href="/item/{i}" class="btn">Open</a>'
+            f'<img src="https://picsum.photos/seed/{i}/40/40" width="40" height="40">'
+            f'</div>'
+        )
+    return (
+        '<!DOCTYPE html><html><head><meta name="description" content="Synthetic benchmark page">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1"></head>'
+        '<body style="font-family: Inter, Arial, sans-serif">'
+        '<header class="header"><nav class="navbar"><a href="/">Home</a><a href="/about">About</a></nav></header>'
+        f'<main class="container" style="display:grid;grid-template-columns:repeat(4,1fr);gap:8px">{"".join(sections)}</main>'
+        '<footer><form action="/subscribe"><input type="email" name="email" required><button>Go</button></form></footer>'
+        '</body></html>'
+    )
+
+def summarize(payload: dict) -> dict:
+    """Counts used to sanity check that both engines agree"""
+    ui = payload.get("ui_elements", {})
+    layout = payload.get("layout_info", {})
+    return {
+        "elements": payload.get("dom_structure", {}).get("totalElements"),
+        "buttons": len(ui.get("buttons", [])),
+        "cards": len(ui.get("cards", [])),
+        "grids": len(layout.get("grid_systems", [])),
+        "flex": len(layout.get("flexbox_layouts", [])),
+        "colors": len(payload.get("colors", [])),
+        "fonts": len(payload.get("fonts", [])),
+        "images": len(payload.get("images", []))
+    }
+
+def python_memory(serialized: str) -> int:
+    """Bytes allocated to hold a payload once parsed into Python objects"""
+    tracemalloc.start()
+    snapshot = json.loads(serialized)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del snapshot
+    return size
+
+def style_table_savings(payload: dict) -> dict:
+    """
+    Payload size with interned styles versus every element carrying its own style dict
+
+    "prompt" compares the old indented DOM analysis JSON with the compact one
+    LLMService now sends.
+    """
+    style_table = payload.get("style_table") or {"fields": [], "rows": []}
+    expanded = expand_styles(payload, style_table)
+    interned_json = json.dumps(payload)
+    expanded_json = json.dumps(expanded)
+
+    dom_analysis = {
+        **payload.get("dom_structure", {}),
+        "ui_elements": payload.get("ui_elements", {}),
+        "layout_info": payload.get("layout_info", {}),
+        "interactive_elements": payload.get("interactive_elements", {})
+    }
+    old_prompt = json.dumps(expand_styles(dom_analysis, style_table), indent=2)
+    new_prompt = json.dumps({**dom_analysis, "style_table": style_table}, separators=(",", ":"))
+
+    return {
+        "style_rows": len(style_table["rows"]),
+        "transfer": (len(expanded_json), len(interned_json)),
+        "python": (python_memory(expanded_json), python_memory(interned_json)),
+        "prompt": (len(old_prompt), len(new_prompt))
+    }
+
+def format_savings(savings: dict) -> str:
+    parts = [f"{savings['style_rows']} style rows"]
+    for label in ("transfer", "python", "prompt"):
+        before, after = savings[label]
+        reduction = (1 - after / before) * 100 if before else 0.0
+        parts.append(f"{label} {before / 1024:.1f} -> {after / 1024:.1f} KB (-{reduction:.0f}%)")
+    return "  ".join(parts)
+
+async def benchmark_page(page, label: str, runs: int, options: CloneOptions):
+    print(f"\n=== {label} ===")
+    for name, extractor in ENGINES.items():
+        timings = []
+        payload = {}
+        for _ in range(runs):
+            started = time.perf_counter()
+            payload = await extractor.extract(page, options)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        size_kb = len(json.dumps(payload)) / 1024
+        print(
+            f"{name:>10}: median {statistics.median(timings):8.1f} ms  "
+            f"min {min(timings):8.1f} ms  payload {size_kb:8.1f} KB  {summarize(payload)}"
+        )
+        print(f"{'':>10}  style table: {format_savings(style_table_savings(payload))}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark page context extraction engines")
+    parser.add_argument("urls", nargs="*", help="Pages to benchmark in addition to the synthetic page")
+    parser.add_argument("--elements", type=int, default=10000, help="Approximate element count of the synthetic page")
+    parser.add_argument("--runs", type=int, default=5, help="Extraction runs per engine")
+    args = parser.parse_args()
+
+    options = CloneOptions()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+        page = await browser.new_page(viewport={"width": options.viewport_width, "height": options.viewport_height})
+
+        if args.elements:
+            await page.set_content(build_synthetic_page(args.elements))
+            await benchmark_page(page, f"synthetic page (~{args.elements} elements)", args.runs, options)
+
+        for url in args.urls:
+            await page.goto(url, wait_until="networkidle", timeout=options.max_wait_time * 1000)
+            await benchmark_page(page, url, args.runs, options)
+
+        await browser.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,15 +1,22 @@
 import asyncio
 import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Any, Optional, Dict
 from pathlib import Path
 import uuid
 
 from scraper import WebScraper
+from static_scraper import BrowserRequired, static_scraper
+from services.asset_mirror import asset_mirror, referenced_asset_urls
+from services.browser_pool import browser_pool
+from services.job_events import PARTIAL_TYPES, PartialCallback, emit_partial, job_events
+from services.scrape_cache import scrape_cache
+from services.template_index import template_index
 from llm_service import LLMService
+from utils.partial_html import PartialHTMLDocument
 from precision_calculator import precision_calculator
 from models import (
-    CloneRequest, CloneOptions, CloneStatus, CloneResult, ScrapedData, PrecisionMetrics,
+    CloneRequest, CloneOptions, CloneStatus, CloneResult, ScrapedData, PrecisionMetrics, TemplateMatch,
     clone_jobs, clone_results, generate_clone_id
 )
 from config import settings
@@ -20,6 +27,8 @@ class CloneService:
     def __init__(self):
         self.llm_service = LLMService()
         self.active_jobs: Dict[str, asyncio.Task] = {}
+        # Documents still streaming from the LLM, rendered by the live preview endpoint
+        self.live_previews: Dict[str, PartialHTMLDocument] = {}
         
     async def start_clone_job(self, request: CloneRequest) -> str:
         """
@@ -91,8 +100,20 @@ class CloneService:
                 "Scraping website data..."
             )
             
-            # Phase 1: Scrape the website
-            scraped_data = await self._scrape_website(str(request.url), request.options)
+            # Phase 1: Scrape the website, streaming each partial result to the job's subscribers
+            received = set()
+            
+            async def on_partial(kind: str, payload: Dict[str, Any]):
+                await job_events.publish_partial(clone_id, kind, payload)
+                received.add(kind)
+                await self._update_job_status(
+                    clone_id,
+                    "scraping",
+                    10 + 30 * len(received) // len(PARTIAL_TYPES),
+                    f"Scraped {kind}..."
+                )
+            
+            scraped_data = await self._scrape_website(str(request.url), request.options, on_partial)
             
             # Update status: processing
             await self._update_job_status(
@@ -113,8 +134,31 @@ class CloneService:
                 "Generating HTML/CSS with AI..."
             )
             
-            # Phase 2: Generate HTML/CSS using LLM
-            html_content, css_content = await self._generate_clone(scraped_data, request.options)
+            # Phase 2: Generate HTML/CSS using LLM, unless a page on the same template was already cloned
+            reuse_templates = request.options is None or request.options.reuse_templates
+            template = await self._find_template(scraped_data) if reuse_templates else None
+            if template and template["mode"] == "direct":
+                await self._update_job_status(
+                    clone_id, 
+                    "generating", 
+                    84, 
+                    f"Reusing clone of {template['source_url']} ({template['similarity']:.0%} structurally similar)..."
+                )
+                html_content, css_content = template["html"], template["css"]
+            else:
+                html_content, css_content = await self._generate_clone(clone_id, scraped_data, request.options, template)
+                if reuse_templates:
+                    await template_index.add(scraped_data.url, scraped_data.html, html_content, css_content)
+            
+            # Serve the clone's images and fonts from local storage instead of hot-linking the origin
+            if request.options is None or request.options.mirror_assets:
+                await self._update_job_status(
+                    clone_id, 
+                    "generating", 
+                    85, 
+                    "Mirroring images and fonts..."
+                )
+                html_content, css_content = await self._mirror_assets(scraped_data, html_content, css_content)
             
             # Update status: finalizing
             await self._update_job_status(
@@ -155,6 +199,7 @@ class CloneService:
                 precision_metrics=precision_metrics,
                 # Keep similarity_score for backwards compatibility
                 similarity_score=precision_metrics.overall_precision if precision_metrics else 0.0,
+                template_match=TemplateMatch(**template) if template else None,
                 created_at=clone_jobs[clone_id].created_at,
                 completed_at=datetime.now()
             )
@@ -203,27 +248,166 @@ class CloneService:
             )
             
         finally:
-            # Clean up active job
+            # Clean up active job and end its event stream
             if clone_id in self.active_jobs:
                 del self.active_jobs[clone_id]
+            self.live_previews.pop(clone_id, None)
+            job_events.close(clone_id)
     
-    async def _scrape_website(self, url: str, options: CloneOptions) -> ScrapedData:
-        """Scrape website data using WebScraper"""
+    async def _scrape_website(
+        self,
+        url: str,
+        options: CloneOptions,
+        on_partial: Optional[PartialCallback] = None
+    ) -> ScrapedData:
+        """Scrape website data over plain HTTP when possible, otherwise with WebScraper on the shared browser pool"""
+        use_cache = options is None or options.use_scrape_cache
+        if use_cache:
+            cached = await scrape_cache.get_scraped_data(url, options)
+            if cached:
+                print(f"♻️ Reusing cached scrape of {url}")
+                await self._replay_partials(cached, on_partial)
+                return cached
+        
+        scraped_data = None
+        escalation_reason = None
+        scrape_mode = options.scrape_mode if options else "auto"
+        if scrape_mode == "static" or (scrape_mode == "auto" and not (options and options.capture_breakpoints)):
+            try:
+                scraped_data = await static_scraper.scrape_website(
+                    url, options, force=scrape_mode == "static", on_partial=on_partial
+                )
+                print(f"⚡ Scraped {url} without a browser")
+            except BrowserRequired as e:
+                escalation_reason = e.reason
+                print(f"🌐 {url} needs a browser ({e.reason}), escalating to Playwright")
+            except Exception as e:
+                if scrape_mode == "static":
+                    raise
+                # Auto mode never fails a job the browser scraper could still handle
+                escalation_reason = f"static scrape failed ({type(e).__name__}: {e})"
+                print(f"🌐 Static scrape of {url} failed ({e}), escalating to Playwright")
+        
+        if scraped_data is None:
+            async with WebScraper(pool=browser_pool) as scraper:
+                scraped_data = await scraper.scrape_website(url, options, on_partial)
+            if escalation_reason:
+                scraped_data.scrape_metrics["escalation_reason"] = escalation_reason
         
-        async with WebScraper() as scraper:
-            scraped_data = await scraper.scrape_website(url, options)
-            return scraped_data
+        if use_cache:
+            await scrape_cache.put_scraped_data(url, options, scraped_data)
+        return scraped_data
     
-    async def _generate_clone(self, scraped_data: ScrapedData, options: CloneOptions) -> tuple[str, str]:
-        """Generate HTML/CSS clone using LLM service"""
+    async def _replay_partials(self, scraped_data: ScrapedData, on_partial: Optional[PartialCallback]):
+        """Publish a finished scrape as partials so stream consumers see the same events on a cache hit"""
+        dom_structure = scraped_data.dom_structure or {}
+        await emit_partial(on_partial, "html", {"url": scraped_data.url, "title": scraped_data.title, "html": scraped_data.html})
+        await emit_partial(on_partial, "css", {
+            "css": scraped_data.css,
+            "used_css": scraped_data.used_css,
+            "stylesheets": scraped_data.scrape_metrics.get("stylesheets", [])
+        })
+        await emit_partial(on_partial, "layout", {
+            "dom_structure": dom_structure,
+            "meta_description": scraped_data.meta_description,
+            "viewport_meta": scraped_data.viewport_meta
+        })
+        await emit_partial(on_partial, "colors", {"colors": scraped_data.colors})
+        await emit_partial(on_partial, "fonts", {"fonts": scraped_data.fonts})
+        await emit_partial(on_partial, "images", {"images": scraped_data.images})
+        if scraped_data.screenshot_path:
+            await emit_partial(on_partial, "screenshot", {
+                "screenshot_path": scraped_data.screenshot_path,
+                **(scraped_data.scrape_metrics.get("screenshot") or {})
+            })
+    
+    async def _find_template(self, scraped_data: ScrapedData) -> Optional[Dict[str, Any]]:
+        """Prior generation for a page on the same theme or template, or None"""
+        try:
+            template = await template_index.find(scraped_data.html)
+        except Exception as e:
+            print(f"⚠️ Template lookup failed, generating from scratch: {e}")
+            return None
+        if template:
+            print(f"🧩 {scraped_data.url} matches the template of {template['source_url']} ({template['similarity']:.0%}, {template['mode']})")
+        return template
+    
+    async def _generate_clone(
+        self, 
+        clone_id: str, 
+        scraped_data: ScrapedData, 
+        options: CloneOptions,
+        reference: Optional[Dict[str, Any]] = None
+    ) -> tuple[str, str]:
+        """Generate HTML/CSS clone using LLM service, streaming the partial page to the job's live preview"""
+        
+        if not settings.llm_stream_preview:
+            return await self.llm_service.generate_website_clone(scraped_data, options, reference=reference)
+        
+        document = PartialHTMLDocument()
+        self.live_previews[clone_id] = document
+        pending = []
+        offset = 0
+        last_flush = time.monotonic()
+        progress = 70
+        
+        async def flush():
+            nonlocal offset, last_flush, progress
+            if not pending:
+                return
+            delta = "".join(pending)
+            pending.clear()
+            job_events.publish(clone_id, "html_chunk", {"offset": offset, "delta": delta, "complete": document.complete})
+            offset += len(delta)
+            last_flush = time.monotonic()
+            
+            # 70-84% as the completion grows towards the model's output limit
+            received = min(14, 14 * offset // settings.llm_stream_expected_chars)
+            if 70 + received > progress:
+                progress = 70 + received
+                await self._update_job_status(
+                    clone_id,
+                    "generating",
+                    progress,
+                    f"Generating HTML/CSS with AI... ({offset // 1024} KB streamed to live preview)"
+                )
+        
+        async def on_chunk(delta: str):
+            document.feed(delta)
+            pending.append(delta)
+            if document.complete or (time.monotonic() - last_flush) * 1000 >= settings.llm_stream_flush_ms:
+                await flush()
         
         html_content, css_content = await self.llm_service.generate_website_clone(
             scraped_data, 
-            options
+            options,
+            on_chunk=on_chunk,
+            reference=reference
         )
+        await flush()
         
         return html_content, css_content
     
+    def get_live_preview_html(self, clone_id: str) -> Optional[str]:
+        """Renderable snapshot of a generation still streaming, or None when nothing is streaming"""
+        document = self.live_previews.get(clone_id)
+        if document is None:
+            return None
+        return document.snapshot() or None
+    
+    async def _mirror_assets(self, scraped_data: ScrapedData, html_content: str, css_content: str) -> tuple[str, str]:
+        """Copy the assets the clone references into storage/assets and rewrite it to use the local URLs"""
+        try:
+            urls = referenced_asset_urls(html_content, css_content)
+            # Only assets the scraped page itself referenced may be downloaded
+            downloadable = set(scraped_data.images) | set(scraped_data.fonts) | set(referenced_asset_urls(*scraped_data.css))
+            mapping, report = await asset_mirror.mirror(urls, scraped_data.captured_responses, downloadable)
+            print(f"📦 Mirrored {report['mirrored']}/{report['requested']} assets ({report['bytes_written'] // 1024} KB new) in {report['elapsed_ms']}ms")
+            return asset_mirror.rewrite(html_content, mapping), asset_mirror.rewrite(css_content, mapping)
+        except Exception as e:
+            print(f"Asset mirroring failed, keeping origin URLs: {e}")
+            return html_content, css_content
+    
     async def _calculate_precision_metrics(self, original_html: str, generated_html: str) -> Optional[PrecisionMetrics]:
         """Calculate precision metrics comparing original and generated HTML"""
         
@@ -292,6 +476,7 @@ class CloneService:
             job.progress = progress
             job.message = message
             job.updated_at = datetime.now()
+            job_events.publish(clone_id, "status", job.model_dump(mode="json"))
     
     async def get_preview_html(self, clone_id: str) -> Optional[str]:
         """Get the generated HTML for preview"""
@@ -321,6 +506,7 @@ class CloneService:
             # Remove from memory
             clone_jobs.pop(job_id, None)
             clone_results.pop(job_id, None)
+            job_events.discard(job_id)
             
             # Remove preview file
             try:
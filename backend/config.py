@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -26,6 +26,108 @@ class Settings(BaseSettings):
     # Browser Settings
     headless_browser: bool = True
     browser_timeout: int = 120000
+    # Secondary viewports (width, height) rendered when capture_breakpoints is set
+    breakpoint_viewports: Dict[str, List[int]] = {"mobile": [390, 844], "tablet": [820, 1180]}
+    
+    # Browser Pool Settings
+    browser_pool_size: int = 2
+    browser_pool_contexts_per_browser: int = 4
+    browser_pool_max_pages_per_browser: int = 100
+    browser_pool_max_memory_mb: int = 1500
+    
+    # Browserbase Pool Settings
+    browserbase_pool_max_sessions: int = 3
+    browserbase_pool_warm_sessions: int = 1
+    browserbase_max_urls_per_session: int = 5
+    browserbase_session_max_age_seconds: int = 240
+    browserbase_session_idle_seconds: int = 60
+    # CDP endpoint of a local Chrome (--remote-debugging-port) to stand in for Browserbase
+    browserbase_cdp_url: str = os.getenv("BROWSERBASE_CDP_URL", "")
+    
+    # Browser Provider Settings
+    # Agentic scrapes: "browserbase", "local" (pooled Chromium) or "auto" (lowest observed latency)
+    agentic_browser_provider: str = os.getenv("AGENTIC_BROWSER_PROVIDER", "auto")
+    browser_provider_latency_alpha: float = 0.3
+    browser_provider_explore_every: int = 10
+    
+    # LLM Streaming Settings
+    # Stream completions into a live preview instead of waiting for the whole response
+    llm_stream_preview: bool = True
+    llm_stream_flush_ms: int = 200
+    # Typical completion size, used to turn streamed characters into job progress
+    llm_stream_expected_chars: int = 16000
+    
+    # Outbound HTTP Settings
+    http_max_connections: int = 100
+    http_max_connections_per_host: int = 6
+    http_timeout_seconds: int = 10
+    css_max_import_depth: int = 4
+    response_capture_max_mb: int = 50
+    
+    # Request Governor Settings (per origin host, shared by every outbound request)
+    governor_max_concurrent_per_host: int = 6
+    governor_rate_per_host: float = 10.0
+    governor_burst_per_host: int = 20
+    governor_backoff_base_ms: int = 1000
+    governor_backoff_max_ms: int = 60000
+    governor_max_retries: int = 2
+    # Hosts tracked at once; idle least recently used ones are forgotten beyond this
+    governor_max_hosts: int = 1000
+    
+    # Extraction Settings
+    extraction_element_budget: int = 5000
+    extraction_fold_viewports: int = 3
+    
+    # Page Readiness Settings
+    page_ready_quiet_ms: int = 500
+    page_ready_max_wait_ms: int = 15000
+    page_ready_max_pending_requests: int = 2
+    page_ready_poll_ms: int = 100
+    
+    # Domain Profile Settings
+    domain_profiles_path: str = "./storage/domain_profiles.json"
+    # Scrapes of a domain before its learned profile replaces the defaults
+    domain_profile_min_samples: int = 2
+    domain_profile_window: int = 20
+    domain_profile_max_domains: int = 5000
+    domain_profile_nav_timeout_ms: int = 60000
+    domain_profile_min_nav_timeout_ms: int = 15000
+    domain_profile_max_nav_timeout_ms: int = 120000
+    domain_profile_min_ready_ms: int = 1500
+    
+    # Lazy Content Settings
+    lazy_load_max_ms: int = 8000
+    lazy_load_step_ms: int = 1500
+    lazy_load_max_steps: int = 40
+    lazy_load_stable_steps: int = 2
+    
+    # Scrape Cache Settings
+    scrape_cache_path: str = "./storage/cache/scrapes"
+    scrape_cache_max_mb: int = 500
+    scrape_cache_ttl_seconds: int = 6 * 3600
+    scrape_cache_revalidate_after_seconds: int = 300
+    
+    # LLM Cache Settings
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "./storage/cache/llm"
+    llm_cache_max_mb: int = 200
+    llm_cache_ttl_seconds: int = 7 * 24 * 3600
+    
+    # Template Index Settings
+    template_index_path: str = "./storage/templates"
+    template_index_max_entries: int = 2000
+    # Combined structure/class similarity at which a prior generation is returned as-is
+    template_reuse_threshold: float = 0.97
+    # Direct reuse also needs near-identical visible text, so another page's content is never returned
+    template_reuse_content_threshold: float = 0.95
+    # Below reuse, at or above this the prior generation seeds the prompt as a starting point
+    template_seed_threshold: float = 0.8
+    template_seed_max_chars: int = 12000
+    
+    # Asset Mirror Settings
+    asset_mirror_public_url: str = "/static/assets"
+    asset_mirror_max_assets: int = 200
+    asset_mirror_max_mb: int = 10
     
     # Storage
     assets_storage_path: str = "./storage/assets"
@@ -1,13 +1,28 @@
 import asyncio
 import json
 import re
-from typing import Dict, Tuple, Optional
+from typing import Any, Awaitable, Callable, Dict, Tuple, Optional
 from datetime import datetime
 
 from openai import AsyncOpenAI
 
 from config import settings
 from models import ScrapedData, CloneOptions
+from services.llm_cache import llm_cache
+from services.template_index import reference_prompt
+
+# Whitespace-free JSON for prompt payloads; indentation only costs tokens
+COMPACT_JSON = (",", ":")
+
+# Receives each streamed piece of the completion as it arrives
+ChunkCallback = Callable[[str], Awaitable[None]]
+
+# The clone is complete once the document closes; anything after is commentary
+HTML_END = "</html>"
+
+# Using GPT-4o which is faster and cheaper than GPT-4
+OPENAI_MODEL = "gpt-4o"
+OPENAI_PARAMS = {"max_tokens": 4096, "temperature": 0.3}
 
 class LLMService:
     """Service for generating HTML/CSS using OpenAI GPT-4"""
@@ -21,11 +36,17 @@ class LLMService:
     async def generate_website_clone(
         self, 
         scraped_data: ScrapedData, 
-        options: CloneOptions
+        options: CloneOptions,
+        on_chunk: Optional[ChunkCallback] = None,
+        reference: Optional[Dict[str, Any]] = None
     ) -> Tuple[str, str]:
         """
         Generate HTML and CSS based on scraped website data
         
+        With on_chunk the completion is streamed and each piece is handed to
+        the callback as it arrives, so a live preview can render it. A template
+        index match passed as reference is given to the model as its starting point.
+        
         Returns:
             Tuple[str, str]: (generated_html, generated_css)
         """
@@ -36,9 +57,15 @@ class LLMService:
             # Generate the website clone
             system_prompt = self._get_system_prompt()
             user_prompt = self._build_user_prompt(analysis_context)
+            if reference:
+                user_prompt += reference_prompt(reference)
             
-            # Call OpenAI API
-            response = await self._call_openai_api(system_prompt, user_prompt)
+            # Call OpenAI API (identical prompts are answered from the LLM cache)
+            use_cache = options is None or options.use_llm_cache
+            if on_chunk:
+                response = await self._stream_openai_api(system_prompt, user_prompt, on_chunk, use_cache)
+            else:
+                response = await self._call_openai_api(system_prompt, user_prompt, use_cache)
             
             # Parse and validate the response
             html_content, css_content = self._parse_response(response)
@@ -54,8 +81,8 @@ class LLMService:
         # Summarize the HTML structure
         html_summary = self._summarize_html_structure(scraped_data.html)
         
-        # Process CSS styles
-        css_summary = self._summarize_css_styles(scraped_data.css)
+        # Process CSS styles, preferring the rules that actually matched the page
+        css_summary = self._summarize_css_styles(scraped_data.used_css or scraped_data.css)
         
         # Create color palette
         color_palette = self._process_color_palette(scraped_data.colors)
@@ -71,6 +98,7 @@ class LLMService:
             "fonts": scraped_data.fonts[:10],  # Limit to top 10 fonts
             "images": scraped_data.images[:20],  # Limit to top 20 images
             "dom_analysis": scraped_data.dom_structure,
+            "breakpoint_layouts": self._summarize_breakpoints(scraped_data.breakpoints),
             "responsive_required": options.mobile_responsive,
             "viewport_size": {
                 "width": options.viewport_width,
@@ -80,6 +108,22 @@ class LLMService:
         
         return context
     
+    def _summarize_breakpoints(self, breakpoints: Dict) -> Dict:
+        """Condense per-viewport layouts into what changes between breakpoints"""
+        summary = {}
+        for name, data in breakpoints.items():
+            if data.get("error"):
+                continue
+            layout = data.get("layout_info", {})
+            summary[name] = {
+                "width": data.get("width"),
+                "page_height": layout.get("page_structure", {}).get("height"),
+                "grid_columns": [grid.get("grid_template_columns") for grid in layout.get("grid_systems", [])[:5]],
+                "flex_directions": [flex.get("flex_direction") for flex in layout.get("flexbox_layouts", [])[:10]],
+                "navigation_items": len(data.get("ui_elements", {}).get("navigation", []))
+            }
+        return summary
+    
     def _summarize_html_structure(self, html: str) -> Dict:
         """Extract key structural elements from HTML"""
         from bs4 import BeautifulSoup
@@ -233,6 +277,18 @@ Provide your response in this exact format:
 
 Focus on creating a visually accurate, modern, and responsive recreation of the original website."""
     
+    def _dom_analysis_note(self, dom_analysis: Optional[Dict]) -> str:
+        """How to read the DOM analysis, which depends on whether a browser rendered the page"""
+        notes = []
+        if dom_analysis and dom_analysis.get("style_table"):
+            notes.append('(Each element\'s "style" is a row index into style_table.rows; the columns are style_table.fields.)')
+        if dom_analysis and dom_analysis.get("rendered") is False:
+            notes.append(
+                "(The page was parsed without a browser, so there is no screenshot, element geometry, "
+                "flex/grid layout or computed style. Infer the layout from the markup, class names and stylesheets.)"
+            )
+        return "\n".join(notes)
+    
     def _build_user_prompt(self, context: Dict) -> str:
         """Build the user prompt with website context"""
         
@@ -258,7 +314,11 @@ Please analyze this website data and create a pixel-perfect clone:
 - Common CSS Classes: {context['css_summary'].get('common_classes', [])}
 
 **DOM ANALYSIS:**
-{json.dumps(context['dom_analysis'], indent=2)}
+{self._dom_analysis_note(context['dom_analysis'])}
+{json.dumps(context['dom_analysis'], separators=COMPACT_JSON)}
+
+**BREAKPOINT LAYOUTS:**
+{json.dumps(context['breakpoint_layouts'], separators=COMPACT_JSON) if context['breakpoint_layouts'] else 'Not captured'}
 
 **REQUIREMENTS:**
 - Responsive Design: {context['responsive_required']}
@@ -279,12 +339,64 @@ Generate the complete HTML with embedded CSS that recreates this website's desig
         
         return prompt
     
-    async def _call_openai_api(self, system_prompt: str, user_prompt: str) -> str:
+    async def _call_openai_api(self, system_prompt: str, user_prompt: str, use_cache: bool = True) -> str:
         """Call OpenAI API with the prompts"""
         
+        cache_key = llm_cache.key("openai", OPENAI_MODEL, system_prompt, user_prompt, OPENAI_PARAMS)
+        if use_cache:
+            cached = await llm_cache.get(cache_key)
+            if cached:
+                print("♻️ Reusing cached OpenAI completion")
+                return cached["response"]
+        
         try:
             response = await self.client.chat.completions.create(
-                model="gpt-4o",  # Using GPT-4o which is faster and cheaper than GPT-4
+                model=OPENAI_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": system_prompt
+                    },
+                    {
+                        "role": "user",
+                        "content": user_prompt
+                    }
+                ],
+                **OPENAI_PARAMS,
+            )
+            
+            content = response.choices[0].message.content
+            
+        except Exception as e:
+            raise Exception(f"OpenAI API call failed: {str(e)}")
+        
+        usage = {"output_tokens": response.usage.completion_tokens} if response.usage else None
+        await llm_cache.put(cache_key, "openai", OPENAI_MODEL, content, usage)
+        return content
+    
+    async def _stream_openai_api(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        on_chunk: ChunkCallback,
+        use_cache: bool = True
+    ) -> str:
+        """Stream the completion, forwarding each piece and stopping once </html> arrives"""
+        
+        cache_key = llm_cache.key("openai", OPENAI_MODEL, system_prompt, user_prompt, OPENAI_PARAMS)
+        if use_cache:
+            cached = await llm_cache.get(cache_key)
+            if cached:
+                print("♻️ Reusing cached OpenAI completion")
+                try:
+                    await on_chunk(cached["response"])
+                except Exception as e:
+                    print(f"⚠️ Stream consumer failed: {e}")
+                return cached["response"]
+        
+        try:
+            stream = await self.client.chat.completions.create(
+                model=OPENAI_MODEL,
                 messages=[
                     {
                         "role": "system",
@@ -295,21 +407,44 @@ Generate the complete HTML with embedded CSS that recreates this website's desig
                         "content": user_prompt
                     }
                 ],
-                max_tokens=4096,
-                temperature=0.3,
+                **OPENAI_PARAMS,
+                stream=True,
             )
             
-            return response.choices[0].message.content
+            pieces = []
+            tail = ""
+            try:
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    pieces.append(delta)
+                    try:
+                        await on_chunk(delta)
+                    except Exception as e:
+                        print(f"⚠️ Stream consumer failed: {e}")
+                    # The tag can straddle chunks, so check a rolling tail
+                    tail = (tail + delta)[-(len(delta) + len(HTML_END)):]
+                    if HTML_END in tail.lower():
+                        break
+            finally:
+                # Stops generation (and billing) of the closing fence and any commentary
+                await stream.close()
+            
+            content = "".join(pieces)
             
         except Exception as e:
             raise Exception(f"OpenAI API call failed: {str(e)}")
+        
+        await llm_cache.put(cache_key, "openai", OPENAI_MODEL, content)
+        return content
     
     def _parse_response(self, response: str) -> Tuple[str, str]:
         """Parse OpenAI's response to extract HTML and CSS"""
         
         try:
-            # Extract HTML from code blocks
-            html_match = re.search(r'```html\s*(.*?)\s*```', response, re.DOTALL | re.IGNORECASE)
+            # Extract HTML from code blocks (a streamed response ends at </html>, before the closing fence)
+            html_match = re.search(r'```html\s*(.*?)\s*(?:```|$)', response, re.DOTALL | re.IGNORECASE)
             
             if html_match:
                 full_html = html_match.group(1).strip()
@@ -330,7 +465,8 @@ Generate the complete HTML with embedded CSS that recreates this website's desig
         self, 
         original_html: str, 
         original_css: str, 
-        feedback: str
+        feedback: str,
+        use_cache: bool = True
     ) -> Tuple[str, str]:
         """Refine generated code based on feedback"""
         
@@ -362,6 +498,6 @@ Provide the refined version in the same format as before.
         
         system_prompt = "You are an expert web developer refining HTML/CSS code to improve visual accuracy and address specific feedback."
         
-        response = await self._call_openai_api(system_prompt, refinement_prompt)
+        response = await self._call_openai_api(system_prompt, refinement_prompt, use_cache)
         
         return self._parse_response(response) 
\ No newline at end of file
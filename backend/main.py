@@ -1,11 +1,12 @@
 import os
+import json
 import asyncio
 from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, Response
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 
@@ -16,6 +17,15 @@ from models import (
 )
 from clone_service import clone_service
 from services.agentic_clone_service import agentic_clone_service
+from services.browser_pool import browser_pool
+from services.browserbase_pool import browserbase_pool
+from services.job_events import job_events
+from services.scrape_cache import scrape_cache
+from services.http_client import http_client
+from services.domain_profiles import domain_profiles
+from services.llm_cache import llm_cache
+from services.template_index import template_index
+from services.request_governor import request_governor
 
 # Ensure storage directories exist
 os.makedirs("storage/previews", exist_ok=True)
@@ -39,6 +49,12 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️ Playwright setup warning: {e}")
     
+    # Warm the shared browser pool so clone jobs skip the Chromium launch
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        print(f"⚠️ Browser pool warmup failed, browsers will launch on demand: {e}")
+    
     yield
     
     # Shutdown
@@ -50,6 +66,10 @@ async def lifespan(app: FastAPI):
     # Clean up any active jobs
     for job_id, task in clone_service.active_jobs.items():
         task.cancel()
+    
+    # Close pooled browsers and HTTP connections
+    await browser_pool.close()
+    await http_client.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -68,6 +88,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class ImmutableStaticFiles(StaticFiles):
+    """Static files named by content hash, so browsers may cache them indefinitely"""
+    
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200:
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+# Mirrored clone assets (mounted first so it takes precedence over /static)
+app.mount(settings.asset_mirror_public_url, ImmutableStaticFiles(directory=settings.assets_storage_path), name="assets")
+
 # Mount static files for previews
 app.mount("/static", StaticFiles(directory="storage"), name="static")
 
@@ -85,7 +117,16 @@ async def root():
             "status": "GET /api/clone/{id}",
             "result": "GET /api/clone/{id}/result",
             "preview": "GET /api/clone/{id}/preview",
-            "precision": "GET /api/clone/{id}/precision"
+            "live_preview": "GET /api/clone/{id}/preview/live",
+            "precision": "GET /api/clone/{id}/precision",
+            "browser_pool": "GET /api/browser-pool",
+            "browserbase_pool": "GET /api/browserbase-pool",
+            "browser_providers": "GET /api/browser-providers",
+            "scrape_cache": "GET /api/scrape-cache",
+            "llm_cache": "GET /api/llm-cache",
+            "template_index": "GET /api/template-index",
+            "request_governor": "GET /api/request-governor",
+            "domain_profiles": "GET /api/domain-profiles"
         }
     }
 
@@ -95,9 +136,68 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "website-cloner-api",
-        "active_jobs": len(clone_service.active_jobs)
+        "active_jobs": len(clone_service.active_jobs),
+        "browser_pool_saturation": browser_pool.stats()["saturation"]
     }
 
+@app.get("/api/browser-pool")
+async def get_browser_pool_stats():
+    """
+    Browser pool saturation and per-browser statistics
+    """
+    return browser_pool.stats()
+
+@app.get("/api/browserbase-pool")
+async def get_browserbase_pool_stats():
+    """
+    Browserbase session pool hit rate, session ages and creation latency
+    """
+    return browserbase_pool.stats()
+
+@app.get("/api/browser-providers")
+async def get_browser_provider_stats():
+    """
+    Agentic browser providers with availability, scrape counts and observed latency
+    """
+    if agentic_clone_service.scraper is None:
+        return {"default": settings.agentic_browser_provider, "providers": {}}
+    return agentic_clone_service.scraper.stats()
+
+@app.get("/api/request-governor")
+async def get_request_governor_stats():
+    """
+    Per-host request counts, waits, backoffs and response statuses for outbound traffic
+    """
+    return request_governor.stats()
+
+@app.get("/api/domain-profiles")
+async def get_domain_profiles():
+    """
+    Learned per-domain load timings, failures, page weight and the plan the next scrape will use
+    """
+    return await domain_profiles.stats()
+
+@app.get("/api/scrape-cache")
+async def get_scrape_cache_stats():
+    """
+    Scrape cache size, hit rate and eviction statistics
+    """
+    return await asyncio.to_thread(scrape_cache.stats)
+
+@app.get("/api/llm-cache")
+async def get_llm_cache_stats():
+    """
+    LLM response cache size, hit rate and the tokens and cost its hits saved
+    """
+    return await asyncio.to_thread(llm_cache.stats)
+
+@app.get("/api/template-index")
+async def get_template_index_stats():
+    """
+    Indexed generations and how often pages reused one directly or as a starting point
+    """
+    return template_index.stats()
+
 # Clone endpoints
 @app.post("/api/clone", response_model=CloneResponse)
 async def create_clone(request: CloneRequest, background_tasks: BackgroundTasks):
@@ -185,6 +285,32 @@ async def get_clone_status(clone_id: str):
     
     return job_status
 
+@app.get("/api/clone/{clone_id}/events")
+async def stream_clone_events(clone_id: str):
+    """
+    Server-sent event stream of a cloning job
+    
+    - **clone_id**: The ID of the clone job
+    
+    Emits `status` events on every progress update, `partial` events
+    ({"type": "html" | "css" | "layout" | "colors" | "fonts" | "images" | "screenshot", "data": ...})
+    as the scraper finishes each piece and `html_chunk` events ({"offset", "delta", "complete"})
+    as the generated HTML streams in. Events already published are replayed first;
+    the stream ends when the job completes or fails.
+    """
+    if clone_id not in clone_service.active_jobs and not job_events.is_known(clone_id):
+        raise HTTPException(status_code=404, detail="Clone job not found")
+    
+    async def event_stream():
+        async for message in job_events.subscribe(clone_id):
+            yield f"id: {message['id']}\nevent: {message['event']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/clone/{clone_id}/result", response_model=CloneResult)
 async def get_clone_result(clone_id: str):
     """
@@ -213,6 +339,29 @@ async def get_clone_preview(clone_id: str):
     
     return HTMLResponse(content=html_content)
 
+@app.get("/api/clone/{clone_id}/preview/live", response_class=HTMLResponse)
+async def get_clone_live_preview(clone_id: str):
+    """
+    The generated page as far as it has streamed, rendered as a complete document
+    
+    - **clone_id**: The ID of the clone job
+    
+    While generation is running the response asks the browser to refresh every
+    couple of seconds; once the clone is saved this serves the final preview.
+    """
+    html_content = clone_service.get_live_preview_html(clone_id)
+    if html_content:
+        return HTMLResponse(content=html_content, headers={"Refresh": "2", "Cache-Control": "no-store"})
+    
+    html_content = await clone_service.get_preview_html(clone_id)
+    if html_content:
+        return HTMLResponse(content=html_content)
+    
+    if clone_id in clone_service.active_jobs:
+        # Nothing generated yet; keep polling until the first chunk arrives
+        return HTMLResponse(content="<!DOCTYPE html><html><body></body></html>", headers={"Refresh": "2", "Cache-Control": "no-store"})
+    raise HTTPException(status_code=404, detail="Preview not found")
+
 @app.get("/api/clone/{clone_id}/precision")
 async def get_precision_metrics(clone_id: str):
     """
@@ -307,33 +456,35 @@ async def list_recent_clones():
 async def preview_proxy(url: str):
     """
     Proxy endpoint to serve preview content with proper headers
+    
+    Origin error pages are passed through with their status. Proxied fetches share
+    the pooled client, so they are paced by the origin's request governor and
+    429/503 responses are retried after its backoff.
     """
-    try:
-        import aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                content = await response.text()
-                
-                # Force proper content type for HTML
-                if url.endswith('.html') or 'html' in content.lower()[:100]:
-                    return HTMLResponse(
-                        content=content,
-                        headers={
-                            "Content-Type": "text/html; charset=utf-8",
-                            "X-Frame-Options": "ALLOWALL",
-                            "Access-Control-Allow-Origin": "*"
-                        }
-                    )
-                else:
-                    return Response(
-                        content=content,
-                        media_type=response.headers.get('content-type', 'text/plain'),
-                        headers={
-                            "Access-Control-Allow-Origin": "*"
-                        }
-                    )
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to proxy URL: {str(e)}")
+    result = await http_client.fetch(url, any_status=True)
+    if result["body"] is None:
+        raise HTTPException(status_code=400, detail=f"Failed to proxy URL: {result['error']}")
+    content = result["body"]
+    
+    # Force proper content type for HTML
+    if url.endswith('.html') or 'html' in content.lower()[:100]:
+        return HTMLResponse(
+            content=content,
+            status_code=result["status"],
+            headers={
+                "Content-Type": "text/html; charset=utf-8",
+                "X-Frame-Options": "ALLOWALL",
+                "Access-Control-Allow-Origin": "*"
+            }
+        )
+    return Response(
+        content=content,
+        status_code=result["status"],
+        media_type=result["headers"].get('content-type', 'text/plain'),
+        headers={
+            "Access-Control-Allow-Origin": "*"
+        }
+    )
 
 # Utility endpoints
 @app.post("/api/test")
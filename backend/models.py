@@ -17,14 +17,41 @@ class StylePalette(BaseModel):
     layout_type: str = "traditional"  # "grid", "flex", "traditional"
     spacing_scale: str = "normal"  # "tight", "normal", "loose"
 
+class CapturedResponse(BaseModel):
+    """Response body recorded from the browser while the page loaded"""
+    url: str
+    resource_type: str
+    content_type: str = ""
+    status: int = 200
+    body: bytes
+    
+    def text(self) -> str:
+        """Decode the body using the charset from the content type"""
+        charset = "utf-8"
+        for part in self.content_type.split(";"):
+            key, _, value = part.strip().partition("=")
+            if key.lower() == "charset" and value:
+                charset = value.strip('"')
+        try:
+            return self.body.decode(charset, errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
 class ScrapeArtifacts(BaseModel):
     url: str
     dom_html: str
     css_content: str
+    # css_content reduced to the rules that matched during the render (None without coverage)
+    used_css: Optional[str] = None
     hero_image_bytes: bytes
     metadata: Dict[str, Any] = Field(default_factory=dict)
     image_info: Optional[Dict[str, Any]] = Field(default_factory=dict)
     scraped_at: datetime = Field(default_factory=datetime.now)
+    scrape_metrics: Dict[str, Any] = Field(default_factory=dict)
+    # ETag / Last-Modified of the page document, for cache revalidation
+    validators: Dict[str, str] = Field(default_factory=dict)
+    # Stylesheets, fonts and images the browser downloaded, keyed by URL
+    captured_responses: Dict[str, CapturedResponse] = Field(default_factory=dict, exclude=True)
 
 class CloneMemory(BaseModel):
     id: str
@@ -42,6 +69,29 @@ class TokenUsage(BaseModel):
     output_tokens: int
     total_cost_usd: float
 
+class GenerationMetrics(BaseModel):
+    """Streaming latency of one model generation"""
+    time_to_first_token_ms: Optional[float] = None
+    generation_ms: float
+    output_tokens: int
+    tokens_per_second: float
+    # Reading stopped at </html> instead of waiting for the end of the response
+    stopped_early: bool = False
+    # Served from the LLM cache without calling the model
+    cached: bool = False
+
+class TemplateMatch(BaseModel):
+    """Prior generation reused because its source page shares this page's template"""
+    template_id: str
+    source_url: str
+    similarity: float = Field(ge=0.0, le=1.0)
+    structure_similarity: float = Field(ge=0.0, le=1.0)
+    class_similarity: float = Field(ge=0.0, le=1.0)
+    # Visible-text similarity; direct reuse requires it to be near-identical
+    content_similarity: float = Field(default=0.0, ge=0.0, le=1.0)
+    # "direct" returned the prior generation as-is; "seed" gave it to the model as a starting point
+    mode: Literal["direct", "seed"]
+
 # Enhanced existing models
 class CloneOptions(BaseModel):
     """Options for website cloning"""
@@ -56,6 +106,37 @@ class CloneOptions(BaseModel):
     target_style: StyleType = StyleType.MODERN
     include_animations: bool = True
     mobile_first: bool = True
+    # Scraper extraction backend: in-page JavaScript walk or native CDP DOM snapshot
+    extraction_engine: Literal["javascript", "snapshot"] = "javascript"
+    # Max elements the extractors process (None uses settings.extraction_element_budget, 0 disables)
+    element_budget: Optional[int] = Field(default=None, ge=0)
+    # Scroll the page before capture so lazy-loaded images and sections appear
+    load_lazy_content: bool = True
+    # Track CSS rule usage while rendering and hand generation only the rules that matched
+    prune_unused_css: bool = True
+    # Screenshot encoding; the viewport image is cropped from the single full-page capture
+    screenshot_format: Literal["png", "jpeg", "webp"] = "jpeg"
+    screenshot_quality: int = Field(default=80, ge=1, le=100)
+    # Requests aborted before they leave the browser
+    block_media: bool = False
+    block_trackers: bool = True
+    block_third_party_scripts: bool = False
+    # Also render the breakpoint_viewports from settings alongside the main viewport
+    capture_breakpoints: bool = False
+    # "auto" tries a browserless HTTP scrape first and escalates JavaScript-rendered pages.
+    # Static scrapes are faster but capture no screenshot, geometry or computed styles;
+    # use "browser" when layout fidelity matters more than scrape time
+    scrape_mode: Literal["auto", "browser", "static"] = "auto"
+    # Reuse a cached scrape of the same page when the origin reports it unchanged
+    use_scrape_cache: bool = True
+    # Copy images and fonts into storage/assets and point the generated clone at the local copies
+    mirror_assets: bool = True
+    # Answer identical generation prompts from the on-disk LLM cache
+    use_llm_cache: bool = True
+    # Reuse the generation of a structurally near-identical page (same theme or template)
+    reuse_templates: bool = True
+    # Agentic browser backend (None uses settings.agentic_browser_provider)
+    browser_provider: Optional[Literal["auto", "browserbase", "local"]] = None
 
 class CloneRequest(BaseModel):
     """Request model for website cloning"""
@@ -68,6 +149,8 @@ class ScrapedData(BaseModel):
     title: Optional[str] = None
     html: str
     css: List[str] = []
+    # Stylesheets pruned to the rules that matched during the render (empty without coverage)
+    used_css: List[str] = []
     images: List[str] = []
     fonts: List[str] = []
     colors: List[str] = []
@@ -75,6 +158,14 @@ class ScrapedData(BaseModel):
     dom_structure: Optional[Dict] = None
     meta_description: Optional[str] = None
     viewport_meta: Optional[str] = None
+    # Layout and screenshot per rendered viewport when breakpoints are captured
+    breakpoints: Dict[str, Dict[str, Any]] = {}
+    # Per-stage scrape measurements (stylesheet timings, etc.)
+    scrape_metrics: Dict[str, Any] = {}
+    # ETag / Last-Modified of the page document, for cache revalidation
+    validators: Dict[str, str] = {}
+    # Stylesheets, fonts and images the browser downloaded, keyed by URL
+    captured_responses: Dict[str, CapturedResponse] = Field(default_factory=dict, exclude=True)
 
 class CloneStatus(BaseModel):
     """Status of a cloning operation"""
@@ -114,6 +205,8 @@ class CloneResult(BaseModel):
     # New Agentic Cloner fields
     artifacts_urls: Optional[Dict[str, str]] = None
     token_usage: Optional[TokenUsage] = None
+    generation_metrics: Optional[GenerationMetrics] = None
+    template_match: Optional[TemplateMatch] = None
     memory_id: Optional[str] = None
     similar_sites_found: Optional[int] = None
 
@@ -130,6 +223,8 @@ class CloneResponse(BaseModel):
     artifacts_urls: Optional[Dict[str, str]] = None
     processing_time: Optional[float] = None
     token_usage: Optional[TokenUsage] = None
+    generation_metrics: Optional[GenerationMetrics] = None
+    template_match: Optional[TemplateMatch] = None
     memory_id: Optional[str] = None
     similar_sites_found: Optional[int] = None
 
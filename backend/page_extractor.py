@@ -0,0 +1,478 @@
+from typing import Any, Dict, List, Tuple
+
+from playwright.async_api import Page
+
+from config import settings
+from models import CloneOptions
+
+# Selectors shared by every extraction engine so their payloads stay comparable
+EXTRACTOR_SELECTORS = {
+    "ui_buttons": 'button, [role="button"], input[type="button"], input[type="submit"], .btn, .button',
+    "ui_inputs": 'input, textarea, select',
+    "ui_navigation": 'nav, .nav, .navbar, .navigation, [role="navigation"]',
+    "ui_cards": '.card, .post, .item, .product, .article, [class*="card"]',
+    "ui_headers": 'header, .header, h1, h2, h3',
+    "ui_content_blocks": 'main, .main, .content, .container, section, article',
+    "ui_layout_containers": 'div, section, aside, main',
+    "clickable": 'a, button, [onclick], [role="button"], .clickable, [tabindex]',
+    "headings": 'h1, h2, h3, h4, h5, h6',
+    "buttons": 'button, input[type="button"], input[type="submit"]',
+    "sections": 'section, article, div',
+    "navigation": 'nav, [role="navigation"]'
+}
+
+# Computed-style columns recorded per UI element. Each distinct tuple of values is
+# stored once in the payload's style_table and elements reference it by row id.
+STYLE_FIELDS = (
+    "backgroundColor", "color", "fontSize", "fontFamily", "padding", "margin",
+    "border", "borderRadius", "display", "position", "zIndex"
+)
+
+class StyleTable:
+    """Interns computed-style tuples so repeated values are stored once"""
+
+    def __init__(self):
+        self.rows: List[List[str]] = []
+        self._ids: Dict[Tuple[str, ...], int] = {}
+
+    def intern(self, values: Tuple[str, ...]) -> int:
+        style_id = self._ids.get(values)
+        if style_id is None:
+            style_id = self._ids[values] = len(self.rows)
+            self.rows.append(list(values))
+        return style_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"fields": list(STYLE_FIELDS), "rows": self.rows}
+
+def expand_styles(value: Any, style_table: Dict[str, Any]) -> Any:
+    """
+    Copy of an extractor structure with every `style` row id replaced by its field dict
+
+    For consumers that want per-element styles inline; the scraped payload keeps the ids.
+    """
+    if isinstance(value, list):
+        return [expand_styles(item, style_table) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    expanded = {key: expand_styles(item, style_table) for key, item in value.items() if key != "style_table"}
+    if isinstance(value.get("style"), int):
+        expanded["style"] = dict(zip(style_table["fields"], style_table["rows"][value["style"]]))
+    return expanded
+
+# In-page helper shared by every DOM walker. Keeps at most `budget` elements:
+# those inside the first `foldViewports` screens in document order, then the
+# largest remaining visible ones, then invisible ones. Only one bounding box is
+# read per element, so the expensive per-element work stays bounded.
+ELEMENT_BUDGET_SCRIPT = """
+    function selectWithinBudget(elements, budget, foldViewports) {
+        const total = elements.length;
+        if (!budget || total <= budget) {
+            const all = Array.from(elements);
+            return { elements: all, ranked: all, indices: all.map((_, i) => i), report: null };
+        }
+
+        const foldBottom = window.innerHeight * foldViewports;
+        const scored = new Array(total);
+        for (let i = 0; i < total; i++) {
+            const rect = elements[i].getBoundingClientRect();
+            const area = rect.width * rect.height;
+            const tier = area <= 0 ? 2 : (rect.top + window.scrollY < foldBottom ? 0 : 1);
+            scored[i] = { i, tier, area };
+        }
+        scored.sort((a, b) => a.tier - b.tier || (a.tier === 1 ? b.area - a.area : a.i - b.i));
+
+        const kept = scored.slice(0, budget);
+        const skipped = scored.slice(budget);
+        const skippedByTag = {};
+        let skippedVisible = 0;
+        for (const s of skipped) {
+            const tag = elements[s.i].tagName.toLowerCase();
+            skippedByTag[tag] = (skippedByTag[tag] || 0) + 1;
+            if (s.tier < 2) skippedVisible++;
+        }
+
+        const indices = kept.map(s => s.i).sort((a, b) => a - b);
+        return {
+            elements: indices.map(i => elements[i]),
+            ranked: kept.map(s => elements[s.i]),
+            indices,
+            report: {
+                budget,
+                fold_viewports: foldViewports,
+                total_elements: total,
+                processed: kept.length,
+                skipped: skipped.length,
+                skipped_visible: skippedVisible,
+                skipped_hidden: skipped.length - skippedVisible,
+                skipped_by_tag: Object.fromEntries(
+                    Object.entries(skippedByTag).sort(([, a], [, b]) => b - a).slice(0, 10)
+                )
+            }
+        };
+    }
+"""
+
+def element_budget(options: CloneOptions) -> int:
+    """Effective element budget for a scrape (0 means unlimited)"""
+    if options.element_budget is None:
+        return settings.extraction_element_budget
+    return options.element_budget
+
+# Single in-page pass over the DOM. Every element's computed style and
+# bounding box are read exactly once and shared by all the collectors below.
+PAGE_EXTRACTOR_SCRIPT = """
+(opts) => {
+    const TRANSPARENT = 'rgba(0, 0, 0, 0)';
+    const SELECTORS = opts.selectors;
+""" + ELEMENT_BUDGET_SCRIPT + """
+    const documentElements = document.querySelectorAll('*');
+    const selection = selectWithinBudget(documentElements, opts.budget, opts.foldViewports);
+    const allElements = selection.elements;
+    const records = new Map();
+    const infoCache = new Map();
+    const styleRows = [];
+    const styleIds = new Map();
+
+    // Id of the element's computed-style row, adding the row the first time it is seen
+    function styleId(r) {
+        const values = opts.styleFields.map(field => r.style[field]);
+        const key = values.join('\u0001');
+        let id = styleIds.get(key);
+        if (id === undefined) {
+            id = styleRows.length;
+            styleIds.set(key, id);
+            styleRows.push(values);
+        }
+        return id;
+    }
+
+    // Read the style and geometry of an element once
+    function recordOf(el) {
+        let record = records.get(el);
+        if (record) return record;
+
+        const style = window.getComputedStyle(el);
+        const rect = el.getBoundingClientRect();
+        record = {
+            style,
+            rect,
+            tag: el.tagName.toLowerCase(),
+            className: typeof el.className === 'string' ? el.className : (el.getAttribute('class') || ''),
+            display: style.display,
+            position: style.position,
+            zIndex: style.zIndex,
+            color: style.color,
+            backgroundColor: style.backgroundColor,
+            borderColor: style.borderColor,
+            fontFamily: style.fontFamily,
+            margin: style.margin,
+            padding: style.padding,
+            cursor: style.cursor
+        };
+        records.set(el, record);
+        return record;
+    }
+
+    function box(rect) {
+        return {
+            x: Math.round(rect.x),
+            y: Math.round(rect.y),
+            width: Math.round(rect.width),
+            height: Math.round(rect.height)
+        };
+    }
+
+    function elementInfo(el) {
+        let info = infoCache.get(el);
+        if (info) return info;
+
+        const r = recordOf(el);
+        info = {
+            tag: r.tag,
+            text: el.textContent?.trim().substring(0, 100) || '',
+            class: r.className,
+            id: el.id || '',
+            position: box(r.rect),
+            style: styleId(r),
+            visible: r.rect.width > 0 && r.rect.height > 0 && r.display !== 'none'
+        };
+        infoCache.set(el, info);
+        return info;
+    }
+
+    const ui = {
+        buttons: [],
+        inputs: [],
+        navigation: [],
+        cards: [],
+        headers: [],
+        content_blocks: [],
+        images: [],
+        layout_containers: []
+    };
+    const layout = {
+        page_structure: {
+            width: document.documentElement.scrollWidth,
+            height: document.documentElement.scrollHeight,
+            viewport_width: window.innerWidth,
+            viewport_height: window.innerHeight
+        },
+        grid_systems: [],
+        flexbox_layouts: [],
+        positioning: [],
+        spacing_patterns: {}
+    };
+    const interactive = {
+        clickable_elements: [],
+        form_elements: [],
+        hover_effects: [],
+        animations: []
+    };
+    const analysis = {
+        totalElements: documentElements.length,
+        headings: 0,
+        images: 0,
+        links: 0,
+        forms: 0,
+        inputs: 0,
+        buttons: 0,
+        sections: 0,
+        navigation: 0,
+        flexboxElements: 0,
+        gridElements: 0,
+        visualHierarchy: [],
+        colorDistribution: {},
+        fontUsage: {}
+    };
+
+    const colors = new Set();
+    const fontFamilies = new Set();
+    const imageUrls = [];
+    const backgroundUrls = [];
+    const marginCounts = {};
+    const paddingCounts = {};
+    const colorCounts = {};
+    const fontCounts = {};
+
+    for (const el of allElements) {
+        const r = recordOf(el);
+        const rect = r.rect;
+        const tag = r.tag;
+
+        // DOM structure counts
+        if (el.matches(SELECTORS.headings)) analysis.headings++;
+        if (tag === 'img') analysis.images++;
+        if (tag === 'a') analysis.links++;
+        if (tag === 'form') analysis.forms++;
+        if (el.matches(SELECTORS.ui_inputs)) analysis.inputs++;
+        if (el.matches(SELECTORS.buttons)) analysis.buttons++;
+        if (el.matches(SELECTORS.sections)) analysis.sections++;
+        if (el.matches(SELECTORS.navigation)) analysis.navigation++;
+        if (r.display === 'flex' || r.display === 'inline-flex') analysis.flexboxElements++;
+        if (r.display === 'grid' || r.display === 'inline-grid') analysis.gridElements++;
+
+        if (rect.width > 100 && rect.height > 50) {
+            analysis.visualHierarchy.push({
+                tag,
+                area: rect.width * rect.height,
+                position: { x: Math.round(rect.x), y: Math.round(rect.y) },
+                zIndex: r.zIndex
+            });
+        }
+        if (r.backgroundColor && r.backgroundColor !== TRANSPARENT) {
+            colorCounts[r.backgroundColor] = (colorCounts[r.backgroundColor] || 0) + 1;
+        }
+        if (r.fontFamily) {
+            fontCounts[r.fontFamily] = (fontCounts[r.fontFamily] || 0) + 1;
+        }
+
+        // UI elements
+        if (rect.width > 0) {
+            if (el.matches(SELECTORS.ui_buttons)) ui.buttons.push(elementInfo(el));
+            if (el.matches(SELECTORS.ui_inputs)) {
+                ui.inputs.push({ ...elementInfo(el), type: el.type || 'text', placeholder: el.placeholder || '' });
+            }
+            if (el.matches(SELECTORS.ui_navigation)) {
+                const links = Array.from(el.querySelectorAll('a')).map(link => ({
+                    text: link.textContent?.trim() || '',
+                    href: link.href || '',
+                    ...elementInfo(link)
+                }));
+                ui.navigation.push({ ...elementInfo(el), links });
+            }
+            if (el.matches(SELECTORS.ui_cards)) ui.cards.push(elementInfo(el));
+            if (el.matches(SELECTORS.ui_headers)) ui.headers.push(elementInfo(el));
+            if (tag === 'img') ui.images.push({ ...elementInfo(el), src: el.src || '', alt: el.alt || '' });
+        }
+        if (rect.width > 200 && el.matches(SELECTORS.ui_content_blocks)) {
+            ui.content_blocks.push(elementInfo(el));
+        }
+        if (rect.width > 300 && rect.height > 100 && el.matches(SELECTORS.ui_layout_containers) &&
+            (r.display === 'flex' || r.display === 'grid' || el.children.length > 3)) {
+            ui.layout_containers.push(elementInfo(el));
+        }
+
+        // Layout systems
+        if (r.display === 'grid' && rect.width > 0) {
+            layout.grid_systems.push({
+                element: tag,
+                class: r.className,
+                grid_template_columns: r.style.gridTemplateColumns,
+                grid_template_rows: r.style.gridTemplateRows,
+                gap: r.style.gap,
+                position: box(rect)
+            });
+        }
+        if (r.display === 'flex' && rect.width > 0) {
+            layout.flexbox_layouts.push({
+                element: tag,
+                class: r.className,
+                flex_direction: r.style.flexDirection,
+                justify_content: r.style.justifyContent,
+                align_items: r.style.alignItems,
+                gap: r.style.gap,
+                position: box(rect)
+            });
+        }
+        if (r.position === 'absolute' || r.position === 'fixed') {
+            layout.positioning.push({
+                element: tag,
+                class: r.className,
+                position_type: r.position,
+                top: r.style.top,
+                left: r.style.left,
+                right: r.style.right,
+                bottom: r.style.bottom,
+                z_index: r.zIndex
+            });
+        }
+        if (r.margin !== '0px' || r.padding !== '0px') {
+            marginCounts[r.margin] = (marginCounts[r.margin] || 0) + 1;
+            paddingCounts[r.padding] = (paddingCounts[r.padding] || 0) + 1;
+        }
+
+        // Interactive elements
+        if (rect.width > 0 && el.matches(SELECTORS.clickable)) {
+            interactive.clickable_elements.push({
+                tag,
+                text: el.textContent?.trim().substring(0, 50) || '',
+                class: r.className,
+                href: el.href || '',
+                cursor: r.cursor,
+                position: box(rect)
+            });
+        }
+        if (tag === 'form') {
+            interactive.form_elements.push({
+                action: el.action || '',
+                method: el.method || 'get',
+                inputs: Array.from(el.querySelectorAll('input, textarea, select')).map(input => ({
+                    type: input.type || 'text',
+                    name: input.name || '',
+                    placeholder: input.placeholder || '',
+                    required: input.required || false
+                }))
+            });
+        }
+        if (r.cursor === 'pointer' || tag === 'a' || tag === 'button') {
+            interactive.hover_effects.push({
+                tag,
+                class: r.className,
+                cursor: r.cursor,
+                transition: r.style.transition
+            });
+        }
+
+        // Palette and typography
+        if (opts.colors) {
+            if (r.color && r.color !== TRANSPARENT) colors.add(r.color);
+            if (r.backgroundColor && r.backgroundColor !== TRANSPARENT) colors.add(r.backgroundColor);
+            if (r.borderColor && r.borderColor !== TRANSPARENT) colors.add(r.borderColor);
+        }
+        if (opts.fonts && r.fontFamily) {
+            r.fontFamily.split(',').forEach(font => {
+                const cleaned = font.trim().replace(/["']/g, '');
+                if (cleaned && !cleaned.includes('serif') && !cleaned.includes('sans-serif') && !cleaned.includes('monospace')) {
+                    fontFamilies.add(cleaned);
+                }
+            });
+        }
+
+        // Images and background images
+        if (opts.images) {
+            if (tag === 'img' && el.src && el.src.startsWith('http') && rect.width > 0 && rect.height > 0) {
+                imageUrls.push(el.src);
+            }
+            const bgImage = r.style.backgroundImage;
+            if (bgImage && bgImage !== 'none') {
+                const match = bgImage.match(/url\\(["']?([^"']*)["']?\\)/);
+                if (match && match[1] && match[1].startsWith('http')) {
+                    backgroundUrls.push(match[1]);
+                }
+            }
+        }
+    }
+
+    const topEntries = (counts, limit) => Object.entries(counts)
+        .sort(([, a], [, b]) => b - a)
+        .slice(0, limit);
+
+    layout.spacing_patterns = {
+        common_margins: topEntries(marginCounts, 5).map(([margin, count]) => ({ margin, count })),
+        common_paddings: topEntries(paddingCounts, 5).map(([padding, count]) => ({ padding, count }))
+    };
+
+    analysis.visualHierarchy.sort((a, b) => b.area - a.area);
+    analysis.visualHierarchy = analysis.visualHierarchy.slice(0, 20);
+    analysis.colorDistribution = Object.fromEntries(topEntries(colorCounts, 10));
+    analysis.fontUsage = Object.fromEntries(topEntries(fontCounts, 5));
+
+    const metaContent = name => {
+        const meta = document.querySelector(`meta[name="${name}"]`);
+        return meta ? meta.getAttribute('content') : null;
+    };
+
+    return {
+        dom_structure: analysis,
+        ui_elements: ui,
+        layout_info: layout,
+        interactive_elements: interactive,
+        colors: Array.from(colors).slice(0, 20),
+        fonts: Array.from(fontFamilies),
+        images: [...new Set(imageUrls.concat(backgroundUrls))],
+        meta_description: metaContent('description'),
+        viewport_meta: metaContent('viewport'),
+        style_table: { fields: opts.styleFields, rows: styleRows },
+        element_budget: selection.report
+    };
+}
+"""
+
+class PageExtractor:
+    """Extracts layout, palette, typography and structure in one in-page DOM traversal"""
+
+    async def extract(self, page: Page, options: CloneOptions) -> Dict:
+        """
+        Run the single-pass extractor and return the combined payload
+
+        Returns:
+            Dict with dom_structure, ui_elements, layout_info, interactive_elements,
+            colors, fonts, images, meta_description, viewport_meta, style_table
+            (element `style` ids index its rows) and element_budget (a skip
+            report, or None when the page fit the budget)
+        """
+        try:
+            return await page.evaluate(PAGE_EXTRACTOR_SCRIPT, {
+                "images": options.include_images,
+                "fonts": options.include_fonts,
+                "colors": options.extract_colors,
+                "selectors": EXTRACTOR_SELECTORS,
+                "styleFields": STYLE_FIELDS,
+                "budget": element_budget(options),
+                "foldViewports": settings.extraction_fold_viewports
+            })
+        except Exception as e:
+            print(f"Page context extraction failed: {e}")
+            return {}
@@ -1,38 +1,62 @@
 import asyncio
-import aiohttp
 import re
+import time
 import base64
-from typing import List, Dict, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+from contextlib import asynccontextmanager
 from urllib.parse import urljoin, urlparse
 from pathlib import Path
 import json
 
-from playwright.async_api import async_playwright, Page, Browser
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext
 from bs4 import BeautifulSoup
 from PIL import Image
 import cssutils
 
 from config import settings
 from models import ScrapedData, CloneOptions
+from page_extractor import PageExtractor
+from snapshot_extractor import SnapshotExtractor
+from services.browser_pool import BrowserPool, CHROMIUM_ARGS
+from services.css_coverage import CSSCoverage
+from services.domain_profiles import PAGE_WEIGHT_SCRIPT, domain_profiles
+from services.http_client import http_client
+from services.job_events import PartialCallback, emit_partial
+from services.lazy_loader import LazyContentLoader
+from services.page_readiness import PageReadinessMonitor
+from services.request_blocker import RequestBlocker
+from services.request_governor import governed_goto
+from services.scrape_cache import validators_from_headers
+from services.response_capture import ResponseCapture
+from services.response_sharing import SharedResponses
+from utils.image_utils import SCREENSHOT_EXTENSIONS, save_screenshot_pair
+
+# First line of the computed-style block _extract_css appends after the page's own CSS
+COMPUTED_CSS_HEADER = "/* Computed styles for key elements */"
+
+MOBILE_USER_AGENT = 'Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Mobile Safari/537.36'
 
 class WebScraper:
     """Advanced web scraper for extracting comprehensive design context from websites"""
     
-    def __init__(self):
+    def __init__(self, pool: Optional[BrowserPool] = None):
+        self.pool = pool
         self.browser: Optional[Browser] = None
         self.playwright = None
+        self.extractors = {
+            "javascript": PageExtractor(),
+            "snapshot": SnapshotExtractor()
+        }
         
     async def __aenter__(self):
         """Async context manager entry"""
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
-            headless=settings.headless_browser,
-            args=[
-                '--no-sandbox',
-                '--disable-dev-shm-usage',
-                '--disable-blink-features=AutomationControlled'
-            ]
-        )
+        # Pooled scrapers borrow warm browsers instead of launching their own
+        if self.pool is None:
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(
+                headless=settings.headless_browser,
+                args=CHROMIUM_ARGS
+            )
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -42,545 +66,321 @@ class WebScraper:
         if self.playwright:
             await self.playwright.stop()
     
-    async def scrape_website(self, url: str, options: CloneOptions) -> ScrapedData:
+    def _viewports(self, options: CloneOptions) -> List[Tuple[str, Dict]]:
+        """Named context options for the primary viewport plus any narrower breakpoints"""
+        viewports = [("desktop", {
+            'viewport': {
+                'width': options.viewport_width,
+                'height': options.viewport_height
+            }
+        })]
+        
+        if options.capture_breakpoints:
+            for name, (width, height) in settings.breakpoint_viewports.items():
+                if width < options.viewport_width:
+                    viewports.append((name, {
+                        'viewport': {'width': width, 'height': height},
+                        'is_mobile': True,
+                        'has_touch': True,
+                        'user_agent': MOBILE_USER_AGENT
+                    }))
+        return viewports
+    
+    @asynccontextmanager
+    async def _browser_contexts(self, *context_options: Dict) -> AsyncIterator[List[BrowserContext]]:
+        """Sibling browser contexts for a single scrape, leased from the pool when available"""
+        if self.pool is not None:
+            async with self.pool.contexts(*context_options) as contexts:
+                yield contexts
+        else:
+            contexts = []
+            try:
+                for options in context_options:
+                    contexts.append(await self.browser.new_context(**options))
+                yield contexts
+            finally:
+                for context in contexts:
+                    await context.close()
+    
+    async def scrape_website(
+        self,
+        url: str,
+        options: CloneOptions,
+        on_partial: Optional[PartialCallback] = None
+    ) -> ScrapedData:
         """
         Main scraping method that extracts comprehensive design context
+        
+        With capture_breakpoints, narrower viewports render concurrently in sibling
+        contexts of the same browser and share their subresource downloads.
+        on_partial receives the primary page's html, css, layout, colors, fonts,
+        images and screenshot as each becomes available.
         """
         try:
-            # Create a new page with custom viewport
-            page = await self.browser.new_page(
-                viewport={
-                    'width': options.viewport_width,
-                    'height': options.viewport_height
+            viewports = self._viewports(options)
+            async with self._browser_contexts(*(context_options for _, context_options in viewports)) as contexts:
+                if len(contexts) == 1:
+                    return await self._scrape_page(await contexts[0].new_page(), url, options, on_partial)
+                
+                shared = SharedResponses()
+                pages = []
+                for context in contexts:
+                    await shared.attach(context)
+                    pages.append(await context.new_page())
+                
+                scraped_data, *breakpoints = await asyncio.gather(
+                    self._scrape_page(pages[0], url, options, on_partial),
+                    *(
+                        self._scrape_breakpoint(page, url, options, name)
+                        for page, (name, _) in zip(pages[1:], viewports[1:])
+                    )
+                )
+                
+                scraped_data.breakpoints = {
+                    "desktop": {
+                        "width": options.viewport_width,
+                        "height": options.viewport_height,
+                        "layout_info": (scraped_data.dom_structure or {}).get("layout_info", {}),
+                        "screenshot_path": scraped_data.screenshot_path
+                    },
+                    **{name: data for (name, _), data in zip(viewports[1:], breakpoints)}
                 }
-            )
-            
+                scraped_data.scrape_metrics["shared_responses"] = shared.stats()
+                return scraped_data
+        except Exception as e:
+            raise Exception(f"Scraping failed: {str(e)}")
+    
+    async def _scrape_page(
+        self,
+        page: Page,
+        url: str,
+        options: CloneOptions,
+        on_partial: Optional[PartialCallback] = None
+    ) -> ScrapedData:
+        """Extract design context from a freshly opened page, publishing each piece as it completes"""
+        try:
             # Set user agent to avoid bot detection
             await page.set_extra_http_headers({
                 'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
             })
             
-            # Navigate to the page with timeout
-            await page.goto(url, wait_until='networkidle', timeout=options.max_wait_time * 1000)
+            # Abort media, tracker and third-party script requests before they go out
+            blocker = RequestBlocker.from_options(url, options)
+            await blocker.attach(page)
+            
+            # Record stylesheet, font and image bodies as the browser downloads them
+            capture = ResponseCapture()
+            capture.attach(page)
+            readiness_monitor = PageReadinessMonitor(page)
+            await readiness_monitor.attach()
+            
+            # Track which stylesheet rules match while the page renders
+            coverage = CSSCoverage(page) if options.prune_unused_css else None
+            if coverage:
+                await coverage.start()
+            
+            # Navigate, then wait only as long as the page keeps changing, as learned for this domain
+            plan = await domain_profiles.plan(url)
+            navigation_started = time.perf_counter()
+            try:
+                response = await governed_goto(
+                    page, url, wait_until=plan["wait_until"],
+                    timeout=min(plan["nav_timeout_ms"], options.max_wait_time * 1000)
+                )
+            except Exception:
+                await domain_profiles.record(url, plan, None, failed=True)
+                raise
+            navigation_ms = (time.perf_counter() - navigation_started) * 1000
+            readiness = await readiness_monitor.wait_until_ready(
+                min(plan["ready_cap_ms"], options.max_wait_time * 1000),
+                ignore=plan["ignore_signals"]
+            )
+            try:
+                page_bytes = await page.evaluate(PAGE_WEIGHT_SCRIPT)
+            except Exception:
+                page_bytes = None
+            await domain_profiles.record(url, plan, navigation_ms, readiness, page_bytes)
+            readiness["load_plan"] = plan
             
-            # Wait for dynamic content to load
-            await asyncio.sleep(3)
+            # Scroll through the page so lazy images and sections are in the DOM and screenshot
+            lazy_loading = await LazyContentLoader().load(page) if options.load_lazy_content else None
+            css_coverage = await coverage.stop() if coverage else None
             
             # Extract page data
             html_content = await page.content()
             title = await page.title()
+            await emit_partial(on_partial, "html", {"url": url, "title": title, "html": html_content})
+            
+            # Extract CSS, reusing the stylesheets the browser already downloaded
+            await capture.drain()
+            css_styles, stylesheet_timings = await self._extract_css(page, url, capture)
+            used_css = self._used_css(css_styles, css_coverage)
+            await emit_partial(on_partial, "css", {
+                "css": css_styles,
+                "used_css": used_css,
+                "stylesheets": stylesheet_timings
+            })
             
-            # Take screenshot
-            screenshot_path = None
-            if True:  # Always take screenshot for now
-                screenshot_path = await self._take_screenshot(page, url)
-            
-            # Extract comprehensive UI elements
-            ui_elements = await self._extract_ui_elements(page)
-            
-            # Extract CSS
-            css_styles = await self._extract_css(page, url)
-            
-            # Extract layout information
-            layout_info = await self._extract_layout_information(page)
-            
-            # Extract images
-            images = []
-            if options.include_images:
-                images = await self._extract_images(page, url)
-            
-            # Extract fonts
-            fonts = []
-            if options.include_fonts:
-                fonts = await self._extract_fonts(page)
-            
-            # Extract colors
-            colors = []
-            if options.extract_colors:
-                colors = await self._extract_colors(page)
-            
-            # Extract interactive elements
-            interactive_elements = await self._extract_interactive_elements(page)
-            
-            # Extract DOM structure with visual context
-            dom_structure = await self._analyze_dom_structure_enhanced(page)
-            
-            # Extract meta information
-            meta_description = await self._extract_meta_description(page)
-            viewport_meta = await self._extract_viewport_meta(page)
+            # Extract layout, palette, fonts, images and DOM structure in one pass
+            extractor = self.extractors[options.extraction_engine]
+            page_context = await extractor.extract(page, options)
             
-            await page.close()
+            images = page_context.get("images", []) if options.include_images else []
+            fonts = page_context.get("fonts", []) if options.include_fonts else []
+            colors = page_context.get("colors", []) if options.extract_colors else []
             
             # Combine all extracted data
             enhanced_dom_structure = {
-                **dom_structure,
-                "ui_elements": ui_elements,
-                "layout_info": layout_info,
-                "interactive_elements": interactive_elements
+                **page_context.get("dom_structure", {}),
+                "ui_elements": page_context.get("ui_elements", {}),
+                "layout_info": page_context.get("layout_info", {}),
+                "interactive_elements": page_context.get("interactive_elements", {}),
+                "style_table": page_context.get("style_table", {"fields": [], "rows": []})
             }
+            await emit_partial(on_partial, "layout", {
+                "dom_structure": enhanced_dom_structure,
+                "meta_description": page_context.get("meta_description"),
+                "viewport_meta": page_context.get("viewport_meta")
+            })
+            await emit_partial(on_partial, "colors", {"colors": colors})
+            await emit_partial(on_partial, "fonts", {"fonts": fonts})
+            await emit_partial(on_partial, "images", {"images": images})
+            
+            # Screenshot last: it is the slowest step and nothing above depends on it
+            screenshot_path, screenshot_report = await self._take_screenshot(page, url, options)
+            await emit_partial(on_partial, "screenshot", {"screenshot_path": screenshot_path, **screenshot_report})
             
             return ScrapedData(
                 url=url,
                 title=title,
                 html=html_content,
                 css=css_styles,
+                used_css=used_css,
                 images=images,
                 fonts=fonts,
                 colors=colors,
                 screenshot_path=screenshot_path,
                 dom_structure=enhanced_dom_structure,
-                meta_description=meta_description,
-                viewport_meta=viewport_meta
+                meta_description=page_context.get("meta_description"),
+                viewport_meta=page_context.get("viewport_meta"),
+                scrape_metrics={
+                    "mode": "browser",
+                    "readiness": readiness,
+                    "lazy_loading": lazy_loading,
+                    "screenshot": screenshot_report,
+                    "element_budget": page_context.get("element_budget"),
+                    "blocked_requests": blocker.stats(),
+                    "stylesheets": stylesheet_timings,
+                    "css_coverage": css_coverage["report"] if css_coverage else None,
+                    "captured_responses": capture.stats()
+                },
+                validators=validators_from_headers(response.headers if response else {}),
+                captured_responses=capture.responses
             )
             
-        except Exception as e:
-            if 'page' in locals():
-                await page.close()
-            raise Exception(f"Scraping failed: {str(e)}")
-    
-    async def _extract_ui_elements(self, page: Page) -> Dict:
-        """Extract comprehensive UI elements with visual properties"""
-        try:
-            ui_elements = await page.evaluate("""
-                () => {
-                    const elements = {
-                        buttons: [],
-                        inputs: [],
-                        navigation: [],
-                        cards: [],
-                        headers: [],
-                        content_blocks: [],
-                        images: [],
-                        layout_containers: []
-                    };
-                    
-                    // Helper function to get element info
-                    function getElementInfo(el) {
-                        const rect = el.getBoundingClientRect();
-                        const styles = window.getComputedStyle(el);
-                        
-                        return {
-                            tag: el.tagName.toLowerCase(),
-                            text: el.textContent?.trim().substring(0, 100) || '',
-                            class: el.className || '',
-                            id: el.id || '',
-                            position: {
-                                x: Math.round(rect.x),
-                                y: Math.round(rect.y),
-                                width: Math.round(rect.width),
-                                height: Math.round(rect.height)
-                            },
-                            styles: {
-                                backgroundColor: styles.backgroundColor,
-                                color: styles.color,
-                                fontSize: styles.fontSize,
-                                fontFamily: styles.fontFamily,
-                                padding: styles.padding,
-                                margin: styles.margin,
-                                border: styles.border,
-                                borderRadius: styles.borderRadius,
-                                display: styles.display,
-                                position: styles.position,
-                                zIndex: styles.zIndex
-                            },
-                            visible: rect.width > 0 && rect.height > 0 && styles.display !== 'none'
-                        };
-                    }
-                    
-                    // Extract buttons
-                    document.querySelectorAll('button, [role="button"], input[type="button"], input[type="submit"], .btn, .button').forEach(el => {
-                        if (el.getBoundingClientRect().width > 0) {
-                            elements.buttons.push(getElementInfo(el));
-                        }
-                    });
-                    
-                    // Extract form inputs
-                    document.querySelectorAll('input, textarea, select').forEach(el => {
-                        if (el.getBoundingClientRect().width > 0) {
-                            const info = getElementInfo(el);
-                            info.type = el.type || 'text';
-                            info.placeholder = el.placeholder || '';
-                            elements.inputs.push(info);
-                        }
-                    });
-                    
-                    // Extract navigation elements
-                    document.querySelectorAll('nav, .nav, .navbar, .navigation, [role="navigation"]').forEach(el => {
-                        if (el.getBoundingClientRect().width > 0) {
-                            const links = Array.from(el.querySelectorAll('a')).map(link => ({
-                                text: link.textContent?.trim() || '',
-                                href: link.href || '',
-                                ...getElementInfo(link)
-                            }));
-                            elements.navigation.push({
-                                ...getElementInfo(el),
-                                links: links
-                            });
-                        }
-                    });
-                    
-                    // Extract card-like elements
-                    document.querySelectorAll('.card, .post, .item, .product, .article, [class*="card"]').forEach(el => {
-                        if (el.getBoundingClientRect().width > 0) {
-                            elements.cards.push(getElementInfo(el));
-                        }
-                    });
-                    
-                    // Extract headers and important sections
-                    document.querySelectorAll('header, .header, h1, h2, h3').forEach(el => {
-                        if (el.getBoundingClientRect().width > 0) {
-                            elements.headers.push(getElementInfo(el));
-                        }
-                    });
-                    
-                    // Extract main content blocks
-                    document.querySelectorAll('main, .main, .content, .container, section, article').forEach(el => {
-                        if (el.getBoundingClientRect().width > 200) { // Only substantial content blocks
-                            elements.content_blocks.push(getElementInfo(el));
-                        }
-                    });
-                    
-                    // Extract images with more details
-                    document.querySelectorAll('img').forEach(el => {
-                        if (el.getBoundingClientRect().width > 0) {
-                            const info = getElementInfo(el);
-                            info.src = el.src || '';
-                            info.alt = el.alt || '';
-                            elements.images.push(info);
-                        }
-                    });
-                    
-                    // Extract layout containers
-                    document.querySelectorAll('div, section, aside, main').forEach(el => {
-                        const rect = el.getBoundingClientRect();
-                        const styles = window.getComputedStyle(el);
-                        
-                        // Only capture significant layout containers
-                        if (rect.width > 300 && rect.height > 100 && 
-                            (styles.display === 'flex' || styles.display === 'grid' || 
-                             el.children.length > 3)) {
-                            elements.layout_containers.push(getElementInfo(el));
-                        }
-                    });
-                    
-                    return elements;
-                }
-            """)
-            
-            return ui_elements
-            
-        except Exception as e:
-            print(f"UI elements extraction failed: {e}")
-            return {}
-    
-    async def _extract_layout_information(self, page: Page) -> Dict:
-        """Extract detailed layout and positioning information"""
-        try:
-            layout_info = await page.evaluate("""
-                () => {
-                    const layout = {
-                        page_structure: {},
-                        grid_systems: [],
-                        flexbox_layouts: [],
-                        positioning: [],
-                        spacing_patterns: {}
-                    };
-                    
-                    // Analyze page structure
-                    layout.page_structure = {
-                        width: document.documentElement.scrollWidth,
-                        height: document.documentElement.scrollHeight,
-                        viewport_width: window.innerWidth,
-                        viewport_height: window.innerHeight
-                    };
-                    
-                    // Find grid layouts
-                    document.querySelectorAll('*').forEach(el => {
-                        const styles = window.getComputedStyle(el);
-                        const rect = el.getBoundingClientRect();
-                        
-                        if (styles.display === 'grid' && rect.width > 0) {
-                            layout.grid_systems.push({
-                                element: el.tagName.toLowerCase(),
-                                class: el.className || '',
-                                grid_template_columns: styles.gridTemplateColumns,
-                                grid_template_rows: styles.gridTemplateRows,
-                                gap: styles.gap,
-                                position: {
-                                    x: Math.round(rect.x),
-                                    y: Math.round(rect.y),
-                                    width: Math.round(rect.width),
-                                    height: Math.round(rect.height)
-                                }
-                            });
-                        }
-                        
-                        if (styles.display === 'flex' && rect.width > 0) {
-                            layout.flexbox_layouts.push({
-                                element: el.tagName.toLowerCase(),
-                                class: el.className || '',
-                                flex_direction: styles.flexDirection,
-                                justify_content: styles.justifyContent,
-                                align_items: styles.alignItems,
-                                gap: styles.gap,
-                                position: {
-                                    x: Math.round(rect.x),
-                                    y: Math.round(rect.y),
-                                    width: Math.round(rect.width),
-                                    height: Math.round(rect.height)
-                                }
-                            });
-                        }
-                        
-                        // Track absolute/fixed positioning
-                        if (styles.position === 'absolute' || styles.position === 'fixed') {
-                            layout.positioning.push({
-                                element: el.tagName.toLowerCase(),
-                                class: el.className || '',
-                                position_type: styles.position,
-                                top: styles.top,
-                                left: styles.left,
-                                right: styles.right,
-                                bottom: styles.bottom,
-                                z_index: styles.zIndex
-                            });
-                        }
-                    });
-                    
-                    // Analyze spacing patterns
-                    const spacings = [];
-                    document.querySelectorAll('*').forEach(el => {
-                        const styles = window.getComputedStyle(el);
-                        if (styles.margin !== '0px' || styles.padding !== '0px') {
-                            spacings.push({
-                                margin: styles.margin,
-                                padding: styles.padding
-                            });
-                        }
-                    });
-                    
-                    // Find common spacing patterns
-                    const marginCounts = {};
-                    const paddingCounts = {};
-                    spacings.forEach(s => {
-                        marginCounts[s.margin] = (marginCounts[s.margin] || 0) + 1;
-                        paddingCounts[s.padding] = (paddingCounts[s.padding] || 0) + 1;
-                    });
-                    
-                    layout.spacing_patterns = {
-                        common_margins: Object.entries(marginCounts)
-                            .sort(([,a], [,b]) => b - a)
-                            .slice(0, 5)
-                            .map(([margin, count]) => ({ margin, count })),
-                        common_paddings: Object.entries(paddingCounts)
-                            .sort(([,a], [,b]) => b - a)
-                            .slice(0, 5)
-                            .map(([padding, count]) => ({ padding, count }))
-                    };
-                    
-                    return layout;
-                }
-            """)
-            
-            return layout_info
-            
-        except Exception as e:
-            print(f"Layout information extraction failed: {e}")
-            return {}
+        finally:
+            await page.close()
     
-    async def _extract_interactive_elements(self, page: Page) -> Dict:
-        """Extract interactive elements and their behaviors"""
+    async def _scrape_breakpoint(self, page: Page, url: str, options: CloneOptions, name: str) -> Dict:
+        """Render the page at a secondary breakpoint and extract its layout and screenshot"""
+        viewport = page.viewport_size or {}
         try:
-            interactive = await page.evaluate("""
-                () => {
-                    const interactive = {
-                        clickable_elements: [],
-                        form_elements: [],
-                        hover_effects: [],
-                        animations: []
-                    };
-                    
-                    // Find clickable elements
-                    document.querySelectorAll('a, button, [onclick], [role="button"], .clickable, [tabindex]').forEach(el => {
-                        const rect = el.getBoundingClientRect();
-                        if (rect.width > 0) {
-                            const styles = window.getComputedStyle(el);
-                            interactive.clickable_elements.push({
-                                tag: el.tagName.toLowerCase(),
-                                text: el.textContent?.trim().substring(0, 50) || '',
-                                class: el.className || '',
-                                href: el.href || '',
-                                cursor: styles.cursor,
-                                position: {
-                                    x: Math.round(rect.x),
-                                    y: Math.round(rect.y),
-                                    width: Math.round(rect.width),
-                                    height: Math.round(rect.height)
-                                }
-                            });
-                        }
-                    });
-                    
-                    // Find form elements
-                    document.querySelectorAll('form').forEach(form => {
-                        const formData = {
-                            action: form.action || '',
-                            method: form.method || 'get',
-                            inputs: []
-                        };
-                        
-                        form.querySelectorAll('input, textarea, select').forEach(input => {
-                            formData.inputs.push({
-                                type: input.type || 'text',
-                                name: input.name || '',
-                                placeholder: input.placeholder || '',
-                                required: input.required || false
-                            });
-                        });
-                        
-                        interactive.form_elements.push(formData);
-                    });
-                    
-                    // Check for potential hover effects (elements with :hover in CSS)
-                    document.querySelectorAll('*').forEach(el => {
-                        const styles = window.getComputedStyle(el);
-                        if (styles.cursor === 'pointer' || el.tagName.toLowerCase() === 'a' || el.tagName.toLowerCase() === 'button') {
-                            interactive.hover_effects.push({
-                                tag: el.tagName.toLowerCase(),
-                                class: el.className || '',
-                                cursor: styles.cursor,
-                                transition: styles.transition
-                            });
-                        }
-                    });
-                    
-                    return interactive;
-                }
-            """)
+            blocker = RequestBlocker.from_options(url, options)
+            await blocker.attach(page)
+            readiness_monitor = PageReadinessMonitor(page)
+            await readiness_monitor.attach()
+            
+            await governed_goto(page, url, wait_until='domcontentloaded', timeout=options.max_wait_time * 1000)
+            readiness = await readiness_monitor.wait_until_ready(
+                min(settings.page_ready_max_wait_ms, options.max_wait_time * 1000)
+            )
             
-            return interactive
+            # Scroll through the page so lazy images and sections are in the DOM and screenshot
+            lazy_loading = await LazyContentLoader().load(page) if options.load_lazy_content else None
             
-        except Exception as e:
-            print(f"Interactive elements extraction failed: {e}")
-            return {}
-    
-    async def _analyze_dom_structure_enhanced(self, page: Page) -> Dict:
-        """Enhanced DOM structure analysis with visual context"""
-        try:
-            structure = await page.evaluate("""
-                () => {
-                    const analysis = {
-                        totalElements: document.querySelectorAll('*').length,
-                        headings: document.querySelectorAll('h1, h2, h3, h4, h5, h6').length,
-                        images: document.querySelectorAll('img').length,
-                        links: document.querySelectorAll('a').length,
-                        forms: document.querySelectorAll('form').length,
-                        inputs: document.querySelectorAll('input, textarea, select').length,
-                        buttons: document.querySelectorAll('button, input[type="button"], input[type="submit"]').length,
-                        sections: document.querySelectorAll('section, article, div').length,
-                        navigation: document.querySelectorAll('nav, [role="navigation"]').length,
-                        flexboxElements: 0,
-                        gridElements: 0,
-                        visualHierarchy: [],
-                        colorDistribution: {},
-                        fontUsage: {}
-                    };
-                    
-                    // Count flexbox and grid layouts
-                    const allElements = document.querySelectorAll('*');
-                    const colorCounts = {};
-                    const fontCounts = {};
-                    
-                    allElements.forEach(el => {
-                        const style = window.getComputedStyle(el);
-                        const rect = el.getBoundingClientRect();
-                        
-                        if (style.display === 'flex' || style.display === 'inline-flex') {
-                            analysis.flexboxElements++;
-                        }
-                        if (style.display === 'grid' || style.display === 'inline-grid') {
-                            analysis.gridElements++;
-                        }
-                        
-                        // Track visual hierarchy by element size and position
-                        if (rect.width > 100 && rect.height > 50) {
-                            analysis.visualHierarchy.push({
-                                tag: el.tagName.toLowerCase(),
-                                area: rect.width * rect.height,
-                                position: {
-                                    x: Math.round(rect.x),
-                                    y: Math.round(rect.y)
-                                },
-                                zIndex: style.zIndex
-                            });
-                        }
-                        
-                        // Track color usage
-                        if (style.backgroundColor && style.backgroundColor !== 'rgba(0, 0, 0, 0)') {
-                            colorCounts[style.backgroundColor] = (colorCounts[style.backgroundColor] || 0) + 1;
-                        }
-                        
-                        // Track font usage
-                        if (style.fontFamily) {
-                            fontCounts[style.fontFamily] = (fontCounts[style.fontFamily] || 0) + 1;
-                        }
-                    });
-                    
-                    // Sort visual hierarchy by importance (size + position)
-                    analysis.visualHierarchy.sort((a, b) => b.area - a.area);
-                    analysis.visualHierarchy = analysis.visualHierarchy.slice(0, 20); // Top 20 elements
-                    
-                    // Get most common colors and fonts
-                    analysis.colorDistribution = Object.entries(colorCounts)
-                        .sort(([,a], [,b]) => b - a)
-                        .slice(0, 10)
-                        .reduce((obj, [color, count]) => ({ ...obj, [color]: count }), {});
-                    
-                    analysis.fontUsage = Object.entries(fontCounts)
-                        .sort(([,a], [,b]) => b - a)
-                        .slice(0, 5)
-                        .reduce((obj, [font, count]) => ({ ...obj, [font]: count }), {});
-                    
-                    return analysis;
-                }
-            """)
+            page_context = await self.extractors[options.extraction_engine].extract(page, options)
             
-            return structure
+            screenshot_path, screenshot_report = await self._take_screenshot(page, url, options, prefix=f"{name}_")
             
+            return {
+                "width": viewport.get("width"),
+                "height": viewport.get("height"),
+                "layout_info": page_context.get("layout_info", {}),
+                "ui_elements": page_context.get("ui_elements", {}),
+                "style_table": page_context.get("style_table", {"fields": [], "rows": []}),
+                "screenshot_path": screenshot_path,
+                "screenshot": screenshot_report,
+                "readiness": readiness,
+                "lazy_loading": lazy_loading
+            }
         except Exception as e:
-            print(f"Enhanced DOM analysis failed: {e}")
-            return {}
+            print(f"⚠️ {name} breakpoint capture failed: {e}")
+            return {"width": viewport.get("width"), "height": viewport.get("height"), "error": str(e)}
+        finally:
+            await page.close()
     
-    async def _take_screenshot(self, page: Page, url: str) -> str:
-        """Take full page screenshot with additional viewport screenshots"""
+    async def _take_screenshot(
+        self,
+        page: Page,
+        url: str,
+        options: CloneOptions,
+        prefix: str = ""
+    ) -> Tuple[Optional[str], Dict]:
+        """
+        Capture the full page once and derive the viewport image from it
+        
+        JPEG is encoded by the browser itself; PNG and WebP are encoded with Pillow.
+        Cropping, encoding and file writes run in a worker thread.
+        
+        Returns:
+            Tuple of the full-page screenshot path (None on failure) and a size/time report
+        """
+        image_format = options.screenshot_format
+        report = {"format": image_format, "quality": options.screenshot_quality}
         try:
             # Generate filename based on URL
             domain = urlparse(url).netloc.replace('.', '_')
             timestamp = int(asyncio.get_event_loop().time())
-            
-            # Take full page screenshot
-            full_screenshot = Path(settings.screenshots_path) / f"full_{domain}_{timestamp}.png"
-            await page.screenshot(
-                path=str(full_screenshot),
-                full_page=True,
-                type='png'
-            )
-            
-            # Take viewport screenshot (what user sees immediately)
-            viewport_screenshot = Path(settings.screenshots_path) / f"viewport_{domain}_{timestamp}.png"
-            await page.screenshot(
-                path=str(viewport_screenshot),
-                full_page=False,
-                type='png'
-            )
-            
-            return str(full_screenshot)
+            extension = SCREENSHOT_EXTENSIONS[image_format]
+            full_screenshot = Path(settings.screenshots_path) / f"{prefix}full_{domain}_{timestamp}.{extension}"
+            viewport_screenshot = Path(settings.screenshots_path) / f"{prefix}viewport_{domain}_{timestamp}.{extension}"
+            
+            started = time.perf_counter()
+            if image_format == 'jpeg':
+                raw = await page.screenshot(full_page=True, type='jpeg', quality=options.screenshot_quality)
+                raw_format = 'jpeg'
+            else:
+                raw = await page.screenshot(full_page=True, type='png')
+                raw_format = 'png'
+            report["capture_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            
+            report.update(await asyncio.to_thread(
+                save_screenshot_pair,
+                raw,
+                raw_format,
+                image_format,
+                options.screenshot_quality,
+                page.viewport_size or {},
+                full_screenshot,
+                viewport_screenshot
+            ))
+            
+            return str(full_screenshot), report
         except Exception as e:
             print(f"Screenshot failed: {e}")
-            return None
+            report["error"] = str(e)
+            return None, report
     
-    async def _extract_css(self, page: Page, url: str) -> List[str]:
-        """Extract all CSS styles from the page with computed styles"""
+    def _used_css(self, css_styles: List[str], css_coverage: Optional[Dict]) -> List[str]:
+        """Coverage-pruned stylesheets plus the computed-style summary, or [] when coverage is unavailable"""
+        if not css_coverage or css_coverage["report"].get("error"):
+            return []
+        computed = [css for css in css_styles[-1:] if css.startswith(COMPUTED_CSS_HEADER)]
+        return css_coverage["used_css"] + computed
+    
+    async def _extract_css(self, page: Page, url: str, capture: ResponseCapture) -> Tuple[List[str], List[Dict]]:
+        """Extract all CSS styles from the page with computed styles, plus per-stylesheet timings"""
+        stylesheet_timings = []
         try:
             css_styles = []
             
@@ -613,17 +413,10 @@ class WebScraper:
                 }
             """)
             
-            # Fetch external CSS
-            for stylesheet_url in stylesheets:
-                try:
-                    absolute_url = urljoin(url, stylesheet_url)
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(absolute_url, timeout=10) as response:
-                            if response.status == 200:
-                                css_content = await response.text()
-                                css_styles.append(css_content)
-                except Exception as e:
-                    print(f"Failed to fetch CSS from {stylesheet_url}: {e}")
+            # Use captured bodies, fetching only what the browser did not download
+            absolute_urls = [urljoin(url, stylesheet_url) for stylesheet_url in stylesheets]
+            external_css, stylesheet_timings = await http_client.fetch_stylesheets(absolute_urls, lookup=capture.text)
+            css_styles.extend(external_css)
             
             # Extract computed styles for key elements
             computed_styles = await page.evaluate("""
@@ -665,7 +458,7 @@ class WebScraper:
             
             # Convert computed styles to CSS
             if computed_styles:
-                computed_css = "/* Computed styles for key elements */\n"
+                computed_css = COMPUTED_CSS_HEADER + "\n"
                 for style_obj in computed_styles:
                     selector = style_obj.pop('selector')
                     computed_css += f"{selector} {{\n"
@@ -676,153 +469,8 @@ class WebScraper:
                     computed_css += "}\n\n"
                 css_styles.append(computed_css)
             
-            return css_styles
+            return css_styles, stylesheet_timings
             
         except Exception as e:
             print(f"CSS extraction failed: {e}")
-            return []
-    
-    async def _extract_images(self, page: Page, url: str) -> List[str]:
-        """Extract image URLs from the page with additional metadata"""
-        try:
-            images = await page.evaluate("""
-                () => {
-                    const imgs = [];
-                    const imgElements = document.querySelectorAll('img');
-                    imgElements.forEach(img => {
-                        const rect = img.getBoundingClientRect();
-                        if (img.src && img.src.startsWith('http') && rect.width > 0 && rect.height > 0) {
-                            imgs.push({
-                                src: img.src,
-                                alt: img.alt || '',
-                                width: rect.width,
-                                height: rect.height,
-                                loading: img.loading || 'eager'
-                            });
-                        }
-                    });
-                    
-                    // Also check for background images
-                    const elementsWithBg = document.querySelectorAll('*');
-                    elementsWithBg.forEach(el => {
-                        const style = window.getComputedStyle(el);
-                        const bgImage = style.backgroundImage;
-                        if (bgImage && bgImage !== 'none') {
-                            const match = bgImage.match(/url\(["']?([^"']*)["']?\)/);
-                            if (match && match[1] && match[1].startsWith('http')) {
-                                const rect = el.getBoundingClientRect();
-                                imgs.push({
-                                    src: match[1],
-                                    alt: 'Background image',
-                                    width: rect.width,
-                                    height: rect.height,
-                                    type: 'background'
-                                });
-                            }
-                        }
-                    });
-                    
-                    return [...new Set(imgs.map(img => img.src))]; // Remove duplicates, return just URLs for now
-                }
-            """)
-            
-            return images
-            
-        except Exception as e:
-            print(f"Image extraction failed: {e}")
-            return []
-    
-    async def _extract_fonts(self, page: Page) -> List[str]:
-        """Extract font families used on the page"""
-        try:
-            fonts = await page.evaluate("""
-                () => {
-                    const fontFamilies = new Set();
-                    
-                    // Get computed styles for all elements
-                    const elements = document.querySelectorAll('*');
-                    elements.forEach(el => {
-                        const style = window.getComputedStyle(el);
-                        const fontFamily = style.fontFamily;
-                        if (fontFamily) {
-                            // Split by comma and clean up
-                            fontFamily.split(',').forEach(font => {
-                                const cleaned = font.trim().replace(/["']/g, '');
-                                if (cleaned && !cleaned.includes('serif') && !cleaned.includes('sans-serif') && !cleaned.includes('monospace')) {
-                                    fontFamilies.add(cleaned);
-                                }
-                            });
-                        }
-                    });
-                    
-                    return Array.from(fontFamilies);
-                }
-            """)
-            
-            return fonts
-            
-        except Exception as e:
-            print(f"Font extraction failed: {e}")
-            return []
-    
-    async def _extract_colors(self, page: Page) -> List[str]:
-        """Extract dominant colors from the page"""
-        try:
-            colors = await page.evaluate("""
-                () => {
-                    const colors = new Set();
-                    
-                    // Get colors from computed styles
-                    const elements = document.querySelectorAll('*');
-                    elements.forEach(el => {
-                        const style = window.getComputedStyle(el);
-                        
-                        // Text colors
-                        if (style.color && style.color !== 'rgba(0, 0, 0, 0)') {
-                            colors.add(style.color);
-                        }
-                        
-                        // Background colors
-                        if (style.backgroundColor && style.backgroundColor !== 'rgba(0, 0, 0, 0)') {
-                            colors.add(style.backgroundColor);
-                        }
-                        
-                        // Border colors
-                        if (style.borderColor && style.borderColor !== 'rgba(0, 0, 0, 0)') {
-                            colors.add(style.borderColor);
-                        }
-                    });
-                    
-                    return Array.from(colors).slice(0, 20); // Limit to top 20 colors
-                }
-            """)
-            
-            return colors
-            
-        except Exception as e:
-            print(f"Color extraction failed: {e}")
-            return []
-    
-    async def _extract_meta_description(self, page: Page) -> Optional[str]:
-        """Extract meta description"""
-        try:
-            return await page.evaluate("""
-                () => {
-                    const meta = document.querySelector('meta[name="description"]');
-                    return meta ? meta.getAttribute('content') : null;
-                }
-            """)
-        except:
-            return None
-    
-    async def _extract_viewport_meta(self, page: Page) -> Optional[str]:
-        """Extract viewport meta tag"""
-        try:
-            return await page.evaluate("""
-                () => {
-                    const meta = document.querySelector('meta[name="viewport"]');
-                    return meta ? meta.getAttribute('content') : null;
-                }
-            """)
-        except:
-            return None 
\ No newline at end of file
+            return [], stylesheet_timings
@@ -2,11 +2,16 @@ import asyncio
 import time
 import hashlib
 from typing import Dict, Any, Optional
-from models import CloneRequest, CloneResponse, ScrapeArtifacts, CloneMemory, TokenUsage
+from models import CloneRequest, CloneResponse, ScrapeArtifacts, CloneMemory, TokenUsage, GenerationMetrics, TemplateMatch
+from services.browserbase_pool import browserbase_pool
+from services.browser_provider import BrowserProviderSelector
 from services.browserbase_scraper import BrowserbaseScraper
+from services.local_browser_scraper import LocalChromiumScraper
 from services.supabase_storage import SupabaseStorage
 from services.zep_memory import ZepMemoryStore
 from services.claude_generator import ClaudeGenerator
+from services.scrape_cache import scrape_cache
+from services.template_index import is_new_generation, reference_prompt, template_index
 from utils.prompt_builder import PromptBuilder
 from utils.image_utils import ImageProcessor
 from config import settings
@@ -25,10 +30,19 @@ class AgenticCloneService:
         """Initialize all services"""
         print("🚀 Initializing Agentic Clone services...")
         
-        self.scraper = BrowserbaseScraper(
-            api_key=settings.browserbase_api_key,
-            project_id=settings.browserbase_project_id
-        )
+        self.scraper = BrowserProviderSelector({
+            "browserbase": BrowserbaseScraper(
+                api_key=settings.browserbase_api_key,
+                project_id=settings.browserbase_project_id
+            ),
+            "local": LocalChromiumScraper()
+        })
+        # Create Browserbase sessions ahead of the first clone
+        if browserbase_pool.configured:
+            try:
+                await browserbase_pool.start()
+            except Exception as e:
+                print(f"⚠️ Browserbase session pool warmup failed, sessions will be created on demand: {e}")
         self.storage = SupabaseStorage(
             url=settings.supabase_url,
             key=settings.supabase_service_key,
@@ -60,7 +74,7 @@ class AgenticCloneService:
         try:
             # Step 1: Scrape website
             print(f"[STEP 1] Scraping {url_str}")
-            artifacts = await self.scraper.scrape_site(url_str)
+            artifacts = await self._scrape_site(url_str, request)
             
             # Step 2: Process and upload artifacts
             print(f"[STEP 2] Processing artifacts")
@@ -103,8 +117,26 @@ class AgenticCloneService:
             # Step 4: Generate HTML with AI (optional if Anthropic key available)
             ai_generated_html = None
             token_usage = None
+            generation_metrics = None
+            
+            # A page on a template we've already cloned reuses (or starts from) that generation
+            reuse_templates = request.options is None or request.options.reuse_templates
+            template = None
+            if reuse_templates:
+                try:
+                    template = await template_index.find(artifacts.dom_html)
+                except Exception as template_error:
+                    print(f"⚠️ Template lookup failed: {template_error}")
             
-            if settings.anthropic_api_key:
+            if template and template["mode"] == "direct":
+                print(f"[STEP 4] Reusing clone of {template['source_url']} ({template['similarity']:.0%} structurally similar)")
+                ai_generated_html = template["html"]
+                try:
+                    ai_url = await self.storage.upload_file(ai_generated_html.encode(), f"{url_hash}/ai_generated.html")
+                    artifacts_dict["ai_generated"] = ai_url
+                except Exception as upload_error:
+                    print(f"⚠️ Upload of reused clone failed: {upload_error}")
+            elif settings.anthropic_api_key:
                 try:
                     print(f"[STEP 4] Generating AI-enhanced HTML")
                     prompt = await self.prompt_builder.build_prompt(
@@ -112,9 +144,21 @@ class AgenticCloneService:
                         similar_memories, 
                         request.options.target_style
                     )
+                    if template:
+                        seeded = prompt + reference_prompt(template)
+                        if self.prompt_builder.count_tokens(seeded) <= settings.max_tokens:
+                            print(f"🧩 Seeding generation with clone of {template['source_url']} ({template['similarity']:.0%} similar)")
+                            prompt = seeded
+                        else:
+                            template = None
                     
                     if self.prompt_builder.count_tokens(prompt) <= settings.max_tokens:
-                        generation_result = await self.generator.generate_html(prompt, artifacts.url)
+                        generation_result = await self.generator.generate_html(
+                            prompt,
+                            artifacts.url,
+                            artifacts.captured_responses,
+                            use_cache=request.options is None or request.options.use_llm_cache
+                        )
                         ai_generated_html = generation_result["html"]
                         token_usage_dict = generation_result["token_usage"]
                         
@@ -123,13 +167,22 @@ class AgenticCloneService:
                             output_tokens=token_usage_dict["output_tokens"],
                             total_cost_usd=token_usage_dict["total_cost_usd"]
                         )
+                        if generation_result.get("generation_metrics"):
+                            generation_metrics = GenerationMetrics(**generation_result["generation_metrics"])
+                        if not generation_result.get("success"):
+                            # The fallback page was not built from the reference
+                            template = None
+                        elif reuse_templates and is_new_generation(generation_result):
+                            await template_index.add(artifacts.url, artifacts.dom_html, ai_generated_html)
                         
                         # Upload AI-generated version
                         ai_url = await self.storage.upload_file(ai_generated_html.encode(), f"{url_hash}/ai_generated.html")
                         artifacts_dict["ai_generated"] = ai_url
                     else:
+                        template = None
                         print("⚠️ Content too large for AI generation")
                 except Exception as ai_error:
+                    template = None
                     print(f"⚠️ AI generation failed: {ai_error}")
             else:
                 print(f"[STEP 4] AI generation skipped (no Anthropic key)")
@@ -160,6 +213,8 @@ class AgenticCloneService:
                 artifacts_urls=artifacts_dict,
                 processing_time=processing_time,
                 token_usage=token_usage,
+                generation_metrics=generation_metrics,
+                template_match=TemplateMatch(**template) if template else None,
                 memory_id=memory_id,
                 similar_sites_found=len(similar_memories)
             )
@@ -177,15 +232,33 @@ class AgenticCloneService:
                 processing_time=processing_time
             )
     
+    async def _scrape_site(self, url: str, request: CloneRequest) -> ScrapeArtifacts:
+        """Scrape through the selected browser provider, reusing a cached scrape when the page is unchanged"""
+        use_cache = request.options is None or request.options.use_scrape_cache
+        if use_cache:
+            cached = await scrape_cache.get_artifacts(url, request.options)
+            if cached:
+                print(f"♻️ Reusing cached scrape of {url}")
+                return cached
+        
+        artifacts = await self.scraper.scrape_site(url, request.options)
+        if use_cache:
+            await scrape_cache.put_artifacts(url, request.options, artifacts)
+        return artifacts
+    
     async def _create_enhanced_html(self, artifacts: ScrapeArtifacts, url_hash: str) -> str:
         """
         Create an enhanced HTML version with preserved styling and fixed assets
         """
         # Clean up the HTML and preserve CSS
         html_content = artifacts.dom_html
-        css_content = artifacts.css_content
         image_info = artifacts.image_info or {}
         
+        # Embed only the rules that matched the page; covered stylesheets need no <link>
+        css_content = artifacts.used_css if artifacts.used_css is not None else artifacts.css_content
+        coverage = artifacts.scrape_metrics.get("css_coverage") or {}
+        covered_urls = set(coverage.get("covered_urls", [])) if artifacts.used_css is not None else set()
+        
         # Clean up the HTML content and escape any problematic characters
         clean_html_content = self._extract_body_content(html_content)
         clean_css = self._optimize_css_comprehensive(css_content)
@@ -203,7 +276,7 @@ class AgenticCloneService:
     <meta name="description" content="{artifacts.metadata.get('description', '')}">
     
     <!-- External CSS Links (preserved from original) -->
-    {self._extract_external_css_links(html_content)}
+    {self._extract_external_css_links(html_content, artifacts.url, covered_urls)}
     
     <!-- Comprehensive Preserved CSS -->
     <style>
@@ -373,16 +446,25 @@ class AgenticCloneService:
         
         return '\n'.join(cleaned_lines)
     
-    def _extract_external_css_links(self, html_content: str) -> str:
+    def _extract_external_css_links(self, html_content: str, base_url: str = "", skip_urls: Optional[set] = None) -> str:
         """
         Extract and preserve external CSS link tags from original HTML
+        
+        Stylesheets in skip_urls are already embedded (pruned by CSS coverage) and are left out.
         """
         import re
+        from urllib.parse import urljoin
         
         # Find all link tags for stylesheets
         link_pattern = r'<link[^>]*rel=["\']stylesheet["\'][^>]*>'
         links = re.findall(link_pattern, html_content, re.IGNORECASE)
         
+        if skip_urls:
+            def href_of(link: str) -> str:
+                match = re.search(r'href=["\']([^"\']+)["\']', link, re.IGNORECASE)
+                return urljoin(base_url, match.group(1)) if match else ""
+            links = [link for link in links if href_of(link) not in skip_urls]
+        
         return '\n    '.join(links) if links else ''
     
     def _generate_background_css(self, image_info: dict) -> str:
@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import html
+import ipaddress
+import mimetypes
+import re
+import time
+from pathlib import Path, PurePosixPath
+from typing import Any, Collection, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config import settings
+from models import CapturedResponse
+from services.http_client import http_client
+
+MIRRORED_CONTENT_TYPES = ("image/", "font/", "application/font", "application/x-font", "application/vnd.ms-fontobject")
+
+# Extensions for types mimetypes does not know or maps inconsistently across platforms
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/svg+xml": ".svg",
+    "image/webp": ".webp",
+    "image/avif": ".avif",
+    "image/x-icon": ".ico",
+    "image/vnd.microsoft.icon": ".ico",
+    "font/woff": ".woff",
+    "font/woff2": ".woff2",
+    "font/ttf": ".ttf",
+    "font/otf": ".otf",
+    "application/font-woff": ".woff",
+    "application/font-woff2": ".woff2",
+    "application/vnd.ms-fontobject": ".eot"
+}
+# Leading bytes of font and image formats, for bodies served as application/octet-stream
+SIGNATURES = (
+    b"wOFF", b"wOF2", b"\x00\x01\x00\x00", b"OTTO", b"true", b"ttcf",
+    b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff", b"GIF87a", b"GIF89a", b"BM", b"\x00\x00\x01\x00"
+)
+
+# Absolute asset references in generated HTML/CSS: src/poster/data-src attributes and CSS url()
+ASSET_REFERENCE = re.compile(
+    r'''(?:\bsrc|\bposter|\bdata-src)\s*=\s*["'](https?://[^"'\s>]+)["']|url\(\s*["']?(https?://[^"')\s]+)["']?\s*\)''',
+    re.IGNORECASE
+)
+SRCSET = re.compile(r'''\bsrcset\s*=\s*["']([^"']+)["']''', re.IGNORECASE)
+
+def referenced_asset_urls(*contents: str) -> List[str]:
+    """Absolute image and font URLs a clone references, in first-seen order"""
+    found = []
+    for content in contents:
+        for match in ASSET_REFERENCE.finditer(content or ""):
+            found.append(html.unescape(match.group(1) or match.group(2)))
+        for match in SRCSET.finditer(content or ""):
+            for candidate in match.group(1).split(","):
+                url = candidate.strip().split(" ")[0]
+                if url.startswith(("http://", "https://")):
+                    found.append(html.unescape(url))
+    return list(dict.fromkeys(found))
+
+def _is_mirrorable(content_type: str, body: bytes) -> bool:
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type.startswith(MIRRORED_CONTENT_TYPES):
+        return True
+    # Fonts are often served as application/octet-stream; trust the bytes, never the extension
+    if body.startswith(SIGNATURES):
+        return True
+    # WebP/AVIF are RIFF/ISO-BMFF containers; EOT carries its magic at offset 34
+    return (
+        (body[:4] == b"RIFF" and body[8:12] == b"WEBP")
+        or body[4:12] in (b"ftypavif", b"ftypavis")
+        or body[34:36] == b"LP"
+    )
+
+async def is_public_host(url: str) -> bool:
+    """Whether every address the URL's host resolves to is publicly routable (no private, loopback or link-local targets)"""
+    host = urlsplit(url).hostname
+    if not host:
+        return False
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(host, None)
+    except OSError:
+        return False
+    return bool(addresses) and all(
+        ipaddress.ip_address(address[4][0].split("%")[0]).is_global for address in addresses
+    )
+
+def _extension(content_type: str, url: str) -> str:
+    content_type = content_type.split(";")[0].strip().lower()
+    extension = EXTENSIONS.get(content_type) or mimetypes.guess_extension(content_type) or ""
+    if not extension or extension == ".bin":
+        extension = PurePosixPath(urlsplit(url).path).suffix.lower()[:8]
+    return extension
+
+class AssetMirror:
+    """Copies a clone's images and fonts into local content-addressed storage and rewrites references to them"""
+
+    def __init__(self, root: Optional[str] = None, public_url: Optional[str] = None):
+        self.root = Path(root or settings.assets_storage_path)
+        self.public_url = (public_url or settings.asset_mirror_public_url).rstrip("/")
+        self.max_bytes = settings.asset_mirror_max_mb * 1024 * 1024
+        # Assets already mirrored by earlier jobs, so repeat URLs skip the download
+        self._by_url: Dict[str, str] = {}
+
+    async def mirror(
+        self,
+        urls: Iterable[str],
+        captured: Optional[Dict[str, CapturedResponse]] = None,
+        downloadable: Optional[Collection[str]] = None
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        Store each asset under its content hash, downloading only what the browser did not capture
+
+        URLs come from generated markup, so only those in downloadable (the
+        assets the scrape itself found) are fetched, and only from public hosts.
+
+        Returns:
+            Tuple of {original URL: local URL} for every mirrored asset and a report
+            with counts, bytes and elapsed time
+        """
+        started = time.perf_counter()
+        captured = captured or {}
+        downloadable = downloadable or ()
+        candidates = [url for url in dict.fromkeys(urls) if url.startswith(("http://", "https://"))]
+        candidates = candidates[:settings.asset_mirror_max_assets]
+        report = {"requested": len(candidates), "reused": 0, "captured": 0, "downloaded": 0,
+                  "deduplicated": 0, "refused": 0, "failed": 0, "bytes_written": 0}
+
+        async def mirror_one(url: str) -> Optional[str]:
+            if url in self._by_url:
+                report["reused"] += 1
+                return self._by_url[url]
+
+            response = captured.get(url)
+            if response is not None:
+                body, content_type = response.body, response.content_type
+                report["captured"] += 1
+            else:
+                if url not in downloadable or not await is_public_host(url):
+                    report["refused"] += 1
+                    return None
+                # Per-host limits come from the request governor inside http_client
+                result = await http_client.fetch(url, as_text=False)
+                body, content_type = result["body"], result["headers"].get("content-type", "")
+                if body is None:
+                    report["failed"] += 1
+                    return None
+                report["downloaded"] += 1
+
+            if not body or len(body) > self.max_bytes or not _is_mirrorable(content_type, body):
+                report["failed"] += 1
+                return None
+
+            name, written = await asyncio.to_thread(self._store, body, _extension(content_type, url))
+            if written:
+                report["bytes_written"] += len(body)
+            else:
+                report["deduplicated"] += 1
+            self._by_url[url] = f"{self.public_url}/{name}"
+            return self._by_url[url]
+
+        local_urls = await asyncio.gather(*(mirror_one(url) for url in candidates), return_exceptions=True)
+        mapping = {url: local for url, local in zip(candidates, local_urls) if isinstance(local, str)}
+        report["failed"] += sum(isinstance(local, Exception) for local in local_urls)
+        report["mirrored"] = len(mapping)
+        report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return mapping, report
+
+    def _store(self, body: bytes, extension: str) -> Tuple[str, bool]:
+        """
+        Write a body under its SHA-256, shared by every job that references it
+
+        Returns:
+            Tuple of the path relative to the asset root and whether it was newly written
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        name = f"{digest[:2]}/{digest}{extension}"
+        path = self.root / name
+        if path.exists():
+            return name, False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f".{path.name}.{time.monotonic_ns()}")
+        staging.write_bytes(body)
+        staging.replace(path)
+        return name, True
+
+    def rewrite(self, content: str, mapping: Dict[str, str]) -> str:
+        """Point every reference to a mirrored URL (raw or HTML-escaped) at its local copy"""
+        if not mapping:
+            return content
+
+        replacements = {}
+        for url, local in mapping.items():
+            replacements[url] = local
+            replacements[url.replace("&", "&amp;")] = local
+
+        # Longest first, and only whole URLs, so a URL is never clipped by another that prefixes it
+        alternatives = "|".join(re.escape(url) for url in sorted(replacements, key=len, reverse=True))
+        pattern = re.compile(f"(?:{alternatives})(?![^\\s\"'()<>,])")
+        return pattern.sub(lambda match: replacements[match.group(0)], content)
+
+# Global asset mirror shared across clone jobs
+asset_mirror = AssetMirror()
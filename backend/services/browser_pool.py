@@ -0,0 +1,279 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+from config import settings
+
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled'
+]
+
+class PooledBrowser:
+    """A warm Chromium instance owned by the pool"""
+
+    def __init__(self, browser_id: int, browser: Browser):
+        self.id = browser_id
+        self.browser = browser
+        self.launched_at = time.time()
+        self.active_contexts = 0
+        self.pages_served = 0
+        self.memory_mb: Optional[float] = None
+        self.retiring = False
+
+    def is_usable(self, max_contexts: int, needed: int = 1) -> bool:
+        return (
+            not self.retiring
+            and self.browser.is_connected()
+            and self.active_contexts + needed <= max_contexts
+        )
+
+class BrowserPool:
+    """Long-lived pool of Chromium browsers handing out isolated contexts per job"""
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        contexts_per_browser: Optional[int] = None,
+        max_pages_per_browser: Optional[int] = None,
+        max_memory_mb: Optional[int] = None
+    ):
+        self.size = size or settings.browser_pool_size
+        self.contexts_per_browser = contexts_per_browser or settings.browser_pool_contexts_per_browser
+        self.max_pages_per_browser = max_pages_per_browser or settings.browser_pool_max_pages_per_browser
+        self.max_memory_mb = max_memory_mb or settings.browser_pool_max_memory_mb
+
+        self.playwright = None
+        self.browsers: List[PooledBrowser] = []
+        self._lock = asyncio.Lock()
+        # Guards _in_use, the number of contexts leased across the pool
+        self._available = asyncio.Condition()
+        self._next_id = 0
+        self._waiting = 0
+        self._in_use = 0
+        self._started = False
+        self.counters = {
+            "launches": 0,
+            "recycles": 0,
+            "contexts_served": 0,
+            "pages_served": 0
+        }
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    @property
+    def capacity(self) -> int:
+        return self.size * self.contexts_per_browser
+
+    async def start(self):
+        """Start Playwright and warm the pool's browsers"""
+        async with self._lock:
+            if self._started:
+                return
+
+            self.playwright = await async_playwright().start()
+            try:
+                for _ in range(self.size):
+                    await self._launch_browser()
+            except Exception:
+                # Leave the pool unstarted so the next lease retries the launch
+                browsers, self.browsers = self.browsers, []
+                for pooled in browsers:
+                    await self._close_browser(pooled)
+                await self.playwright.stop()
+                self.playwright = None
+                raise
+            self._started = True
+
+        print(f"🌐 Browser pool ready: {self.size} browsers x {self.contexts_per_browser} contexts")
+
+    async def close(self):
+        """Close every browser and stop Playwright"""
+        async with self._lock:
+            browsers, self.browsers = self.browsers, []
+            self._started = False
+
+        for pooled in browsers:
+            await self._close_browser(pooled)
+
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+
+    @asynccontextmanager
+    async def context(self, **context_options: Any) -> AsyncIterator[BrowserContext]:
+        """
+        Lease an isolated BrowserContext from a warm browser.
+
+        Waits when the pool is saturated; the context is closed on exit.
+        """
+        async with self.contexts(context_options) as (context,):
+            yield context
+
+    @asynccontextmanager
+    async def contexts(self, *context_options: Dict[str, Any]) -> AsyncIterator[List[BrowserContext]]:
+        """
+        Lease sibling BrowserContexts from the same warm browser, one per options dict.
+
+        The lease takes one pool slot per context, all at once, so multi-viewport
+        scrapes cannot deadlock each other on partial leases.
+        """
+        needed = len(context_options)
+        if needed > self.contexts_per_browser:
+            raise ValueError(f"A lease of {needed} contexts exceeds {self.contexts_per_browser} contexts per browser")
+        if not self._started:
+            await self.start()
+
+        async with self._available:
+            self._waiting += 1
+            try:
+                await self._available.wait_for(lambda: self._in_use + needed <= self.capacity)
+            finally:
+                self._waiting -= 1
+            self._in_use += needed
+
+        try:
+            pooled = await self._checkout(needed)
+            pages_opened = 0
+
+            def _count_page(_page):
+                nonlocal pages_opened
+                pages_opened += 1
+
+            contexts: List[BrowserContext] = []
+            try:
+                for options in context_options:
+                    context = await pooled.browser.new_context(**options)
+                    context.on("page", _count_page)
+                    contexts.append(context)
+                    self.counters["contexts_served"] += 1
+                yield contexts
+            finally:
+                for context in contexts:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        print(f"⚠️ Failed to close browser context: {e}")
+                await self._checkin(pooled, pages_opened, needed)
+        finally:
+            async with self._available:
+                self._in_use -= needed
+                self._available.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool saturation and per-browser statistics"""
+        now = time.time()
+        return {
+            "started": self._started,
+            "size": self.size,
+            "capacity": self.capacity,
+            "in_use": self._in_use,
+            "available": max(self.capacity - self._in_use, 0),
+            "waiting": self._waiting,
+            "saturation": round(self._in_use / self.capacity, 3) if self.capacity else 0.0,
+            "browsers": [
+                {
+                    "id": pooled.id,
+                    "active_contexts": pooled.active_contexts,
+                    "pages_served": pooled.pages_served,
+                    "memory_mb": pooled.memory_mb,
+                    "age_seconds": round(now - pooled.launched_at, 1),
+                    "retiring": pooled.retiring
+                }
+                for pooled in self.browsers
+            ],
+            **self.counters
+        }
+
+    async def _launch_browser(self) -> PooledBrowser:
+        """Launch a browser and register it with the pool (caller holds the lock)"""
+        browser = await self.playwright.chromium.launch(
+            headless=settings.headless_browser,
+            args=CHROMIUM_ARGS
+        )
+        pooled = PooledBrowser(self._next_id, browser)
+        self._next_id += 1
+        self.browsers.append(pooled)
+        self.counters["launches"] += 1
+        return pooled
+
+    async def _checkout(self, contexts: int = 1) -> PooledBrowser:
+        """Pick the least loaded healthy browser with room for the lease, launching a replacement if needed"""
+        async with self._lock:
+            dead = [b for b in self.browsers if not b.browser.is_connected()]
+            for pooled in dead:
+                self.browsers.remove(pooled)
+
+            candidates = [b for b in self.browsers if b.is_usable(self.contexts_per_browser, contexts)]
+            if candidates:
+                pooled = min(candidates, key=lambda b: b.active_contexts)
+            else:
+                # Retiring browsers still drain their contexts, so a replacement
+                # may briefly run alongside them
+                pooled = await self._launch_browser()
+
+            pooled.active_contexts += contexts
+            return pooled
+
+    async def _checkin(self, pooled: PooledBrowser, pages_opened: int, contexts: int = 1):
+        """Return a lease and recycle the browser once it is worn out"""
+        pooled.pages_served += pages_opened
+        self.counters["pages_served"] += pages_opened
+
+        if not pooled.retiring:
+            if pooled.pages_served >= self.max_pages_per_browser:
+                pooled.retiring = True
+            else:
+                pooled.memory_mb = await self._measure_memory_mb(pooled.browser)
+                if pooled.memory_mb is not None and pooled.memory_mb > self.max_memory_mb:
+                    pooled.retiring = True
+
+        async with self._lock:
+            pooled.active_contexts -= contexts
+            should_close = pooled.retiring and pooled.active_contexts == 0
+            if should_close and pooled in self.browsers:
+                self.browsers.remove(pooled)
+
+        if should_close:
+            print(f"♻️ Recycling browser {pooled.id} after {pooled.pages_served} pages ({pooled.memory_mb} MB)")
+            self.counters["recycles"] += 1
+            await self._close_browser(pooled)
+
+    async def _close_browser(self, pooled: PooledBrowser):
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            print(f"⚠️ Failed to close browser {pooled.id}: {e}")
+
+    async def _measure_memory_mb(self, browser: Browser) -> Optional[float]:
+        """Sum the resident memory of the browser's processes (Linux only)"""
+        try:
+            cdp = await browser.new_browser_cdp_session()
+            try:
+                info = await cdp.send("SystemInfo.getProcessInfo")
+            finally:
+                await cdp.detach()
+
+            total_kb = 0
+            for process in info.get("processInfo", []):
+                status = Path(f"/proc/{process['id']}/status")
+                if not status.exists():
+                    continue
+                for line in status.read_text().splitlines():
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+
+            return round(total_kb / 1024, 1) if total_kb else None
+        except Exception:
+            return None
+
+# Global browser pool instance, started and stopped by the app lifespan
+browser_pool = BrowserPool()
@@ -0,0 +1,499 @@
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional
+from playwright.async_api import Page
+from models import CloneOptions, ScrapeArtifacts
+from page_extractor import ELEMENT_BUDGET_SCRIPT, element_budget
+from config import settings
+from services.css_coverage import CSSCoverage
+from services.domain_profiles import PAGE_WEIGHT_SCRIPT, domain_profiles
+from services.lazy_loader import LazyContentLoader
+from services.page_readiness import PageReadinessMonitor
+from services.request_blocker import RequestBlocker
+from services.request_governor import governed_goto
+from services.scrape_cache import validators_from_headers
+from services.response_capture import ResponseCapture
+
+# Marks where the computed-style block starts in the extracted css_content
+COMPUTED_CSS_HEADER = "/* Key Computed Styles */"
+
+class BrowserProvider(ABC):
+    """
+    A browser backend for the agentic pipeline
+    
+    Providers only decide where a page comes from (page()); every provider runs
+    the same capture pipeline in scrape_page(), so they produce identical
+    ScrapeArtifacts for the same page.
+    """
+    
+    name = "base"
+    # Whether the provider disguises automation well enough for bot-protected sites
+    stealth = False
+    
+    @property
+    def available(self) -> bool:
+        return True
+    
+    @abstractmethod
+    def page(self, url: str, options: Optional[CloneOptions] = None) -> AsyncIterator[Page]:
+        """Async context manager yielding a fresh page to render url in"""
+    
+    async def close(self):
+        pass
+    
+    async def scrape_site(self, url: str, options: Optional[CloneOptions] = None) -> ScrapeArtifacts:
+        """Render url in a page from this provider and capture its artifacts"""
+        try:
+            async with self.page(url, options) as page:
+                artifacts = await self.scrape_page(page, url, options)
+        except Exception as e:
+            print(f"❌ Error during {self.name} scraping: {str(e)}")
+            raise
+        
+        artifacts.scrape_metrics["browser_provider"] = self.name
+        return artifacts
+    
+    async def scrape_page(self, page: Page, url: str, options: Optional[CloneOptions] = None) -> ScrapeArtifacts:
+        """
+        Complete capture pipeline for one page: navigation, readiness, lazy content,
+        CSS, images, screenshot and metadata
+        """
+        # Set a realistic user agent for better compatibility
+        await page.set_extra_http_headers({
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        })
+        
+        # Abort media, tracker and third-party script requests before they go out
+        blocker = RequestBlocker.from_options(url, options)
+        await blocker.attach(page)
+        
+        # Record stylesheet, font and image bodies as the browser downloads them
+        capture = ResponseCapture()
+        capture.attach(page)
+        
+        readiness_monitor = PageReadinessMonitor(page)
+        await readiness_monitor.attach()
+        
+        # Track which stylesheet rules match while the page renders
+        coverage = None
+        if options is None or options.prune_unused_css:
+            coverage = CSSCoverage(page)
+            await coverage.start()
+        
+        print(f"🌐 Navigating to: {url}")
+        # Step 3: Navigate and wait as this domain's learned load profile suggests
+        plan = await domain_profiles.plan(url)
+        if plan["learned"]:
+            print(f"📈 Using learned profile for {plan['domain']}: {plan['wait_until']} within {plan['nav_timeout_ms']}ms, ready cap {plan['ready_cap_ms']}ms")
+        
+        navigation_started = time.perf_counter()
+        nav_failed = False
+        try:
+            response = await governed_goto(page, url, wait_until=plan["wait_until"], timeout=plan["nav_timeout_ms"])
+        except Exception as nav_error:
+            nav_failed = True
+            if plan["wait_until"] == "commit":
+                await domain_profiles.record(url, plan, None, failed=True)
+                raise
+            print(f"⚠️ Navigation failed ({nav_error}), retrying without waiting for DOMContentLoaded...")
+            # Fallback: only wait for the response; the readiness monitor covers the rest
+            navigation_started = time.perf_counter()
+            try:
+                response = await governed_goto(page, url, wait_until="commit", timeout=settings.domain_profile_max_nav_timeout_ms)
+            except Exception:
+                await domain_profiles.record(url, plan, None, failed=True)
+                raise
+            print("✅ Page loaded with fallback strategy")
+        navigation_ms = (time.perf_counter() - navigation_started) * 1000
+        
+        # Wait for the DOM, network, fonts and layout to settle instead of fixed sleeps
+        print("⏱️ Waiting for the page to settle...")
+        readiness = await readiness_monitor.wait_until_ready(plan["ready_cap_ms"], ignore=plan["ignore_signals"])
+        if readiness["ready"]:
+            print(f"✅ Page ready after {readiness['elapsed_ms']}ms")
+        else:
+            print(f"⚠️ Page still busy after {readiness['elapsed_ms']}ms ({', '.join(readiness['waiting_on'])}), proceeding with available content")
+        
+        try:
+            page_bytes = await page.evaluate(PAGE_WEIGHT_SCRIPT)
+        except Exception:
+            page_bytes = None
+        await domain_profiles.record(url, plan, navigation_ms, readiness, page_bytes, failed=nav_failed)
+        readiness["load_plan"] = plan
+        
+        # Scroll through the page so lazy images and sections load before extraction
+        lazy_loading = None
+        if options is None or options.load_lazy_content:
+            print("📜 Scrolling to load lazy content...")
+            lazy_loading = await LazyContentLoader().load(page)
+            print(f"✅ Lazy loading triggered {lazy_loading['triggered_count']} assets in {lazy_loading['elapsed_ms']}ms ({lazy_loading['stopped_because']})")
+        
+        css_coverage = await coverage.stop() if coverage else None
+        if css_coverage and not css_coverage["report"].get("error"):
+            report = css_coverage["report"]
+            print(f"✂️ CSS coverage: {report['rules_used']}/{report['rules']} rules matched, {report['bytes_used'] // 1024}/{report['bytes_total'] // 1024} KB kept")
+        
+        blocked = blocker.stats()
+        if blocked["requests_blocked"]:
+            print(f"🚫 Blocked {blocked['requests_blocked']} requests (~{blocked['estimated_bytes_saved'] // 1024} KB saved)")
+        
+        print("🧹 Cleaning up unwanted elements...")
+        # Step 4: Remove unwanted elements (scripts, ads, tracking)
+        await page.evaluate("""
+            // Remove scripts, ads, tracking elements
+            document.querySelectorAll(`
+                script, noscript, 
+                iframe[src*="ads"], iframe[src*="google"], iframe[src*="facebook"],
+                [class*="ad-"], [class*="ads"], [class*="advertisement"],
+                [id*="ad-"], [id*="ads"], [id*="advertisement"],
+                [class*="tracking"], [class*="analytics"], [class*="gtm"],
+                [data-ad], [data-ads]
+            `).forEach(el => el.remove());
+        """)
+        
+        print("📄 Extracting DOM HTML...")
+        # Step 5: Extract clean DOM HTML
+        clean_html = await page.evaluate("document.documentElement.outerHTML")
+        
+        print("🎨 Extracting CSS content with smart fallback...")
+        # Step 6: CSS extraction with computed styles for the elements within the budget
+        budget = element_budget(options or CloneOptions())
+        css_result = await page.evaluate("""
+            (opts) => {""" + ELEMENT_BUDGET_SCRIPT + """
+                let allCSS = '';
+        
+                // Get inline styles from style tags  
+                const styleElements = document.querySelectorAll('style');
+                styleElements.forEach((style, index) => {
+                    allCSS += `/* Inline Style ${index + 1} */\\n` + style.textContent + '\\n\\n';
+                });
+        
+                // Get external stylesheets (what we can access)
+                let accessibleStylesheets = 0;
+                Array.from(document.styleSheets).forEach((sheet, index) => {
+                    try {
+                        if (sheet.cssRules && sheet.cssRules.length > 0) {
+                            allCSS += `/* Stylesheet ${index + 1} - ${sheet.cssRules.length} rules */\\n`;
+                            Array.from(sheet.cssRules).forEach(rule => {
+                                allCSS += rule.cssText + '\\n';
+                            });
+                            allCSS += '\\n';
+                            accessibleStylesheets++;
+                        }
+                    } catch (e) {
+                        // CORS restricted
+                        allCSS += `/* External stylesheet ${index + 1} - CORS restricted */\\n`;
+                        if (sheet.href) {
+                            allCSS += `/* Source: ${sheet.href} */\\n`;
+                        }
+                        allCSS += '\\n';
+                    }
+                });
+        
+                // Computed styles for the highest priority elements within the element budget
+                allCSS += opts.computedHeader + '\\n';
+                const selection = selectWithinBudget(document.querySelectorAll('*'), opts.budget, opts.foldViewports);
+                const visualTags = ['body', 'html', 'div', 'section', 'header', 'nav', 'main', 'footer', 'article', 'aside'];
+                const visualProps = [
+                    'display', 'position', 'top', 'left', 'right', 'bottom',
+                    'width', 'height', 'margin', 'padding', 'border', 'border-radius',
+                    'background', 'background-color', 'background-image', 'background-size',
+                    'color', 'font-family', 'font-size', 'font-weight', 'line-height',
+                    'flex', 'flex-direction', 'justify-content', 'align-items', 'grid-template-columns'
+                ];
+                let styledElements = 0;
+        
+                for (const element of selection.ranked) {
+                    if (styledElements >= opts.styleLimit) break;
+        
+                    const tagName = element.tagName.toLowerCase();
+                    const classString = typeof element.className === 'string'
+                        ? element.className
+                        : (element.getAttribute('class') || '');
+                    if (!classString && !element.id && !visualTags.includes(tagName)) continue;
+        
+                    let selector = tagName;
+                    if (element.id) selector = `#${element.id}`;
+                    else if (classString.trim()) selector = '.' + classString.trim().split(/\\s+/).join('.');
+        
+                    const computedStyle = window.getComputedStyle(element);
+                    let elementCSS = `${selector} {\\n`;
+                    let hasSignificantStyles = false;
+        
+                    visualProps.forEach(prop => {
+                        const value = computedStyle.getPropertyValue(prop);
+                        if (value && value !== 'auto' && value !== 'normal' && value !== 'none' && value !== '0px' && value !== 'transparent' && value !== 'rgba(0, 0, 0, 0)') {
+                            elementCSS += `  ${prop}: ${value};\\n`;
+                            hasSignificantStyles = true;
+                        }
+                    });
+        
+                    elementCSS += '}\\n\\n';
+                    if (hasSignificantStyles) {
+                        allCSS += elementCSS;
+                        styledElements++;
+                    }
+                }
+        
+                console.log(`CSS extraction: ${styledElements} computed rules, accessible stylesheets: ${accessibleStylesheets}`);
+                return { css: allCSS, budget: selection.report };
+            }
+        """, {
+            "budget": budget,
+            "foldViewports": settings.extraction_fold_viewports,
+            "styleLimit": 100,
+            "computedHeader": COMPUTED_CSS_HEADER
+        })
+        css_content = css_result["css"]
+        
+        # Fill CORS-restricted stylesheets from the bodies the browser already downloaded
+        await capture.drain()
+        css_content = self._inline_captured_stylesheets(css_content, capture)
+        used_css = self._used_css(css_content, css_coverage)
+        
+        print("🖼️ Processing images and visual assets...")
+        # Step 7: Comprehensive image and visual asset processing
+        image_info = await page.evaluate("""
+            (opts) => {""" + ELEMENT_BUDGET_SCRIPT + """
+                const images = [];
+                const backgroundImages = [];
+        
+                // Process IMG elements
+                const imageElements = document.querySelectorAll('img');
+                imageElements.forEach((img, index) => {
+                    const src = img.src;
+                    const alt = img.alt || '';
+                    const width = img.naturalWidth || img.width;
+                    const height = img.naturalHeight || img.height;
+        
+                    // Convert relative URLs to absolute
+                    let absoluteSrc = src;
+                    if (src && !src.startsWith('http') && !src.startsWith('data:')) {
+                        try {
+                            absoluteSrc = new URL(src, window.location.href).href;
+                        } catch (e) {
+                            absoluteSrc = src;
+                        }
+                    }
+        
+                    images.push({
+                        index,
+                        original_src: src,
+                        absolute_src: absoluteSrc,
+                        alt,
+                        width,
+                        height,
+                        element_tag: 'img'
+                    });
+                });
+        
+                // Process background images from CSS, within the element budget
+                const selection = selectWithinBudget(document.querySelectorAll('*'), opts.budget, opts.foldViewports);
+                selection.elements.forEach((element, position) => {
+                    const index = selection.indices[position];
+                    const computedStyle = window.getComputedStyle(element);
+                    const backgroundImage = computedStyle.getPropertyValue('background-image');
+        
+                    if (backgroundImage && backgroundImage !== 'none') {
+                        // Extract URL from CSS background-image
+                        const urlMatch = backgroundImage.match(/url\\(['"]?([^'"\\)]+)['"]?\\)/);
+                        if (urlMatch && urlMatch[1]) {
+                            let url = urlMatch[1];
+        
+                            // Convert relative URLs to absolute
+                            if (!url.startsWith('http') && !url.startsWith('data:')) {
+                                try {
+                                    url = new URL(url, window.location.href).href;
+                                } catch (e) {
+                                    // Keep original if conversion fails
+                                }
+                            }
+        
+                            backgroundImages.push({
+                                element_index: index,
+                                element_tag: element.tagName.toLowerCase(),
+                                element_class: element.className,
+                                element_id: element.id,
+                                original_bg_image: backgroundImage,
+                                extracted_url: url,
+                                background_size: computedStyle.getPropertyValue('background-size'),
+                                background_position: computedStyle.getPropertyValue('background-position'),
+                                background_repeat: computedStyle.getPropertyValue('background-repeat')
+                            });
+                        }
+                    }
+                });
+        
+                return { images, backgroundImages, element_budget: selection.report };
+            }
+        """, {"budget": budget, "foldViewports": settings.extraction_fold_viewports})
+        background_budget = image_info.pop("element_budget", None)
+        
+        print("📸 Taking screenshot...")
+        # Step 8: Take screenshot of the viewport the page was rendered at
+        viewport = page.viewport_size or await page.evaluate("() => ({width: window.innerWidth, height: window.innerHeight})")
+        screenshot_bytes = await page.screenshot(
+            type="png",
+            full_page=False,
+            clip={"x": 0, "y": 0, "width": viewport["width"], "height": viewport["height"]}
+        )
+        
+        print("📋 Extracting metadata...")
+        # Step 9: Extract metadata
+        metadata = await page.evaluate("""
+            () => ({
+                title: document.title || '',
+                description: document.querySelector('meta[name="description"]')?.content || 
+                           document.querySelector('meta[property="og:description"]')?.content || '',
+                favicon: document.querySelector('link[rel="icon"]')?.href || 
+                       document.querySelector('link[rel="shortcut icon"]')?.href || '',
+                lang: document.documentElement.lang || 'en',
+                viewport: document.querySelector('meta[name="viewport"]')?.content || '',
+                keywords: document.querySelector('meta[name="keywords"]')?.content || '',
+                author: document.querySelector('meta[name="author"]')?.content || '',
+                robots: document.querySelector('meta[name="robots"]')?.content || '',
+                canonical: document.querySelector('link[rel="canonical"]')?.href || '',
+                og_title: document.querySelector('meta[property="og:title"]')?.content || '',
+                og_image: document.querySelector('meta[property="og:image"]')?.content || '',
+                og_url: document.querySelector('meta[property="og:url"]')?.content || ''
+            })
+        """)
+        
+        print("✅ Scraping completed successfully!")
+        
+        return ScrapeArtifacts(
+            url=url,
+            dom_html=clean_html,
+            css_content=css_content,
+            used_css=used_css,
+            hero_image_bytes=screenshot_bytes,
+            metadata=metadata,
+            image_info=image_info,
+            scrape_metrics={
+                "readiness": readiness,
+                "lazy_loading": lazy_loading,
+                "element_budget": {
+                    "computed_styles": css_result.get("budget"),
+                    "background_images": background_budget
+                },
+                "blocked_requests": blocker.stats(),
+                "css_coverage": {**css_coverage["report"], "covered_urls": css_coverage["covered_urls"]} if css_coverage else None
+            },
+            validators=validators_from_headers(response.headers if response else {}),
+            captured_responses=capture.responses
+        )
+            
+    def _used_css(self, css_content: str, css_coverage: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Coverage-pruned stylesheets followed by the computed-style block, or None when coverage is unavailable"""
+        if not css_coverage or css_coverage["report"].get("error"):
+            return None
+        _, header, computed = css_content.partition(COMPUTED_CSS_HEADER)
+        return "\n\n".join(css_coverage["used_css"] + ([header + computed] if header else []))
+    
+    def _inline_captured_stylesheets(self, css_content: str, capture: ResponseCapture) -> str:
+        """Replace CORS-restricted stylesheet placeholders with their captured bodies"""
+        def replace_source(match):
+            captured_css = capture.text(match.group(1))
+            if captured_css is None:
+                return match.group(0)
+            return f"{match.group(0)}\n{captured_css}"
+        
+        return re.sub(r'/\* Source: (\S+) \*/', replace_source, css_content)
+
+class BrowserProviderSelector:
+    """
+    Routes each agentic scrape to a provider
+    
+    The provider comes from the request's browser_provider option, else from
+    settings.agentic_browser_provider. "auto" picks the available provider with
+    the lowest observed scrape latency (untried providers first, and every
+    browser_provider_explore_every scrapes the runner-up, so the estimate for a
+    provider that was slow once can recover) and falls back to the next
+    provider when a scrape fails.
+    """
+    
+    def __init__(self, providers: Dict[str, BrowserProvider]):
+        self.providers = providers
+        self._latency_ms: Dict[str, float] = {}
+        self._auto_scrapes = 0
+        self.counters = {name: {"scrapes": 0, "failures": 0, "fallbacks": 0} for name in providers}
+    
+    def choose(self, options: Optional[CloneOptions] = None) -> List[BrowserProvider]:
+        """
+        Providers to try for a scrape, in order
+        
+        Returns:
+            List[BrowserProvider]: A single provider when one was requested explicitly,
+            otherwise every available provider ranked by observed latency
+        """
+        requested = (options.browser_provider if options else None) or settings.agentic_browser_provider
+        available = [provider for provider in self.providers.values() if provider.available]
+        if not available:
+            raise RuntimeError("No browser provider is available for agentic scraping")
+        
+        provider = self.providers.get(requested)
+        if provider is not None:
+            if provider.available:
+                return [provider]
+            print(f"⚠️ Browser provider {requested} is not configured, choosing automatically")
+        
+        # Untried providers rank first so every provider gets measured
+        ranked = sorted(available, key=lambda candidate: self._latency_ms.get(candidate.name, -1.0))
+        self._auto_scrapes += 1
+        if len(ranked) > 1 and self._auto_scrapes % settings.browser_provider_explore_every == 0:
+            ranked[0], ranked[1] = ranked[1], ranked[0]
+        return ranked
+    
+    async def scrape_site(self, url: str, options: Optional[CloneOptions] = None) -> ScrapeArtifacts:
+        """Scrape with the chosen provider, falling back down the ranking on failure"""
+        candidates = self.choose(options)
+        for index, provider in enumerate(candidates):
+            started = time.perf_counter()
+            try:
+                artifacts = await provider.scrape_site(url, options)
+            except Exception as e:
+                # Count the failure as a full browser timeout so auto mode steers away from it
+                self._record(provider.name, settings.browser_timeout, failed=True)
+                if index == len(candidates) - 1:
+                    raise
+                print(f"↪️ {provider.name} failed ({e}), retrying {url} with {candidates[index + 1].name}")
+                self.counters[candidates[index + 1].name]["fallbacks"] += 1
+                continue
+            
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._record(provider.name, elapsed_ms)
+            artifacts.scrape_metrics["browser_provider_ms"] = round(elapsed_ms, 1)
+            return artifacts
+    
+    def _record(self, name: str, elapsed_ms: float, failed: bool = False):
+        counters = self.counters[name]
+        counters["scrapes"] += 1
+        if failed:
+            counters["failures"] += 1
+        
+        previous = self._latency_ms.get(name)
+        alpha = settings.browser_provider_latency_alpha
+        self._latency_ms[name] = elapsed_ms if previous is None else alpha * elapsed_ms + (1 - alpha) * previous
+    
+    async def close(self):
+        for provider in self.providers.values():
+            try:
+                await provider.close()
+            except Exception as e:
+                print(f"⚠️ Error closing browser provider {provider.name}: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Configured default and per-provider availability, scrape counts and latency"""
+        return {
+            "default": settings.agentic_browser_provider,
+            "providers": {
+                name: {
+                    "available": provider.available,
+                    "stealth": provider.stealth,
+                    "latency_ms": round(self._latency_ms[name], 1) if name in self._latency_ms else None,
+                    **self.counters[name]
+                }
+                for name, provider in self.providers.items()
+            }
+        }
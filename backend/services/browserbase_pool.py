@@ -0,0 +1,345 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from browserbase import Browserbase
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+from config import settings
+
+BROWSER_SETTINGS = {
+    "stealth": True,
+    "viewport": {"width": 1920, "height": 1080}
+}
+
+class PooledSession:
+    """A remote browser session with a live CDP connection, leased out one URL at a time"""
+
+    def __init__(self, session_id: str, browser: Browser):
+        self.id = session_id
+        self.browser = browser
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.uses = 0
+        # Per-lease context when sessions share one browser (local CDP mode)
+        self.lease_context: Optional[BrowserContext] = None
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    @property
+    def context(self) -> BrowserContext:
+        """
+        The lease's context: Browserbase's default context, which carries its stealth
+        fingerprint, or a context of the lease's own on a shared local Chrome
+        """
+        return self.lease_context or self.browser.contexts[0]
+
+    def is_reusable(self) -> bool:
+        return (
+            self.browser.is_connected()
+            and self.uses < settings.browserbase_max_urls_per_session
+            and self.age < settings.browserbase_session_max_age_seconds
+        )
+
+class BrowserbaseSessionPool:
+    """
+    Keeps Browserbase sessions created and connected ahead of demand
+
+    Session creation runs in a worker thread so the event loop never waits on
+    the Browserbase API, a background task tops the pool up to the warm count,
+    and a connected session serves several URLs before it is released. Setting
+    browserbase_cdp_url points the pool at a local Chrome instead, so it runs
+    without Browserbase credentials; there every lease gets a context of its own.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, project_id: Optional[str] = None, cdp_url: Optional[str] = None):
+        self.api_key = api_key if api_key is not None else settings.browserbase_api_key
+        self.project_id = project_id if project_id is not None else settings.browserbase_project_id
+        self.cdp_url = cdp_url if cdp_url is not None else settings.browserbase_cdp_url
+
+        self.playwright = None
+        self._bb = None
+        self._idle: List[PooledSession] = []
+        self._leased: Dict[str, PooledSession] = {}
+        self._slots = asyncio.Semaphore(settings.browserbase_pool_max_sessions)
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._returned = asyncio.Event()
+        self._waiting = 0
+        self._maintainer: Optional[asyncio.Task] = None
+        self._closed = False
+        self._local_sessions = 0
+        self._create_ms = 0.0
+        self._retired_ages: Deque[Tuple[float, int]] = deque(maxlen=100)
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "sessions_created": 0,
+            "create_failures": 0,
+            "sessions_retired": 0
+        }
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.cdp_url or (self.api_key and self.project_id))
+
+    async def start(self):
+        """Start Playwright and the background task that keeps warm sessions ready"""
+        async with self._lock:
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+            if self._maintainer is None or self._maintainer.done():
+                self._closed = False
+                self._maintainer = asyncio.create_task(self._maintain())
+        self._wake.set()
+
+    async def close(self):
+        """Stop warming and release every session"""
+        self._closed = True
+        if self._maintainer:
+            self._maintainer.cancel()
+            try:
+                await self._maintainer
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._maintainer = None
+
+        # Leased sessions are retired when their lease ends
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._retire(pooled)
+
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[PooledSession]:
+        """
+        Lease a connected session for one URL
+
+        A session whose lease raised is released rather than handed to the next URL.
+        """
+        pooled = await self._acquire()
+        failed = False
+        try:
+            yield pooled
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            await self._checkin(pooled, failed)
+
+    async def _acquire(self) -> PooledSession:
+        if self.playwright is None or self._maintainer is None or self._maintainer.done():
+            await self.start()
+
+        while True:
+            pooled = None
+            while self._idle:
+                candidate = self._idle.pop(0)
+                if candidate.is_reusable():
+                    pooled = candidate
+                    break
+                await self._retire(candidate)
+            if pooled is not None:
+                self.counters["hits"] += 1
+                break
+
+            if not self._slots.locked():
+                await self._slots.acquire()
+                self.counters["misses"] += 1
+                try:
+                    pooled = await self._open()
+                except Exception:
+                    self._slots.release()
+                    raise
+                break
+
+            # Every session is leased; wait for one to come back or free its slot
+            self._waiting += 1
+            self._returned.clear()
+            try:
+                await self._returned.wait()
+            finally:
+                self._waiting -= 1
+
+        if self.cdp_url:
+            # Every local "session" is the same Chrome; its default context would be shared
+            # by parallel leases and have its cookies cleared under them
+            try:
+                pooled.lease_context = await pooled.browser.new_context(viewport=BROWSER_SETTINGS["viewport"])
+            except Exception:
+                await self._retire(pooled)
+                raise
+
+        pooled.uses += 1
+        pooled.last_used = time.time()
+        self._leased[pooled.id] = pooled
+        # Top the idle set back up for the next job while this one scrapes
+        self._wake.set()
+        return pooled
+
+    async def _checkin(self, pooled: PooledSession, failed: bool):
+        self._leased.pop(pooled.id, None)
+        pooled.last_used = time.time()
+        lease_context, pooled.lease_context = pooled.lease_context, None
+        if failed or self._closed or not pooled.is_reusable():
+            await self._close_context(lease_context)
+            await self._retire(pooled)
+            self._wake.set()
+            return
+
+        try:
+            if lease_context:
+                # The lease's cookies and storage go with its context
+                await lease_context.close()
+            else:
+                # The next URL may be another site; don't hand it this one's cookies
+                await pooled.context.clear_cookies()
+        except Exception:
+            await self._retire(pooled)
+            self._wake.set()
+            return
+        self._idle.append(pooled)
+        self._returned.set()
+
+    async def _close_context(self, context: Optional[BrowserContext]):
+        if context is None:
+            return
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _create_remote_session(self) -> Tuple[str, str]:
+        """
+        Create a session to connect to
+
+        Returns:
+            Tuple of the session id and its CDP connect URL
+        """
+        if self.cdp_url:
+            self._local_sessions += 1
+            return f"local-{self._local_sessions}", self.cdp_url
+
+        if self._bb is None:
+            self._bb = Browserbase(api_key=self.api_key)
+        # The SDK is synchronous; keep the HTTP round trip off the event loop
+        session = await asyncio.to_thread(
+            self._bb.sessions.create,
+            project_id=self.project_id,
+            browser_settings=BROWSER_SETTINGS
+        )
+        print(f"✅ Session created: https://browserbase.com/sessions/{session.id}")
+        return session.id, session.connect_url
+
+    async def _open(self) -> PooledSession:
+        """Create and connect a session (caller holds a slot)"""
+        started = time.perf_counter()
+        try:
+            session_id, connect_url = await self._create_remote_session()
+            browser = await self.playwright.chromium.connect_over_cdp(connect_url)
+        except Exception:
+            self.counters["create_failures"] += 1
+            raise
+
+        self._create_ms += (time.perf_counter() - started) * 1000
+        self.counters["sessions_created"] += 1
+        return PooledSession(session_id, browser)
+
+    async def _retire(self, pooled: PooledSession):
+        """Disconnect a session; Browserbase ends sessions without keep-alive when their connection closes"""
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            print(f"⚠️ Error closing Browserbase session {pooled.id}: {e}")
+        self._retired_ages.append((pooled.age, pooled.uses))
+        self.counters["sessions_retired"] += 1
+        self._slots.release()
+        self._returned.set()
+
+    async def _maintain(self):
+        """Retire stale idle sessions and keep the warm count ready, woken on demand or every few seconds"""
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            try:
+                await self._sweep()
+                if self.configured:
+                    await self._warm()
+            except Exception as e:
+                print(f"⚠️ Browserbase pool maintenance failed, retrying on the next pass: {e}")
+
+    async def _sweep(self):
+        """Retire stale sessions and idle ones beyond the warm count"""
+        now = time.time()
+        for pooled in list(self._idle):
+            # _acquire may have leased it while an earlier retire was awaited
+            if pooled not in self._idle:
+                continue
+            stale = not pooled.is_reusable()
+            surplus = (
+                len(self._idle) > settings.browserbase_pool_warm_sessions
+                and now - pooled.last_used > settings.browserbase_session_idle_seconds
+            )
+            if stale or surplus:
+                self._idle.remove(pooled)
+                await self._retire(pooled)
+
+    async def _warm(self):
+        """Open sessions until the warm count is idle or every slot is taken"""
+        while (
+            not self._closed
+            and len(self._idle) < settings.browserbase_pool_warm_sessions
+            and not self._slots.locked()
+        ):
+            await self._slots.acquire()
+            try:
+                pooled = await self._open()
+            except Exception as e:
+                self._slots.release()
+                print(f"⚠️ Browserbase session warmup failed, sessions will be created on demand: {e}")
+                break
+            self._idle.append(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool hit rate, session ages and creation cost"""
+        leases = self.counters["hits"] + self.counters["misses"]
+        retired = list(self._retired_ages)
+        return {
+            "backend": "local-cdp" if self.cdp_url else "browserbase",
+            "configured": self.configured,
+            "started": self._maintainer is not None,
+            "max_sessions": settings.browserbase_pool_max_sessions,
+            "warm_target": settings.browserbase_pool_warm_sessions,
+            "idle": len(self._idle),
+            "leased": len(self._leased),
+            "waiting": self._waiting,
+            "hit_rate": round(self.counters["hits"] / leases, 3) if leases else 0.0,
+            "avg_create_ms": round(self._create_ms / self.counters["sessions_created"], 1) if self.counters["sessions_created"] else 0.0,
+            "sessions": [
+                {
+                    "id": pooled.id,
+                    "state": state,
+                    "age_seconds": round(pooled.age, 1),
+                    "uses": pooled.uses
+                }
+                for state, sessions in (("idle", self._idle), ("leased", list(self._leased.values())))
+                for pooled in sessions
+            ],
+            "retired_avg_age_seconds": round(sum(age for age, _ in retired) / len(retired), 1) if retired else 0.0,
+            "retired_avg_uses": round(sum(uses for _, uses in retired) / len(retired), 2) if retired else 0.0,
+            **self.counters
+        }
+
+# Global Browserbase session pool shared by agentic clone jobs
+browserbase_pool = BrowserbaseSessionPool()
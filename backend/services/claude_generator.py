@@ -1,20 +1,39 @@
 import anthropic
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import json
 import os
 import re
-import requests
+import time
 from urllib.parse import urljoin, urlparse
 
+from models import CapturedResponse
+from services.http_client import http_client
+from services.llm_cache import llm_cache
+
+# Generation is complete once the document closes; anything after is commentary
+HTML_END = "</html>"
+
+# Rough characters per token, for output cut short before the final usage event
+CHARS_PER_TOKEN = 4
+
 class ClaudeGenerator:
     def __init__(self, api_key: str):
-        self.client = anthropic.Anthropic(api_key=api_key)
+        # Async client: a generation must not hold the event loop for its whole duration
+        self.client = anthropic.AsyncAnthropic(api_key=api_key)
         self.model = "claude-4-sonnet"
         self.max_tokens = 8000
         
-    async def generate_html(self, prompt: str, source_url: str = None) -> Dict[str, Any]:
+    async def generate_html(
+        self,
+        prompt: str,
+        source_url: str = None,
+        captured_responses: Optional[Dict[str, CapturedResponse]] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
         """
         Generate HTML using Claude with token tracking and CSS inlining
+        
+        Identical prompts are answered from the LLM cache at no token cost.
         """
         try:
             # Enhanced prompt to ensure CSS inlining
@@ -29,16 +48,24 @@ class ClaudeGenerator:
             5. Use modern CSS with responsive design
             """
             
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                messages=[{
-                    "role": "user",
-                    "content": enhanced_prompt
-                }]
-            )
+            lookup_started = time.perf_counter()
+            cache_key = llm_cache.key("anthropic", self.model, "", enhanced_prompt, {"max_tokens": self.max_tokens})
+            cached = await llm_cache.get(cache_key) if use_cache else None
+            if cached:
+                print("♻️ Reusing cached Claude generation")
+                html_content = cached["response"]
+                usage = {"input_tokens": 0, "output_tokens": 0}
+                metrics = {
+                    "time_to_first_token_ms": None,
+                    "generation_ms": round((time.perf_counter() - lookup_started) * 1000, 1),
+                    "output_tokens": 0,
+                    "tokens_per_second": 0.0,
+                    "cached": True
+                }
+            else:
+                html_content, usage, metrics = await self._stream_html(enhanced_prompt)
             
-            html_content = message.content[0].text
+            raw_content = html_content
             
             # Extract HTML if wrapped in code blocks
             if "```html" in html_content:
@@ -46,29 +73,37 @@ class ClaudeGenerator:
             elif "```" in html_content:
                 html_content = html_content.split("```")[1].split("```")[0].strip()
             
-            # Additional cleanup: Remove any remaining external CSS references
-            html_content = self._remove_external_css_references(html_content)
-            
-            # If source URL provided, try to fetch and inline any remaining CSS
+            # Inline the stylesheets the model linked (captured bodies first), then drop
+            # any remaining external references; stripping first would leave nothing to inline
             if source_url:
-                html_content = await self._fetch_and_inline_css(html_content, source_url)
+                html_content = await self._fetch_and_inline_css(html_content, source_url, captured_responses or {})
+            html_content = self._remove_external_css_references(html_content)
             
             # Calculate token usage and cost
-            input_tokens = message.usage.input_tokens
-            output_tokens = message.usage.output_tokens
+            input_tokens = usage["input_tokens"]
+            output_tokens = usage["output_tokens"]
             
             # Claude pricing (as of Jan 2025)
             input_cost = (input_tokens / 1000) * 0.003  # $0.003 per 1K input tokens
             output_cost = (output_tokens / 1000) * 0.015  # $0.015 per 1K output tokens
             total_cost = input_cost + output_cost
             
+            if not cached:
+                await llm_cache.put(cache_key, "anthropic", self.model, raw_content, {
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "total_cost_usd": round(total_cost, 4)
+                })
+            
             return {
+                "success": True,
                 "html": html_content,
                 "token_usage": {
                     "input_tokens": input_tokens,
                     "output_tokens": output_tokens,
                     "total_cost_usd": round(total_cost, 4)
-                }
+                },
+                "generation_metrics": metrics
             }
             
         except Exception as e:
@@ -99,6 +134,8 @@ class ClaudeGenerator:
             """
             
             return {
+                "success": False,
+                "error": str(e),
                 "html": fallback_html,
                 "token_usage": {
                     "input_tokens": 0,
@@ -107,6 +144,64 @@ class ClaudeGenerator:
                 }
             }
     
+    async def _stream_html(self, prompt: str):
+        """
+        Stream a generation, stopping as soon as the closing </html> arrives
+        
+        Returns:
+            Tuple of the generated text, token usage and generation metrics
+            (time to first token, tokens per second, whether the stream was cut short)
+        """
+        started = time.perf_counter()
+        first_token_at = None
+        chunks = []
+        tail = ""
+        usage = {"input_tokens": 0, "output_tokens": 0}
+        stopped_early = False
+        
+        async with self.client.messages.stream(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            messages=[{
+                "role": "user",
+                "content": prompt
+            }]
+        ) as stream:
+            async for event in stream:
+                if event.type == "message_start":
+                    usage["input_tokens"] = event.message.usage.input_tokens
+                elif event.type == "message_delta":
+                    usage["output_tokens"] = event.usage.output_tokens
+                elif event.type == "text":
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    chunks.append(event.text)
+                    # The tag can straddle chunks, so check a rolling tail
+                    tail = (tail + event.text)[-(len(event.text) + len(HTML_END)):]
+                    if HTML_END in tail.lower():
+                        stopped_early = True
+                        break
+        
+        text = "".join(chunks)
+        if stopped_early:
+            # Trailing fences and commentary never get generated (or billed)
+            end = text.lower().rfind(HTML_END) + len(HTML_END)
+            text = text[:end]
+            if not usage["output_tokens"]:
+                usage["output_tokens"] = len(text) // CHARS_PER_TOKEN
+        
+        finished = time.perf_counter()
+        streaming_seconds = finished - (first_token_at or finished)
+        metrics = {
+            "time_to_first_token_ms": round((first_token_at - started) * 1000, 1) if first_token_at else None,
+            "generation_ms": round((finished - started) * 1000, 1),
+            "output_tokens": usage["output_tokens"],
+            "tokens_per_second": round(usage["output_tokens"] / streaming_seconds, 1) if streaming_seconds > 0 else 0.0,
+            "stopped_early": stopped_early
+        }
+        print(f"⚡ Claude first token after {metrics['time_to_first_token_ms']}ms, {metrics['tokens_per_second']} tokens/s")
+        return text, usage, metrics
+    
     def _remove_external_css_references(self, html_content: str) -> str:
         """Remove external CSS link tags and @import statements"""
         # Remove <link> tags that reference CSS files
@@ -117,8 +212,13 @@ class ClaudeGenerator:
         
         return html_content
     
-    async def _fetch_and_inline_css(self, html_content: str, source_url: str) -> str:
-        """Fetch external CSS files and inline them"""
+    async def _fetch_and_inline_css(
+        self,
+        html_content: str,
+        source_url: str,
+        captured_responses: Dict[str, CapturedResponse]
+    ) -> str:
+        """Inline external CSS files, preferring the bodies captured during scraping"""
         try:
             # Find CSS link tags
             css_links = re.findall(r'<link[^>]*href=["\']([^"\']*\.css[^"\']*)["\'][^>]*>', html_content, re.IGNORECASE)
@@ -130,11 +230,16 @@ class ClaudeGenerator:
                     # Convert relative URLs to absolute
                     absolute_url = urljoin(source_url, css_url)
                     
-                    # Fetch CSS content
-                    response = requests.get(absolute_url, timeout=10)
-                    if response.status_code == 200:
-                        css_content = response.text
-                        inline_styles.append(css_content)
+                    # Reuse the stylesheet the browser already downloaded
+                    captured = captured_responses.get(absolute_url)
+                    if captured:
+                        inline_styles.append(captured.text())
+                        continue
+                    
+                    # Only stylesheets the page never loaded go back to the origin
+                    result = await http_client.fetch(absolute_url)
+                    if result["body"] is not None:
+                        inline_styles.append(result["body"])
                 except:
                     continue  # Skip failed CSS fetches
             
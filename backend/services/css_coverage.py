@@ -0,0 +1,288 @@
+import asyncio
+import re
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from playwright.async_api import Page
+
+# Unmatched rules are still kept when they only apply in an interaction state
+# the headless render never entered (hover menus, focus rings, open checkboxes)
+DYNAMIC_STATE_SELECTOR = re.compile(
+    r':(?:hover|focus|focus-visible|focus-within|active|checked|target|invalid|placeholder-shown)\b',
+    re.IGNORECASE
+)
+
+# At-rules that group style rules; kept around the used rules they contain
+GROUPING_AT_RULES = ("@media", "@supports", "@layer", "@container", "@document", "@-moz-document", "@scope")
+
+# At-rules rule usage tracking does not report on; kept whole
+WHOLE_AT_RULES = (
+    "@font-face", "@keyframes", "@-webkit-keyframes", "@property",
+    "@counter-style", "@font-feature-values", "@page", "@view-transition"
+)
+
+# Size conditions in @media preludes: "(max-width: 600px)" and range syntax "(width <= 600px)"
+MEDIA_FEATURE = re.compile(r'\(\s*(min-|max-)?(width|height)\s*:\s*([\d.]+)([a-z]*)\s*\)', re.IGNORECASE)
+MEDIA_RANGE = re.compile(r'\(\s*(width|height)\s*(<=|>=|<|>)\s*([\d.]+)([a-z]*)\s*\)', re.IGNORECASE)
+MEDIA_ORIENTATION = re.compile(r'\(\s*orientation\s*:\s*(portrait|landscape)\s*\)', re.IGNORECASE)
+MEDIA_UNITS = {"": 1, "px": 1, "em": 16, "rem": 16}
+
+def _query_applies(query: str, viewport: Dict[str, int]) -> bool:
+    """Whether one media query's size conditions hold at the viewport (unknown units count as not holding)"""
+    words = query.lower().split()
+    if "not" in words or "print" in words:
+        return False
+    conditions = []
+    for prefix, axis, value, unit in MEDIA_FEATURE.findall(query):
+        operator = {"min-": ">=", "max-": "<="}.get(prefix.lower(), "==")
+        conditions.append((axis.lower(), operator, value, unit.lower()))
+    for axis, operator, value, unit in MEDIA_RANGE.findall(query):
+        conditions.append((axis.lower(), operator, value, unit.lower()))
+
+    for axis, operator, value, unit in conditions:
+        if unit not in MEDIA_UNITS:
+            return False
+        size, limit = viewport[axis], float(value) * MEDIA_UNITS[unit]
+        if not {"<=": size <= limit, ">=": size >= limit, "<": size < limit, ">": size > limit, "==": size == limit}[operator]:
+            return False
+    for orientation in MEDIA_ORIENTATION.findall(query):
+        if (orientation.lower() == "portrait") != (viewport["height"] >= viewport["width"]):
+            return False
+    return True
+
+def applies_at_viewport(prelude: str, viewport: Optional[Dict[str, int]]) -> Optional[bool]:
+    """
+    Whether an @media block applied at the viewport the render used
+
+    Returns:
+        Optional[bool]: None when the block does not depend on viewport size
+        (or is not @media); False whenever the viewport is unknown
+    """
+    if not prelude.lower().startswith("@media"):
+        return None
+    queries = prelude[len("@media"):].split(",")
+    if not any(MEDIA_FEATURE.search(query) or MEDIA_RANGE.search(query) or MEDIA_ORIENTATION.search(query) for query in queries):
+        return None
+    if not viewport:
+        return False
+    return any(_query_applies(query, viewport) for query in queries)
+
+def _utf16_offsets(text: str) -> Optional[List[int]]:
+    """Map UTF-16 offsets (what CDP reports) to string indices, or None when they coincide"""
+    if all(ord(char) <= 0xFFFF for char in text):
+        return None
+    offsets = []
+    for index, char in enumerate(text):
+        offsets.append(index)
+        if ord(char) > 0xFFFF:
+            offsets.append(index)
+    offsets.append(len(text))
+    return offsets
+
+def _scan_blocks(text: str) -> Tuple[Dict[int, int], List[Tuple[int, int, int, str]]]:
+    """
+    Match every brace in a stylesheet, skipping comments and strings
+
+    Returns:
+        Tuple of {open brace index: close brace index} and the at-rule blocks as
+        (prelude start, open brace, close brace, prelude) in source order
+    """
+    pairs: Dict[int, int] = {}
+    at_rules: List[Tuple[int, int, int, str]] = []
+    stack: List[Tuple[int, int]] = []
+    prelude_start = 0
+    i = 0
+    length = len(text)
+
+    while i < length:
+        char = text[i]
+        if char == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            comment_start, i = i, length if end == -1 else end + 2
+            if not text[prelude_start:comment_start].strip():
+                prelude_start = i
+            continue
+        if char in "\"'":
+            end = i + 1
+            while end < length and text[end] != char:
+                end += 2 if text[end] == "\\" else 1
+            i = end + 1
+            continue
+
+        if char == "{":
+            stack.append((prelude_start, i))
+            prelude_start = i + 1
+        elif char == "}":
+            if stack:
+                start, opened = stack.pop()
+                pairs[opened] = i
+                prelude = text[start:opened].strip()
+                if prelude.startswith("@"):
+                    at_rules.append((start, opened, i, prelude))
+            prelude_start = i + 1
+        elif char == ";":
+            prelude_start = i + 1
+        i += 1
+
+    at_rules.sort()
+    return pairs, at_rules
+
+def prune_stylesheet(
+    text: str,
+    rule_usage: List[Dict[str, Any]],
+    viewport: Optional[Dict[str, int]] = None
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Reduce a stylesheet to the rules that matched during the render
+
+    rule_usage holds CDP RuleUsage entries (startOffset, endOffset, used) for this
+    sheet. Used rules are re-wrapped in their @media/@supports/@layer blocks;
+    @font-face, @keyframes and similar at-rules are kept whole. Unmatched rules
+    inside width/height/orientation media queries that did not apply at the
+    render viewport (all of them when viewport is None) are kept too, since
+    the render could never have used them: they are the site's other breakpoints.
+
+    Returns:
+        Tuple of the pruned CSS and counts (rules, rules_used, rules_dynamic, rules_responsive)
+    """
+    pairs, at_rules = _scan_blocks(text)
+    opens = sorted(pairs)
+    offsets = _utf16_offsets(text)
+    segments: List[Tuple[int, int]] = []
+    stats = {"rules": len(rule_usage), "rules_used": 0, "rules_dynamic": 0, "rules_responsive": 0}
+    inactive_media = [
+        (opened, closed) for _, opened, closed, prelude in at_rules
+        if applies_at_viewport(prelude, viewport) is False
+    ]
+
+    for usage in rule_usage:
+        start = int(usage["startOffset"])
+        if offsets:
+            start = offsets[min(start, len(offsets) - 1)]
+        position = bisect_left(opens, start)
+        if position == len(opens):
+            continue
+        opened = opens[position]
+
+        if usage.get("used"):
+            stats["rules_used"] += 1
+        elif DYNAMIC_STATE_SELECTOR.search(text[start:opened]):
+            stats["rules_dynamic"] += 1
+        elif any(media_open < start and media_close >= pairs[opened] for media_open, media_close in inactive_media):
+            stats["rules_responsive"] += 1
+        else:
+            continue
+        segments.append((start, pairs[opened] + 1))
+
+    groups = []
+    for start, opened, closed, prelude in at_rules:
+        name = prelude.split(None, 1)[0].lower().rstrip("{")
+        if name in WHOLE_AT_RULES:
+            segments.append((start, closed + 1))
+        elif name in GROUPING_AT_RULES:
+            groups.append((start, opened, closed, prelude))
+
+    output: List[str] = []
+    open_groups: List[Tuple[int, int, int, str]] = []
+    covered_until = -1
+    for start, end in sorted(segments):
+        if end <= covered_until:
+            # Nested inside a segment already emitted (native CSS nesting)
+            continue
+        covered_until = end
+
+        chain = [group for group in groups if group[1] < start and group[2] >= end - 1]
+        shared = 0
+        while shared < min(len(chain), len(open_groups)) and chain[shared] == open_groups[shared]:
+            shared += 1
+        for _ in open_groups[shared:]:
+            output.append("}")
+        for group in chain[shared:]:
+            output.append(f"{group[3]} {{")
+        open_groups = chain
+        output.append(text[start:end].strip())
+
+    output.extend("}" for _ in open_groups)
+    return "\n".join(output), stats
+
+class CSSCoverage:
+    """Records which stylesheet rules match while a page renders, via CDP CSS rule usage tracking"""
+
+    def __init__(self, page: Page):
+        self.page = page
+        self._cdp = None
+        self._sheets: Dict[str, Dict[str, Any]] = {}
+
+    async def start(self):
+        """Begin tracking (call before navigation so every stylesheet is seen)"""
+        self._cdp = await self.page.context.new_cdp_session(self.page)
+        self._cdp.on("CSS.styleSheetAdded", self._on_style_sheet_added)
+        await self._cdp.send("DOM.enable")
+        await self._cdp.send("CSS.enable")
+        await self._cdp.send("CSS.startRuleUsageTracking")
+
+    def _on_style_sheet_added(self, event: Dict[str, Any]):
+        header = event["header"]
+        if header.get("origin") == "regular":
+            self._sheets[header["styleSheetId"]] = header
+
+    async def stop(self) -> Dict[str, Any]:
+        """
+        Stop tracking and prune every main-frame stylesheet to its used rules
+
+        Returns:
+            Dict with used_css (one pruned string per sheet, in load order),
+            covered_urls (external sheets fully represented by used_css) and report
+        """
+        if self._cdp is None:
+            return {"used_css": [], "covered_urls": [], "report": {"error": "coverage not started"}}
+
+        try:
+            usage = (await self._cdp.send("CSS.stopRuleUsageTracking"))["ruleUsage"]
+            main_frame = (await self._cdp.send("Page.getFrameTree"))["frameTree"]["frame"]["id"]
+
+            by_sheet: Dict[str, List[Dict[str, Any]]] = {}
+            for entry in usage:
+                by_sheet.setdefault(entry["styleSheetId"], []).append(entry)
+
+            sheets = []
+            for sheet_id, header in self._sheets.items():
+                if header.get("frameId") != main_frame:
+                    continue
+                try:
+                    text = (await self._cdp.send("CSS.getStyleSheetText", {"styleSheetId": sheet_id}))["text"]
+                except Exception:
+                    # Removed from the document before tracking stopped
+                    continue
+                sheets.append((header, text, by_sheet.get(sheet_id, [])))
+
+            # Brace scanning is pure Python work, keep it off the event loop
+            viewport = self.page.viewport_size
+            pruned = await asyncio.to_thread(lambda: [prune_stylesheet(text, rules, viewport) for _, text, rules in sheets])
+        except Exception as e:
+            print(f"⚠️ CSS coverage failed, using full stylesheets: {e}")
+            return {"used_css": [], "covered_urls": [], "report": {"error": str(e)}}
+        finally:
+            try:
+                await self._cdp.detach()
+            except Exception:
+                pass
+            self._cdp = None
+
+        used_css = []
+        covered_urls = []
+        report = {"sheets": len(sheets), "bytes_total": 0, "bytes_used": 0, "rules": 0, "rules_used": 0, "rules_dynamic": 0, "rules_responsive": 0}
+        for (header, text, _), (css, stats) in zip(sheets, pruned):
+            source = header.get("sourceURL") or ""
+            inline = header.get("isInline") or not source
+            if css:
+                used_css.append(f"/* Used rules from {'inline style' if inline else source} */\n{css}")
+            if not inline:
+                covered_urls.append(source)
+            report["bytes_total"] += len(text)
+            report["bytes_used"] += len(css)
+            for key, value in stats.items():
+                report[key] += value
+
+        report["reduction"] = round(1 - report["bytes_used"] / report["bytes_total"], 3) if report["bytes_total"] else 0.0
+        return {"used_css": used_css, "covered_urls": covered_urls, "report": report}
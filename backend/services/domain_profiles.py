@@ -0,0 +1,201 @@
+import asyncio
+import json
+import math
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from config import settings
+
+# Readiness signals a profile may stop waiting on; "dom" is always awaited
+SKIPPABLE_SIGNALS = ("mutations", "layout", "fonts", "network")
+
+# Sum of transfer sizes the page reports for its document and subresources
+PAGE_WEIGHT_SCRIPT = """
+() => performance.getEntriesByType('navigation')
+    .concat(performance.getEntriesByType('resource'))
+    .reduce((total, entry) => total + (entry.transferSize || entry.encodedBodySize || 0), 0)
+"""
+
+def domain_key(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+class DomainProfiles:
+    """
+    Learns per domain how long pages take to navigate and settle, and plans later scrapes from it
+
+    Each scrape records navigation time, time-to-ready, the readiness signals
+    that never settled, failures and page weight. Once a domain has enough
+    samples its plan sizes the readiness cap from the observed p90, stops
+    waiting on signals that never settle there (tickers, long polling) and
+    switches navigation to wait only for the response after timeouts.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or settings.domain_profiles_path)
+        self._profiles: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = asyncio.Lock()
+        self.counters = {"learned_plans": 0, "default_plans": 0}
+
+    async def _load(self) -> Dict[str, Dict[str, Any]]:
+        async with self._lock:
+            if self._profiles is None:
+                try:
+                    self._profiles = json.loads(await asyncio.to_thread(self.path.read_text))
+                except FileNotFoundError:
+                    self._profiles = {}
+                except Exception as e:
+                    print(f"⚠️ Could not read domain profiles, starting fresh: {e}")
+                    self._profiles = {}
+        return self._profiles
+
+    async def plan(self, url: str) -> Dict[str, Any]:
+        """
+        Navigation and readiness settings for a scrape of url
+
+        Returns:
+            Dict with domain, learned, wait_until, nav_timeout_ms, ready_cap_ms and ignore_signals
+        """
+        plan = self._plan(await self._load(), domain_key(url))
+        self.counters["learned_plans" if plan["learned"] else "default_plans"] += 1
+        return plan
+
+    def _plan(self, profiles: Dict[str, Dict[str, Any]], domain: str) -> Dict[str, Any]:
+        profile = profiles.get(domain)
+        plan = {
+            "domain": domain,
+            "learned": False,
+            "wait_until": "domcontentloaded",
+            "nav_timeout_ms": settings.domain_profile_nav_timeout_ms,
+            "ready_cap_ms": settings.page_ready_max_wait_ms,
+            "ignore_signals": []
+        }
+        if not profile or profile["scrapes"] < settings.domain_profile_min_samples:
+            return plan
+
+        plan["learned"] = True
+        window = settings.domain_profile_window
+
+        # Navigation: room for three times the typical time, more after recent timeouts
+        if profile["nav_ms"]:
+            plan["nav_timeout_ms"] = int(min(
+                max(_percentile(profile["nav_ms"], 0.9) * 3, settings.domain_profile_min_nav_timeout_ms),
+                settings.domain_profile_max_nav_timeout_ms
+            ))
+        if profile["recent_nav_failures"]:
+            plan["wait_until"] = "commit"
+            plan["nav_timeout_ms"] = settings.domain_profile_max_nav_timeout_ms
+
+        # Signals that were still busy in most recent scrapes never settle on this domain
+        recent = min(profile["scrapes"], window)
+        plan["ignore_signals"] = sorted(
+            signal for signal, count in profile["stuck_signals"].items()
+            if signal in SKIPPABLE_SIGNALS and count >= max(2, recent * 0.6)
+        )
+
+        # Readiness: p90 of observed time-to-ready plus headroom, instead of the global cap
+        if profile["ready_ms"]:
+            cap = _percentile(profile["ready_ms"], 0.9) * 1.5 + settings.page_ready_quiet_ms
+            plan["ready_cap_ms"] = int(min(
+                max(cap, settings.domain_profile_min_ready_ms),
+                settings.page_ready_max_wait_ms * 2
+            ))
+        return plan
+
+    async def record(
+        self,
+        url: str,
+        plan: Dict[str, Any],
+        navigation_ms: Optional[float],
+        readiness: Optional[Dict[str, Any]] = None,
+        page_bytes: Optional[int] = None,
+        failed: bool = False
+    ):
+        """Fold one scrape's observations into its domain profile and persist the profiles"""
+        domain = plan["domain"]
+        if not domain:
+            return
+
+        profiles = await self._load()
+        profile = profiles.setdefault(domain, {
+            "scrapes": 0, "failures": 0, "recent_nav_failures": 0,
+            "nav_ms": [], "ready_ms": [], "not_ready": 0,
+            "stuck_signals": {}, "page_kb": None, "last_plan": None, "updated_at": None
+        })
+        window = settings.domain_profile_window
+        profile["scrapes"] += 1
+        profile["updated_at"] = time.time()
+        profile["last_plan"] = {key: plan[key] for key in ("wait_until", "nav_timeout_ms", "ready_cap_ms", "ignore_signals")}
+
+        if failed:
+            profile["failures"] += 1
+            profile["recent_nav_failures"] = min(profile["recent_nav_failures"] + 1, 3)
+        else:
+            profile["recent_nav_failures"] = max(profile["recent_nav_failures"] - 1, 0)
+            if navigation_ms is not None:
+                profile["nav_ms"] = (profile["nav_ms"] + [round(navigation_ms)])[-window:]
+
+        if readiness:
+            busy = list(readiness.get("waiting_on", [])) + list(readiness.get("ignored_busy", []))
+            if readiness.get("ready"):
+                profile["ready_ms"] = (profile["ready_ms"] + [readiness["elapsed_ms"]])[-window:]
+            else:
+                profile["not_ready"] += 1
+
+            # Decay old observations so a signal that starts settling is waited on again
+            stuck = Counter({signal: count * (window - 1) / window for signal, count in profile["stuck_signals"].items()})
+            stuck.update(busy)
+            profile["stuck_signals"] = {signal: round(count, 2) for signal, count in stuck.items() if count >= 0.5}
+
+        if page_bytes:
+            page_kb = page_bytes / 1024
+            previous = profile["page_kb"]
+            profile["page_kb"] = round(page_kb if previous is None else 0.3 * page_kb + 0.7 * previous, 1)
+
+        if len(profiles) > settings.domain_profile_max_domains:
+            oldest = min(profiles, key=lambda key: profiles[key]["updated_at"] or 0)
+            profiles.pop(oldest, None)
+
+        async with self._lock:
+            snapshot = json.dumps(profiles)
+            try:
+                await asyncio.to_thread(self._write, snapshot)
+            except Exception as e:
+                print(f"⚠️ Could not save domain profiles: {e}")
+
+    def _write(self, snapshot: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        staging = self.path.with_name(f".{self.path.name}.{time.monotonic_ns()}")
+        staging.write_text(snapshot)
+        staging.replace(self.path)
+
+    async def stats(self) -> Dict[str, Any]:
+        """Learned domains with their typical timings, failures and page weight"""
+        profiles = await self._load()
+        recent = sorted(profiles.items(), key=lambda item: item[1]["updated_at"] or 0, reverse=True)
+        return {
+            "domains": len(profiles),
+            **self.counters,
+            "by_domain": {
+                domain: {
+                    "scrapes": profile["scrapes"],
+                    "failures": profile["failures"],
+                    "not_ready": profile["not_ready"],
+                    "p50_ready_ms": _percentile(profile["ready_ms"], 0.5) if profile["ready_ms"] else None,
+                    "p50_nav_ms": _percentile(profile["nav_ms"], 0.5) if profile["nav_ms"] else None,
+                    "page_kb": profile["page_kb"],
+                    "plan": self._plan(profiles, domain)
+                }
+                for domain, profile in recent[:50]
+            }
+        }
+
+# Global domain profile store shared by every scraper
+domain_profiles = DomainProfiles()
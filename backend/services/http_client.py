@@ -0,0 +1,155 @@
+import asyncio
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin
+
+import aiohttp
+
+from config import settings
+from services.request_governor import request_governor
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
+
+# @import "a.css"; @import url(a.css) screen; @import url("a.css");
+CSS_IMPORT_PATTERN = re.compile(
+    r'@import\s+(?:url\(\s*)?["\']?([^"\')\s;]+)["\']?\s*\)?[^;]*;',
+    re.IGNORECASE
+)
+
+class HttpClient:
+    """Shared connection-pooled HTTP client with bounded per-host concurrency"""
+
+    def __init__(self):
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.http_max_connections,
+                limit_per_host=settings.http_max_connections_per_host,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.http_timeout_seconds),
+                headers={'User-Agent': DEFAULT_USER_AGENT}
+            )
+        return self.session
+
+    async def fetch(
+        self,
+        url: str,
+        as_text: bool = True,
+        headers: Optional[Dict[str, str]] = None,
+        any_status: bool = False
+    ) -> Dict[str, Any]:
+        """
+        GET a URL over the shared connection pool, paced by the request governor
+
+        429/503 responses back the host off and are retried up to
+        settings.governor_max_retries times.
+
+        Returns:
+            Dict with url, status, headers, body (str or bytes; None on failure, and for
+            non-200 responses unless any_status is set), bytes, elapsed_ms, retries and error
+        """
+        started = time.perf_counter()
+        result: Dict[str, Any] = {"url": url, "status": None, "headers": {}, "body": None, "bytes": 0, "retries": 0, "error": None}
+
+        for attempt in range(settings.governor_max_retries + 1):
+            result.update(status=None, headers={}, body=None, bytes=0, error=None, retries=attempt)
+            backoff = None
+            try:
+                session = await self._get_session()
+                async with request_governor.slot(url) as ticket:
+                    async with session.get(url, headers=headers) as response:
+                        result["status"] = response.status
+                        result["headers"] = {k.lower(): v for k, v in response.headers.items()}
+                        raw = await response.read()
+                    backoff = ticket.observe(response.status, result["headers"])
+                result["bytes"] = len(raw)
+                if response.status == 200 or any_status:
+                    if as_text:
+                        result["body"] = raw.decode(response.charset or 'utf-8', errors='replace')
+                    else:
+                        result["body"] = raw
+            except Exception as e:
+                result["error"] = str(e) or type(e).__name__
+
+            # The governor delays the retry until the host's backoff expires
+            if backoff is None:
+                break
+
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    async def fetch_stylesheets(
+        self,
+        urls: List[str],
+        lookup: Optional[Callable[[str], Optional[str]]] = None
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Fetch stylesheets in parallel and resolve their @import chains
+        
+        Sheets that lookup returns (e.g. bodies captured from the browser)
+        are used as-is and never requested again.
+
+        Returns:
+            Tuple of CSS texts in cascade order (imports before the sheet that
+            imports them) and per-file timing records
+        """
+        timings: List[Dict[str, Any]] = []
+        seen: Set[str] = set()
+
+        async def load(url: str, depth: int, imported_from: Optional[str]) -> List[str]:
+            if url in seen:
+                return []
+            seen.add(url)
+
+            css = lookup(url) if lookup else None
+            if css is not None:
+                timings.append({
+                    "url": url,
+                    "status": 200,
+                    "bytes": len(css),
+                    "elapsed_ms": 0.0,
+                    "imported_from": imported_from,
+                    "source": "browser",
+                    "error": None
+                })
+            else:
+                result = await self.fetch(url)
+                timings.append({
+                    "url": url,
+                    "status": result["status"],
+                    "bytes": result["bytes"],
+                    "elapsed_ms": result["elapsed_ms"],
+                    "imported_from": imported_from,
+                    "source": "network",
+                    "error": result["error"]
+                })
+                css = result["body"]
+
+            if css is None:
+                print(f"Failed to fetch CSS from {url}: {result['error'] or result['status']}")
+                return []
+
+            imports = []
+            if depth < settings.css_max_import_depth:
+                imports = [urljoin(url, href) for href in CSS_IMPORT_PATTERN.findall(css)]
+
+            nested = await asyncio.gather(*(load(href, depth + 1, url) for href in imports))
+            return [text for chunk in nested for text in chunk] + [css]
+
+        sheets = await asyncio.gather(*(load(url, 0, None) for url in dict.fromkeys(urls)))
+        return [text for chunk in sheets for text in chunk], timings
+
+    async def close(self):
+        """Close the pooled session"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+# Global HTTP client shared by every outbound fetch
+http_client = HttpClient()
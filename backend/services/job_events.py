@@ -0,0 +1,119 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+# Typed partial results a scraper publishes as each piece of the page becomes available
+PARTIAL_TYPES = ("html", "css", "layout", "colors", "fonts", "images", "screenshot")
+
+# Callback scrapers receive for publishing partials: (partial type, payload)
+PartialCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+async def emit_partial(on_partial: Optional[PartialCallback], kind: str, payload: Dict[str, Any]):
+    """Hand a partial result to the callback without letting a failing consumer break the scrape"""
+    if on_partial is None:
+        return
+    try:
+        await on_partial(kind, payload)
+    except Exception as e:
+        print(f"⚠️ Partial result consumer failed on {kind}: {e}")
+
+class JobEvents:
+    """In-memory progress channel per job: status updates and partial scrape results, replayed to late subscribers"""
+
+    def __init__(self):
+        self._history: Dict[str, List[Dict[str, Any]]] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._waiters: Dict[str, Dict[str, asyncio.Future]] = {}
+        self._closed: Set[str] = set()
+
+    def publish(self, job_id: str, event: str, data: Dict[str, Any]):
+        """Record an event for the job and push it to every live subscriber"""
+        if job_id in self._closed:
+            return
+
+        history = self._history.setdefault(job_id, [])
+        message = {"id": len(history) + 1, "event": event, "data": data, "at": time.time()}
+        history.append(message)
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(message)
+
+        if event == "partial":
+            waiter = self._waiters.get(job_id, {}).get(data["type"])
+            if waiter and not waiter.done():
+                waiter.set_result(data["data"])
+
+    async def publish_partial(self, job_id: str, kind: str, payload: Dict[str, Any]):
+        """PartialCallback-compatible publisher, e.g. functools.partial(job_events.publish_partial, job_id)"""
+        self.publish(job_id, "partial", {"type": kind, "data": payload})
+
+    async def wait_for_partial(self, job_id: str, kind: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Wait until a scraper has published the given partial for a job
+
+        Lets downstream stages start on the piece they need first instead of
+        waiting for the whole scrape.
+
+        Returns:
+            Optional[Dict]: The partial's payload, or None if the job closed or timed out without it
+        """
+        for message in self._history.get(job_id, ()):
+            if message["event"] == "partial" and message["data"]["type"] == kind:
+                return message["data"]["data"]
+        if job_id in self._closed:
+            return None
+
+        waiters = self._waiters.setdefault(job_id, {})
+        if kind not in waiters:
+            waiters[kind] = asyncio.get_running_loop().create_future()
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiters[kind]), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job's events so far, then live events until the job closes"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for message in self._history.get(job_id, ()):
+            queue.put_nowait(message)
+        if job_id in self._closed:
+            queue.put_nowait(None)
+        else:
+            self._subscribers.setdefault(job_id, set()).add(queue)
+
+        try:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    return
+                yield message
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers:
+                subscribers.discard(queue)
+
+    def close(self, job_id: str):
+        """
+        End the job's stream
+
+        Partial payloads (HTML, CSS, streamed chunks, ...) are dropped from the history
+        so finished jobs only keep their status trail in memory.
+        """
+        self._closed.add(job_id)
+        self._history[job_id] = [m for m in self._history.get(job_id, []) if m["event"] == "status"]
+        for queue in self._subscribers.pop(job_id, set()):
+            queue.put_nowait(None)
+        for waiter in self._waiters.pop(job_id, {}).values():
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def discard(self, job_id: str):
+        """Forget a job entirely (called when old jobs are cleaned up)"""
+        self.close(job_id)
+        self._history.pop(job_id, None)
+        self._closed.discard(job_id)
+
+    def is_known(self, job_id: str) -> bool:
+        return job_id in self._history or job_id in self._closed
+
+# Global job event channel
+job_events = JobEvents()
@@ -0,0 +1,131 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import Page, Request
+
+from config import settings
+
+# Requests that scrolling typically sets off: lazy images, media posters and infinite-scroll fetches
+LAZY_RESOURCE_TYPES = {"image", "media", "fetch", "xhr", "font", "stylesheet"}
+
+SCROLL_STEP_SCRIPT = """
+() => {
+    const scroller = document.scrollingElement || document.documentElement;
+    window.scrollBy(0, window.innerHeight);
+    return {
+        y: window.scrollY,
+        height: scroller.scrollHeight,
+        atBottom: window.scrollY + window.innerHeight >= scroller.scrollHeight - 2
+    };
+}
+"""
+
+# Resolves once images near the viewport have loaded (or failed), or after timeoutMs
+WAIT_FOR_VISIBLE_ASSETS_SCRIPT = """
+async (timeoutMs) => {
+    // Two frames let IntersectionObserver callbacks swap in real sources first
+    await new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+
+    const pending = Array.from(document.images).filter(img => {
+        if (img.complete && img.naturalWidth > 0) return false;
+        const rect = img.getBoundingClientRect();
+        return rect.bottom > 0 && rect.top < window.innerHeight * 1.5 && (img.currentSrc || img.src);
+    });
+    if (!pending.length) return 0;
+
+    return await new Promise(resolve => {
+        let remaining = pending.length;
+        const settle = () => { if (--remaining <= 0) resolve(pending.length); };
+        pending.forEach(img => {
+            img.addEventListener('load', settle, { once: true });
+            img.addEventListener('error', settle, { once: true });
+        });
+        setTimeout(() => resolve(pending.length - remaining), timeoutMs);
+    });
+}
+"""
+
+class LazyContentLoader:
+    """Scrolls a page one viewport at a time so lazy images and sections load before capture"""
+
+    def __init__(
+        self,
+        max_ms: Optional[int] = None,
+        step_ms: Optional[int] = None,
+        max_steps: Optional[int] = None,
+        stable_steps: Optional[int] = None
+    ):
+        self.max_ms = max_ms if max_ms is not None else settings.lazy_load_max_ms
+        self.step_ms = step_ms if step_ms is not None else settings.lazy_load_step_ms
+        self.max_steps = max_steps if max_steps is not None else settings.lazy_load_max_steps
+        self.stable_steps = stable_steps if stable_steps is not None else settings.lazy_load_stable_steps
+
+    async def load(self, page: Page) -> Dict[str, Any]:
+        """
+        Step through the page, waiting only for assets that scrolling brings into view
+
+        Stops once the bottom is reached and the page height has stopped growing,
+        or when the step or time budget runs out, then scrolls back to the top.
+
+        Returns:
+            Dict with steps, elapsed_ms, initial/final height, stop reason and
+            the lazy assets the scroll triggered
+        """
+        started = time.monotonic()
+        triggered: List[str] = []
+
+        def _on_request(request: Request):
+            if request.resource_type in LAZY_RESOURCE_TYPES:
+                triggered.append(request.url)
+
+        page.on("request", _on_request)
+        steps = 0
+        stable = 0
+        images_waited = 0
+        stopped_because = "max_steps"
+        initial_height = final_height = None
+
+        try:
+            initial_height = final_height = await page.evaluate(
+                "(document.scrollingElement || document.documentElement).scrollHeight"
+            )
+
+            while steps < self.max_steps:
+                remaining_ms = self.max_ms - (time.monotonic() - started) * 1000
+                if remaining_ms <= 0:
+                    stopped_because = "time_budget"
+                    break
+
+                position = await page.evaluate(SCROLL_STEP_SCRIPT)
+                steps += 1
+                images_waited += await page.evaluate(
+                    WAIT_FOR_VISIBLE_ASSETS_SCRIPT, int(min(self.step_ms, remaining_ms))
+                )
+
+                height = await page.evaluate("(document.scrollingElement || document.documentElement).scrollHeight")
+                if position["atBottom"]:
+                    # Infinite-scroll pages keep growing; stop once the height settles
+                    stable = stable + 1 if height <= final_height else 0
+                    if stable >= self.stable_steps:
+                        stopped_because = "height_stable"
+                        break
+                final_height = max(final_height, height)
+
+            await page.evaluate("window.scrollTo(0, 0)")
+        except Exception as e:
+            print(f"⚠️ Lazy content loading stopped early: {e}")
+            stopped_because = "error"
+        finally:
+            page.remove_listener("request", _on_request)
+
+        triggered = list(dict.fromkeys(triggered))
+        return {
+            "steps": steps,
+            "elapsed_ms": round((time.monotonic() - started) * 1000),
+            "initial_height": initial_height,
+            "final_height": final_height,
+            "stopped_because": stopped_because,
+            "images_waited": images_waited,
+            "triggered_count": len(triggered),
+            "triggered_assets": triggered[:50]
+        }
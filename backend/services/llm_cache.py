@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import settings
+
+# Trailing spaces and runs of blank lines never change what a model generates
+TRAILING_WHITESPACE = re.compile(r"[ \t]+$", re.MULTILINE)
+BLANK_RUNS = re.compile(r"\n{3,}")
+
+def normalize_prompt(text: str) -> str:
+    """Canonical form of a prompt for cache keys: unified newlines, no trailing spaces, collapsed blank lines"""
+    text = (text or "").replace("\r\n", "\n")
+    text = TRAILING_WHITESPACE.sub("", text)
+    return BLANK_RUNS.sub("\n\n", text).strip()
+
+class LLMCache:
+    """
+    On-disk cache of model completions keyed by provider, model, normalized prompt and sampling parameters
+
+    Entries expire after the TTL, and the least recently used are evicted once
+    the cache outgrows its size limit. File mtimes track last access, so a hit
+    costs one read and no rewrite.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[int] = None
+    ):
+        self.root = Path(root or settings.llm_cache_path)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.llm_cache_max_mb * 1024 * 1024
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.llm_cache_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.expired = 0
+        self.evictions = 0
+        self.saved_output_tokens = 0
+        self.saved_cost_usd = 0.0
+        self._write_lock = asyncio.Lock()
+
+    def key(self, provider: str, model: str, system_prompt: str, prompt: str, params: Dict[str, Any]) -> str:
+        material = json.dumps({
+            "provider": provider,
+            "model": model,
+            "system": normalize_prompt(system_prompt),
+            "prompt": normalize_prompt(prompt),
+            "params": params
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a completion
+
+        Returns:
+            Optional[Dict]: The cached entry (response text, usage, created_at), or None on a miss
+        """
+        if not settings.llm_cache_enabled:
+            return None
+
+        try:
+            entry = await asyncio.to_thread(self._read, key)
+        except Exception as e:
+            print(f"⚠️ LLM cache read failed: {e}")
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        usage = entry.get("usage") or {}
+        self.saved_output_tokens += usage.get("output_tokens", 0)
+        self.saved_cost_usd += usage.get("total_cost_usd", 0.0)
+        return entry
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.root / f"{key}.json"
+        try:
+            entry = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+
+        if time.time() - entry["created_at"] > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            self.expired += 1
+            return None
+
+        # Record the access for LRU eviction
+        os.utime(path)
+        return entry
+
+    async def put(self, key: str, provider: str, model: str, response: str, usage: Optional[Dict[str, Any]] = None):
+        """Store a completion; failures only cost the next call a cache miss"""
+        if not settings.llm_cache_enabled or not response:
+            return
+
+        entry = {
+            "provider": provider,
+            "model": model,
+            "created_at": time.time(),
+            "response": response,
+            "usage": usage or {}
+        }
+        try:
+            async with self._write_lock:
+                await asyncio.to_thread(self._write, key, json.dumps(entry))
+                await asyncio.to_thread(self._evict)
+            self.stores += 1
+        except Exception as e:
+            print(f"⚠️ Failed to cache {provider} completion: {e}")
+
+    def _write(self, key: str, payload: str):
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f".{key}.{uuid.uuid4().hex}"
+        staging.write_text(payload)
+        staging.replace(self.root / f"{key}.json")
+
+    def _files(self) -> list:
+        files = []
+        for path in self.root.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((path, stat.st_mtime, stat.st_size))
+        return files
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its size limit"""
+        files = sorted(self._files(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in files)
+        for path, _, size in files:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        files = self._files() if self.root.exists() else []
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.llm_cache_enabled,
+            "entries": len(files),
+            "bytes": sum(size for _, _, size in files),
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "saved_output_tokens": self.saved_output_tokens,
+            "saved_cost_usd": round(self.saved_cost_usd, 4)
+        }
+
+# Global LLM response cache shared by every provider
+llm_cache = LLMCache()
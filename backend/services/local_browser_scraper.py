@@ -0,0 +1,21 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from playwright.async_api import Page
+from models import CloneOptions
+from services.browser_pool import browser_pool
+from services.browser_provider import BrowserProvider
+from services.browserbase_pool import BROWSER_SETTINGS
+
+class LocalChromiumScraper(BrowserProvider):
+    """Renders pages in the shared local Chromium pool: no stealth, but no remote session to wait for"""
+    
+    name = "local"
+    stealth = False
+    
+    @asynccontextmanager
+    async def page(self, url: str, options: Optional[CloneOptions] = None) -> AsyncIterator[Page]:
+        """Open a page in a fresh context leased from the browser pool"""
+        print(f"🚀 Leasing local browser context for: {url}")
+        # Same window size Browserbase sessions get, so both providers capture the same layout
+        async with browser_pool.context(viewport=BROWSER_SETTINGS["viewport"]) as context:
+            yield await context.new_page()
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+from playwright.async_api import Page, Request
+
+from config import settings
+
+# Installed before any page script runs; records DOM mutations and layout
+# shifts so readiness can be judged from timestamps instead of fixed sleeps
+READINESS_INIT_SCRIPT = """
+(() => {
+    if (window.__cloneReadiness) return;
+
+    const state = { lastMutation: performance.now(), lastLayoutShift: 0 };
+
+    new MutationObserver(() => { state.lastMutation = performance.now(); })
+        .observe(document, { childList: true, subtree: true, attributes: true, characterData: true });
+
+    try {
+        new PerformanceObserver(list => {
+            for (const entry of list.getEntries()) {
+                if (!entry.hadRecentInput) state.lastLayoutShift = performance.now();
+            }
+        }).observe({ type: 'layout-shift', buffered: true });
+    } catch (e) {
+        // Layout instability API unavailable
+    }
+
+    window.__cloneReadiness = {
+        snapshot: () => ({
+            now: performance.now(),
+            lastMutation: state.lastMutation,
+            lastLayoutShift: state.lastLayoutShift,
+            fontsReady: document.fonts ? document.fonts.status === 'loaded' : true,
+            readyState: document.readyState
+        })
+    };
+})()
+"""
+
+# Long-lived connections never finish and would keep the page "busy" forever
+IGNORED_RESOURCE_TYPES = {"websocket", "eventsource"}
+
+class PageReadinessMonitor:
+    """Decides when a page has settled: quiet DOM, idle network, loaded fonts and stable layout"""
+
+    def __init__(
+        self,
+        page: Page,
+        quiet_ms: Optional[int] = None,
+        max_pending_requests: Optional[int] = None
+    ):
+        self.page = page
+        self.quiet_ms = quiet_ms if quiet_ms is not None else settings.page_ready_quiet_ms
+        self.max_pending_requests = (
+            max_pending_requests if max_pending_requests is not None
+            else settings.page_ready_max_pending_requests
+        )
+        self.pending: Set[Request] = set()
+        self.last_network_activity = time.monotonic()
+
+    async def attach(self):
+        """Install observers and start tracking requests (call before navigation)"""
+        await self.page.add_init_script(READINESS_INIT_SCRIPT)
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_request_done)
+        self.page.on("requestfailed", self._on_request_done)
+
+    def _on_request(self, request: Request):
+        if request.resource_type in IGNORED_RESOURCE_TYPES:
+            return
+        self.pending.add(request)
+        self.last_network_activity = time.monotonic()
+
+    def _on_request_done(self, request: Request):
+        self.pending.discard(request)
+        self.last_network_activity = time.monotonic()
+
+    async def wait_until_ready(self, max_wait_ms: int, ignore: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Poll until every readiness signal has been quiet for quiet_ms, or the hard cap passes
+
+        Signals in ignore (e.g. "network" on a site that long-polls) are not waited on.
+
+        Returns:
+            Dict with ready, elapsed_ms, waiting_on, ignored_busy (ignored signals still
+            active when the wait ended) and pending_requests
+        """
+        ignore = set(ignore)
+        started = time.monotonic()
+
+        while True:
+            elapsed_ms = (time.monotonic() - started) * 1000
+            state = await self._snapshot()
+
+            waiting_on = []
+            if state is None or state["readyState"] == "loading":
+                waiting_on.append("dom")
+            else:
+                if state["now"] - state["lastMutation"] < self.quiet_ms:
+                    waiting_on.append("mutations")
+                if state["now"] - state["lastLayoutShift"] < self.quiet_ms:
+                    waiting_on.append("layout")
+                if not state["fontsReady"]:
+                    waiting_on.append("fonts")
+
+            network_quiet_ms = (time.monotonic() - self.last_network_activity) * 1000
+            if len(self.pending) > self.max_pending_requests or network_quiet_ms < self.quiet_ms:
+                waiting_on.append("network")
+
+            ignored_busy = [signal for signal in waiting_on if signal in ignore]
+            waiting_on = [signal for signal in waiting_on if signal not in ignore]
+            if not waiting_on or elapsed_ms >= max_wait_ms:
+                return {
+                    "ready": not waiting_on,
+                    "elapsed_ms": round(elapsed_ms),
+                    "waiting_on": waiting_on,
+                    "ignored_busy": ignored_busy,
+                    "pending_requests": len(self.pending)
+                }
+
+            await asyncio.sleep(settings.page_ready_poll_ms / 1000)
+
+    async def _snapshot(self) -> Optional[Dict[str, Any]]:
+        try:
+            # Re-install in case the monitor was attached after navigation started
+            await self.page.evaluate(READINESS_INIT_SCRIPT)
+            return await self.page.evaluate("window.__cloneReadiness.snapshot()")
+        except Exception:
+            # The execution context is replaced while the page navigates or redirects
+            return None
@@ -0,0 +1,127 @@
+from collections import Counter
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Request, Route
+
+from models import CloneOptions
+
+# Analytics, ad and session-replay hosts; matched against the request host and its parents
+TRACKER_DOMAINS = {
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com",
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "facebook.net", "connect.facebook.net", "analytics.twitter.com", "ads-twitter.com",
+    "hotjar.com", "clarity.ms", "fullstory.com", "mouseflow.com", "crazyegg.com",
+    "segment.com", "segment.io", "mixpanel.com", "amplitude.com", "heap.io", "heapanalytics.com",
+    "scorecardresearch.com", "quantserve.com", "chartbeat.com", "newrelic.com", "nr-data.net",
+    "criteo.com", "criteo.net", "taboola.com", "outbrain.com", "adnxs.com", "amazon-adsystem.com",
+    "bat.bing.com", "snap.licdn.com", "ads.linkedin.com", "px.ads.linkedin.com",
+    "analytics.tiktok.com", "ct.pinterest.com",
+    "optimizely.com", "intercom.io", "intercomcdn.com", "hs-analytics.net", "hs-scripts.com",
+    "sentry.io", "bugsnag.com", "onetrust.com", "cookielaw.org"
+}
+
+# Rough transfer sizes used to estimate bandwidth saved by aborted requests
+ESTIMATED_BYTES = {
+    "media": 2_000_000,
+    "script": 60_000,
+    "document": 40_000,
+    "image": 30_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "ping": 500
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+# Two-label public suffixes that need one more label to identify a site
+MULTI_PART_SUFFIXES = {"co.uk", "com.au", "co.jp", "com.br", "co.in", "co.nz", "com.cn", "org.uk"}
+
+def site_of(host: str) -> str:
+    """Approximate registrable domain (eTLD+1) of a host"""
+    labels = host.lower().strip(".").split(".")
+    if len(labels) > 2 and ".".join(labels[-2:]) in MULTI_PART_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+def is_tracker(url: str) -> bool:
+    labels = (urlparse(url).hostname or "").lower().split(".")
+    return any(".".join(labels[i:]) in TRACKER_DOMAINS for i in range(len(labels) - 1))
+
+class RequestBlocker:
+    """Aborts media, tracker and third-party script requests before they leave the browser"""
+
+    def __init__(
+        self,
+        page_url: str,
+        block_media: bool = False,
+        block_trackers: bool = True,
+        block_third_party_scripts: bool = False
+    ):
+        self.site = site_of(urlparse(page_url).hostname or "")
+        self.block_media = block_media
+        self.block_trackers = block_trackers
+        self.block_third_party_scripts = block_third_party_scripts
+        self.by_reason: Counter = Counter()
+        self.by_type: Counter = Counter()
+        self.estimated_bytes_saved = 0
+
+    @classmethod
+    def from_options(cls, page_url: str, options: Optional[CloneOptions]) -> "RequestBlocker":
+        options = options or CloneOptions()
+        return cls(
+            page_url,
+            block_media=options.block_media,
+            block_trackers=options.block_trackers,
+            block_third_party_scripts=options.block_third_party_scripts
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.block_media or self.block_trackers or self.block_third_party_scripts
+
+    async def attach(self, page: Page):
+        """Start intercepting requests for a page (call before navigation)"""
+        if self.enabled:
+            await page.route("**/*", self._handle)
+
+    async def _handle(self, route: Route):
+        request = route.request
+        reason = self._block_reason(request)
+        if reason is None:
+            # Let other handlers (or the network) serve the request
+            await route.fallback()
+            return
+
+        self.by_reason[reason] += 1
+        self.by_type[request.resource_type] += 1
+        self.estimated_bytes_saved += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+        await route.abort("blockedbyclient")
+
+    def _block_reason(self, request: Request) -> Optional[str]:
+        resource_type = request.resource_type
+
+        # Never block the page being cloned itself
+        if resource_type == "document" and request.is_navigation_request():
+            try:
+                if request.frame.parent_frame is None:
+                    return None
+            except Exception:
+                return None
+
+        if self.block_media and resource_type == "media":
+            return "media"
+        if self.block_trackers and is_tracker(request.url):
+            return "tracker"
+        if self.block_third_party_scripts and resource_type == "script":
+            host = urlparse(request.url).hostname or ""
+            if host and site_of(host) != self.site:
+                return "third_party_script"
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests_blocked": sum(self.by_reason.values()),
+            "by_reason": dict(self.by_reason),
+            "by_type": dict(self.by_type),
+            "estimated_bytes_saved": self.estimated_bytes_saved
+        }
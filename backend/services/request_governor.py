@@ -0,0 +1,204 @@
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+from config import settings
+
+# Statuses origins use to say "slow down"
+BACKOFF_STATUSES = {429, 503}
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given as seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except Exception:
+        return None
+
+class _HostState:
+    """Concurrency slots, token bucket and backoff for one origin host"""
+
+    def __init__(self):
+        self.slots = asyncio.Semaphore(settings.governor_max_concurrent_per_host)
+        self.tokens = float(settings.governor_burst_per_host)
+        self.refilled_at = time.monotonic()
+        self.backoff_until = 0.0
+        self.consecutive_backoffs = 0
+        self.bucket_lock = asyncio.Lock()
+        self.in_flight = 0
+        self.requests = 0
+        self.waited_ms = 0.0
+        self.backoffs = 0
+        self.statuses: Counter = Counter()
+
+    async def take_token(self):
+        """Wait out any backoff, then take one token from the bucket"""
+        async with self.bucket_lock:
+            while True:
+                now = time.monotonic()
+                if now < self.backoff_until:
+                    await asyncio.sleep(self.backoff_until - now)
+                    continue
+
+                rate = settings.governor_rate_per_host
+                self.tokens = min(settings.governor_burst_per_host, self.tokens + (now - self.refilled_at) * rate)
+                self.refilled_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / rate)
+
+class GovernorTicket:
+    """One admitted request; report its outcome so the host's backoff can adapt"""
+
+    def __init__(self, governor: "RequestGovernor", host: str):
+        self.governor = governor
+        self.host = host
+
+    def observe(self, status: Optional[int], headers: Optional[Dict[str, str]] = None) -> Optional[float]:
+        """
+        Record a response status for the host
+
+        Returns:
+            Optional[float]: Seconds the host is now backed off for, or None if the response was fine
+        """
+        return self.governor.observe(self.host, status, headers)
+
+class RequestGovernor:
+    """
+    Coordinates every outbound request to an origin, whoever makes it
+
+    Per host it caps concurrent requests, spaces them with a token bucket and
+    backs off exponentially (or as Retry-After says) on 429/503 responses.
+    """
+
+    def __init__(self):
+        # Least recently used first, so hosts not contacted in a while are dropped first
+        self._hosts: "OrderedDict[str, _HostState]" = OrderedDict()
+
+    def _state(self, host: str) -> _HostState:
+        if host in self._hosts:
+            self._hosts.move_to_end(host)
+            return self._hosts[host]
+
+        self._hosts[host] = _HostState()
+        self._prune()
+        return self._hosts[host]
+
+    def _prune(self):
+        """Forget least recently used hosts with nothing in flight or backed off, down to governor_max_hosts"""
+        now = time.monotonic()
+        excess = len(self._hosts) - settings.governor_max_hosts
+        for host in list(self._hosts):
+            if excess <= 0:
+                break
+            state = self._hosts[host]
+            idle = (
+                state.in_flight == 0
+                and state.backoff_until <= now
+                and not state.slots.locked()
+                and not state.bucket_lock.locked()
+            )
+            if idle:
+                del self._hosts[host]
+                excess -= 1
+
+    async def admit(self, url: str) -> GovernorTicket:
+        """Wait for url's host to allow one more request to start, without holding a slot while it runs"""
+        host = (urlsplit(url).hostname or "").lower()
+        state = self._state(host)
+        started = time.monotonic()
+        await state.take_token()
+        state.waited_ms += (time.monotonic() - started) * 1000
+        state.requests += 1
+        return GovernorTicket(self, host)
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[GovernorTicket]:
+        """Hold a request slot for url's host for the duration of the block"""
+        host = (urlsplit(url).hostname or "").lower()
+        state = self._state(host)
+        started = time.monotonic()
+
+        async with state.slots:
+            await state.take_token()
+            waited = (time.monotonic() - started) * 1000
+            state.waited_ms += waited
+            state.requests += 1
+            state.in_flight += 1
+            try:
+                yield GovernorTicket(self, host)
+            finally:
+                state.in_flight -= 1
+
+    def observe(self, host: str, status: Optional[int], headers: Optional[Dict[str, str]] = None) -> Optional[float]:
+        state = self._state(host)
+        state.statuses[str(status) if status is not None else "error"] += 1
+
+        if status not in BACKOFF_STATUSES:
+            state.consecutive_backoffs = 0
+            return None
+
+        lowered = {k.lower(): v for k, v in (headers or {}).items()}
+        delay = _retry_after_seconds(lowered.get("retry-after"))
+        if delay is None:
+            delay = settings.governor_backoff_base_ms / 1000 * (2 ** state.consecutive_backoffs)
+        delay = min(delay, settings.governor_backoff_max_ms / 1000)
+
+        state.consecutive_backoffs += 1
+        state.backoffs += 1
+        state.backoff_until = max(state.backoff_until, time.monotonic() + delay)
+        # Drain the bucket so requests resume at the steady rate, not in a burst
+        state.tokens = 0.0
+        print(f"🐢 {host} answered {status}, backing off for {delay:.1f}s")
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        hosts = sorted(self._hosts.items(), key=lambda item: item[1].requests, reverse=True)
+        return {
+            "hosts": len(self._hosts),
+            "requests": sum(state.requests for state in self._hosts.values()),
+            "backoffs": sum(state.backoffs for state in self._hosts.values()),
+            "limits": {
+                "max_concurrent_per_host": settings.governor_max_concurrent_per_host,
+                "rate_per_host": settings.governor_rate_per_host,
+                "burst_per_host": settings.governor_burst_per_host
+            },
+            "by_host": {
+                host: {
+                    "requests": state.requests,
+                    "in_flight": state.in_flight,
+                    "avg_wait_ms": round(state.waited_ms / state.requests, 1) if state.requests else 0.0,
+                    "backoffs": state.backoffs,
+                    "backed_off_for_s": round(max(state.backoff_until - now, 0.0), 1),
+                    "statuses": dict(state.statuses)
+                }
+                for host, state in hosts[:50]
+            }
+        }
+
+# Global governor shared by every outbound fetch and browser navigation
+request_governor = RequestGovernor()
+
+async def governed_goto(page, url: str, **kwargs):
+    """
+    page.goto paced by the governor; the navigation's status feeds the host's backoff
+
+    Only the start of the navigation is rate limited. A slow page must not hold
+    one of the host's slots and block its stylesheet and asset fetches.
+    """
+    ticket = await request_governor.admit(url)
+    response = await page.goto(url, **kwargs)
+    if response is not None:
+        ticket.observe(response.status, response.headers)
+    return response
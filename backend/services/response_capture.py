@@ -0,0 +1,78 @@
+import asyncio
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Set
+
+from playwright.async_api import Page, Response
+
+from config import settings
+from models import CapturedResponse
+
+CAPTURED_RESOURCE_TYPES = {"stylesheet", "font", "image"}
+
+class ResponseCapture:
+    """Records the stylesheet, font and image bodies a page downloads while it loads"""
+
+    def __init__(self, resource_types: Iterable[str] = CAPTURED_RESOURCE_TYPES, max_bytes: Optional[int] = None):
+        self.resource_types = set(resource_types)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.response_capture_max_mb * 1024 * 1024
+        self.responses: Dict[str, CapturedResponse] = {}
+        self.total_bytes = 0
+        self.skipped = 0
+        self._pending: Set[asyncio.Task] = set()
+
+    def attach(self, page: Page):
+        """Start recording responses for a page (call before navigation)"""
+        page.on("response", self._on_response)
+
+    def _on_response(self, response: Response):
+        request = response.request
+        if request.resource_type not in self.resource_types:
+            return
+        if request.method != "GET" or response.status != 200 or response.url in self.responses:
+            return
+
+        task = asyncio.create_task(self._record(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _record(self, response: Response):
+        try:
+            body = await response.body()
+        except Exception:
+            # Bodies of evicted or redirected responses are no longer available
+            self.skipped += 1
+            return
+
+        if self.total_bytes + len(body) > self.max_bytes:
+            self.skipped += 1
+            return
+
+        self.responses[response.url] = CapturedResponse(
+            url=response.url,
+            resource_type=response.request.resource_type,
+            content_type=response.headers.get("content-type", ""),
+            status=response.status,
+            body=body
+        )
+        self.total_bytes += len(body)
+
+    async def drain(self):
+        """Wait for in-flight body reads to finish"""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def get(self, url: str) -> Optional[CapturedResponse]:
+        return self.responses.get(url)
+
+    def text(self, url: str) -> Optional[str]:
+        """Decoded body of a captured response, or None if it was not captured"""
+        captured = self.responses.get(url)
+        return captured.text() if captured else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "responses": len(self.responses),
+            "bytes": self.total_bytes,
+            "skipped": self.skipped,
+            "by_type": dict(Counter(r.resource_type for r in self.responses.values()))
+        }
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, Dict, Iterable
+
+from playwright.async_api import BrowserContext, Route
+
+SHARED_RESOURCE_TYPES = {"stylesheet", "script", "font", "image"}
+
+# Bodies are handed over decoded, so transfer headers from the original response no longer apply
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+class SharedResponses:
+    """Downloads each subresource once for sibling contexts rendering the same page"""
+
+    def __init__(self, resource_types: Iterable[str] = SHARED_RESOURCE_TYPES):
+        self.resource_types = set(resource_types)
+        self._responses: Dict[str, asyncio.Future] = {}
+        self.fetched = 0
+        self.shared = 0
+        self.bytes_shared = 0
+
+    async def attach(self, context: BrowserContext):
+        """Serve the context's subresources through the shared cache (call before navigation)"""
+        await context.route("**/*", self._handle)
+
+    async def _handle(self, route: Route):
+        request = route.request
+        if request.method != "GET" or request.resource_type not in self.resource_types:
+            await route.fallback()
+            return
+
+        future = self._responses.get(request.url)
+        if future is None:
+            # First context to ask downloads it; siblings wait on the same future
+            future = asyncio.get_running_loop().create_future()
+            self._responses[request.url] = future
+            await self._fetch(route, future)
+            return
+
+        payload = await future
+        if payload is None:
+            await route.fallback()
+            return
+
+        status, headers, body = payload
+        self.shared += 1
+        self.bytes_shared += len(body)
+        await route.fulfill(status=status, headers=headers, body=body)
+
+    async def _fetch(self, route: Route, future: asyncio.Future):
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            # Let the browser load it itself; waiting siblings will do the same
+            future.set_result(None)
+            await route.fallback()
+            return
+
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+        future.set_result((response.status, headers, body) if response.status == 200 else None)
+        self.fetched += 1
+        await route.fulfill(status=response.status, headers=headers, body=body)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fetched": self.fetched,
+            "shared": self.shared,
+            "bytes_shared": self.bytes_shared
+        }
@@ -0,0 +1,286 @@
+import asyncio
+import hashlib
+import json
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import settings
+from models import CloneOptions, ScrapeArtifacts, ScrapedData
+from services.http_client import http_client
+
+# Options that only affect generation, never what the scraper captures
+NON_SCRAPE_OPTIONS = {
+    "target_style", "include_animations", "mobile_first", "mobile_responsive",
+    "max_wait_time", "use_scrape_cache", "mirror_assets", "browser_provider",
+    "use_llm_cache", "reuse_templates"
+}
+
+# Query parameters that never change page content
+IGNORED_QUERY_PARAMS = {"fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "ref"}
+
+VALIDATOR_HEADERS = ("etag", "last-modified")
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for cache keys: lowercase host, no fragment, sorted query, no tracking params"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in IGNORED_QUERY_PARAMS and not k.lower().startswith("utm_")
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+def validators_from_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """ETag / Last-Modified from a document response, used for conditional revalidation"""
+    lowered = {k.lower(): v for k, v in (headers or {}).items()}
+    return {name: lowered[name] for name in VALIDATOR_HEADERS if lowered.get(name)}
+
+class ScrapeCache:
+    """On-disk cache of scrape results with TTL, LRU size limit and ETag/Last-Modified revalidation"""
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[int] = None
+    ):
+        self.root = Path(root or settings.scrape_cache_path)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.scrape_cache_max_mb * 1024 * 1024
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.scrape_cache_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._write_lock = asyncio.Lock()
+
+    def key(self, kind: str, url: str, options: Optional[CloneOptions]) -> str:
+        """Content address of a scrape: normalized URL plus the options that change its output"""
+        options = options or CloneOptions()
+        relevant = options.model_dump(mode="json", exclude=NON_SCRAPE_OPTIONS)
+        material = json.dumps({"kind": kind, "url": normalize_url(url), "options": relevant}, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    async def get_scraped_data(self, url: str, options: Optional[CloneOptions]) -> Optional[ScrapedData]:
+        entry = await self._lookup(self.key("scraped", url, options))
+        if entry is None:
+            return None
+
+        path, _ = entry
+        try:
+            data = await asyncio.to_thread(self._read_scraped_data, path)
+        except Exception as e:
+            # Another job's write evicted the entry since the lookup
+            print(f"⚠️ Cached scrape of {url} vanished while reading it: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        data.scrape_metrics["cache"] = "hit"
+        return data
+
+    def _read_scraped_data(self, path: Path) -> ScrapedData:
+        data = ScrapedData.model_validate_json((path / "data.json").read_bytes())
+        # Eviction may delete the entry while the job still uses it; give the job its own copy
+        data.screenshot_path = self._copy_screenshot(path)
+        return data
+
+    def _copy_screenshot(self, path: Path) -> Optional[str]:
+        screenshots = list(path.glob("screenshot.*"))
+        if not screenshots:
+            return None
+        target = Path(settings.screenshots_path) / f"cached_{uuid.uuid4().hex}{screenshots[0].suffix}"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(screenshots[0], target)
+        return str(target)
+
+    async def put_scraped_data(self, url: str, options: Optional[CloneOptions], data: ScrapedData):
+        files = await asyncio.to_thread(self._scraped_data_files, data)
+        await self._store(self.key("scraped", url, options), url, data.validators, files)
+
+    def _scraped_data_files(self, data: ScrapedData) -> Dict[str, bytes]:
+        files = {"data.json": data.model_dump_json().encode()}
+        if data.screenshot_path and Path(data.screenshot_path).exists():
+            screenshot = Path(data.screenshot_path)
+            files[f"screenshot{screenshot.suffix}"] = screenshot.read_bytes()
+        return files
+
+    async def get_artifacts(self, url: str, options: Optional[CloneOptions]) -> Optional[ScrapeArtifacts]:
+        entry = await self._lookup(self.key("artifacts", url, options))
+        if entry is None:
+            return None
+
+        path, _ = entry
+        try:
+            artifacts = await asyncio.to_thread(self._read_artifacts, path)
+        except Exception as e:
+            print(f"⚠️ Cached artifacts of {url} vanished while reading them: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        artifacts.scrape_metrics["cache"] = "hit"
+        return artifacts
+
+    def _read_artifacts(self, path: Path) -> ScrapeArtifacts:
+        payload = json.loads((path / "data.json").read_bytes())
+        payload["hero_image_bytes"] = (path / "hero.bin").read_bytes()
+        return ScrapeArtifacts.model_validate(payload)
+
+    async def put_artifacts(self, url: str, options: Optional[CloneOptions], artifacts: ScrapeArtifacts):
+        data = await asyncio.to_thread(artifacts.model_dump_json, exclude={"hero_image_bytes"})
+        files = {"data.json": data.encode(), "hero.bin": artifacts.hero_image_bytes}
+        await self._store(self.key("artifacts", url, options), url, artifacts.validators, files)
+
+    async def _lookup(self, key: str) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        path = self.root / key
+        try:
+            meta = await asyncio.to_thread(self._read_meta, path)
+        except Exception:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        if now - meta["created_at"] > self.ttl_seconds:
+            await asyncio.to_thread(shutil.rmtree, path, True)
+            self.misses += 1
+            return None
+
+        if now - meta["validated_at"] > settings.scrape_cache_revalidate_after_seconds:
+            self.revalidations += 1
+            if not await self._revalidate(meta):
+                print(f"🔄 Cached scrape of {meta['url']} changed at origin, re-scraping")
+                await asyncio.to_thread(shutil.rmtree, path, True)
+                self.misses += 1
+                return None
+            meta["validated_at"] = now
+
+        meta["last_access"] = now
+        try:
+            await asyncio.to_thread(self._write_meta, path, meta)
+        except Exception:
+            # Evicted since it was read
+            self.misses += 1
+            return None
+        return path, meta
+
+    def _read_meta(self, path: Path) -> Dict[str, Any]:
+        return json.loads((path / "meta.json").read_text())
+
+    def _write_meta(self, path: Path, meta: Dict[str, Any]):
+        """Replace meta.json atomically so an interrupted write never leaves a corrupt entry"""
+        staging = path / f".meta.{uuid.uuid4().hex}"
+        staging.write_text(json.dumps(meta))
+        staging.replace(path / "meta.json")
+
+    async def _revalidate(self, meta: Dict[str, Any]) -> bool:
+        """
+        Ask the origin whether the cached document is still current
+
+        Returns:
+            bool: True if the entry can be reused
+        """
+        validators = meta.get("validators") or {}
+        if not validators:
+            # Nothing to revalidate against; the TTL alone bounds staleness
+            return True
+
+        headers = {}
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last-modified" in validators:
+            headers["If-Modified-Since"] = validators["last-modified"]
+
+        result = await http_client.fetch(meta["url"], as_text=False, headers=headers)
+        if result["error"] or result["status"] is None:
+            # Origin unreachable: serve the cached copy rather than fail
+            return True
+        if result["status"] == 304:
+            return True
+        if result["status"] != 200:
+            return False
+
+        # Some servers ignore conditional headers; compare validators directly
+        current = validators_from_headers(result["headers"])
+        return bool(current) and all(current.get(name) == value for name, value in validators.items())
+
+    async def _store(self, key: str, url: str, validators: Dict[str, str], files: Dict[str, bytes]):
+        now = time.time()
+        meta = {
+            "url": url,
+            "created_at": now,
+            "validated_at": now,
+            "last_access": now,
+            "validators": validators,
+            "size": sum(len(body) for body in files.values())
+        }
+
+        try:
+            async with self._write_lock:
+                await asyncio.to_thread(self._write_entry, key, meta, files)
+                await asyncio.to_thread(self._evict)
+        except Exception as e:
+            print(f"⚠️ Failed to cache scrape of {url}: {e}")
+
+    def _write_entry(self, key: str, meta: Dict[str, Any], files: Dict[str, bytes]):
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f".{key}.{uuid.uuid4().hex}"
+        staging.mkdir()
+        for name, body in files.items():
+            (staging / name).write_bytes(body)
+        (staging / "meta.json").write_text(json.dumps(meta))
+
+        # Swap the finished entry into place so readers never see partial files
+        target = self.root / key
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+        staging.rename(target)
+
+    def _entries(self) -> list:
+        entries = []
+        for path in self.root.iterdir():
+            if path.name.startswith("."):
+                continue
+            try:
+                entries.append((path, json.loads((path / "meta.json").read_text())))
+            except Exception:
+                continue
+        return entries
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its size limit"""
+        entries = sorted(self._entries(), key=lambda entry: entry[1]["last_access"])
+        total = sum(meta["size"] for _, meta in entries)
+        for path, meta in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= meta["size"]
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries() if self.root.exists() else []
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(entries),
+            "bytes": sum(meta["size"] for _, meta in entries),
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions
+        }
+
+# Global scrape cache shared by both clone pipelines
+scrape_cache = ScrapeCache()
@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import lxml.html
+
+from config import settings
+
+SIMHASH_BITS = 64
+MINHASH_PERMUTATIONS = 64
+# 16 bands of 4 rows: pages whose class vocabularies overlap ~70% or more share a band with high probability
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Fixed seed so fingerprints stay comparable across restarts
+_rng = random.Random(0x5EED)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(MINHASH_PERMUTATIONS)]
+
+# Subtrees that say nothing about the page template
+IGNORED_TAGS = {"script", "style", "noscript", "template", "svg", "iframe"}
+# Ancestor depth of each structural shingle (e.g. "nav>ul>li")
+PATH_DEPTH = 3
+# Pages with fewer distinct classes carry too little theme signal to match on
+MIN_CLASSES = 5
+DIGITS = re.compile(r"\d+")
+WORDS = re.compile(r"\w+")
+# Word k-grams of the visible text, for the content check on direct reuse
+TEXT_SHINGLE = 3
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+
+def _simhash(weights: Counter) -> int:
+    vector = [0.0] * SIMHASH_BITS
+    for token, weight in weights.items():
+        hashed = _hash64(token)
+        for bit in range(SIMHASH_BITS):
+            vector[bit] += weight if hashed >> bit & 1 else -weight
+    return sum(1 << bit for bit, value in enumerate(vector) if value > 0)
+
+def _minhash(tokens: set) -> List[int]:
+    hashes = [_hash64(token) for token in tokens]
+    return [min((a * value + b) % MERSENNE_PRIME for value in hashes) for a, b in PERMUTATIONS]
+
+def fingerprint(html: str) -> Optional[Dict[str, Any]]:
+    """
+    Structural fingerprint of a page
+
+    SimHash over tag-path shingles captures the DOM skeleton; MinHash over the
+    class vocabulary (digits folded, so "post-1234" matches "post-987") captures
+    the theme. A separate SimHash over word shingles of the visible text tells
+    two pages on one template apart from the same page seen twice.
+
+    Returns:
+        Optional[Dict]: simhash, minhash, text_simhash and feature counts, or None for unparseable or empty pages
+    """
+    try:
+        root = lxml.html.fromstring(html)
+    except Exception:
+        return None
+
+    paths: Counter = Counter()
+    classes = set()
+    words: List[str] = []
+    stack: List[Tuple[Any, Tuple[str, ...]]] = [(root, ())]
+    while stack:
+        element, ancestors = stack.pop()
+        if not isinstance(element.tag, str):
+            continue
+        tag = element.tag.lower()
+        if tag in IGNORED_TAGS:
+            continue
+
+        path = (ancestors + (tag,))[-PATH_DEPTH:]
+        paths[">".join(path)] += 1
+        for name in (element.get("class") or "").split():
+            classes.add(DIGITS.sub("#", name.lower()))
+        words.extend(WORDS.findall((element.text or "").lower()))
+        for child in element:
+            # A child's tail is text of this element (and outlives an ignored child)
+            words.extend(WORDS.findall((child.tail or "").lower()))
+            stack.append((child, path))
+
+    if not paths or len(classes) < MIN_CLASSES:
+        return None
+    # Dampen repetition so long lists do not drown out the page skeleton
+    weights = Counter({path: 1 + count ** 0.5 for path, count in paths.items()})
+    shingles = Counter(" ".join(words[i:i + TEXT_SHINGLE]) for i in range(max(len(words) - TEXT_SHINGLE + 1, 0)))
+    return {
+        "simhash": _simhash(weights),
+        "minhash": _minhash(classes),
+        "text_simhash": _simhash(shingles) if shingles else None,
+        "paths": len(paths),
+        "classes": len(classes)
+    }
+
+def similarity(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, float]:
+    """Structure (SimHash), class vocabulary (MinHash) and combined similarity, each 0-1, plus text similarity"""
+    structure = 1 - bin(a["simhash"] ^ b["simhash"]).count("1") / SIMHASH_BITS
+    vocabulary = sum(x == y for x, y in zip(a["minhash"], b["minhash"])) / MINHASH_PERMUTATIONS
+    text_a, text_b = a.get("text_simhash"), b.get("text_simhash")
+    # Text never enters the combined score: it tells direct reuse apart from seeding
+    content = 1 - bin(text_a ^ text_b).count("1") / SIMHASH_BITS if text_a is not None and text_b is not None else 0.0
+    return {
+        "similarity": round((structure + vocabulary) / 2, 4),
+        "structure_similarity": round(structure, 4),
+        "class_similarity": round(vocabulary, 4),
+        "content_similarity": round(content, 4)
+    }
+
+def _bands(minhash: List[int]) -> List[str]:
+    return [f"{band}:{hash(tuple(minhash[band * LSH_ROWS:(band + 1) * LSH_ROWS]))}" for band in range(LSH_BANDS)]
+
+def is_new_generation(result: Dict[str, Any]) -> bool:
+    """
+    Whether a generator result is a fresh model output worth indexing
+
+    Fallback error pages must never be indexed, since a look-alike page would get
+    them back without calling the model. LLM-cache hits are already indexed.
+    """
+    metrics = result.get("generation_metrics") or {}
+    return bool(
+        result.get("success")
+        and result.get("html")
+        and metrics.get("output_tokens", 0) > 0
+        and not metrics.get("cached")
+    )
+
+def reference_prompt(match: Dict[str, Any]) -> str:
+    """Prompt section handing a seed match's generation to the model as its starting point"""
+    generation = match["html"]
+    if match.get("css"):
+        generation += f"\n<style>\n{match['css']}\n</style>"
+    return f"""
+**REFERENCE CLONE ({match['similarity']:.0%} structurally similar, same template as {match['source_url']}):**
+This page shares its template with a site already cloned. Start from that clone: keep its
+layout, components and styles where the page matches, and change content, colors and any
+sections that differ according to the analysis above.
+```html
+{generation[:settings.template_seed_max_chars]}
+```
+"""
+
+class TemplateIndex:
+    """
+    Index of past generations by page fingerprint, so pages built on a known template skip a fresh generation
+
+    Candidates come from MinHash LSH buckets and are ranked by combined
+    structure and class similarity. Entries and their generations persist
+    under template_index_path.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.template_index_path)
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._buckets: Dict[str, set] = {}
+        self._lock = asyncio.Lock()
+        self.counters = {"lookups": 0, "direct": 0, "seeded": 0, "misses": 0, "added": 0, "evicted": 0}
+
+    async def _load(self) -> Dict[str, Dict[str, Any]]:
+        async with self._lock:
+            if self._entries is None:
+                try:
+                    raw = json.loads(await asyncio.to_thread((self.root / "index.json").read_text))
+                except FileNotFoundError:
+                    raw = []
+                except Exception as e:
+                    print(f"⚠️ Could not read template index, starting fresh: {e}")
+                    raw = []
+                self._entries = {}
+                for entry in raw:
+                    entry["simhash"] = int(entry["simhash"], 16)
+                    self._insert(entry)
+        return self._entries
+
+    def _insert(self, entry: Dict[str, Any]):
+        self._entries[entry["id"]] = entry
+        for band in _bands(entry["minhash"]):
+            self._buckets.setdefault(band, set()).add(entry["id"])
+
+    def _remove(self, entry_id: str):
+        entry = self._entries.pop(entry_id)
+        for band in _bands(entry["minhash"]):
+            self._buckets.get(band, set()).discard(entry_id)
+        (self.root / f"{entry_id}.json").unlink(missing_ok=True)
+
+    async def find(self, html: str) -> Optional[Dict[str, Any]]:
+        """
+        Best prior generation for a structurally similar page
+
+        Returns:
+            Optional[Dict]: template_id, source_url, similarity scores, mode ("direct" at or above
+            template_reuse_threshold with text at or above template_reuse_content_threshold,
+            else "seed") and the stored html/css, or None when nothing reaches template_seed_threshold
+        """
+        entries = await self._load()
+        self.counters["lookups"] += 1
+        fingerprinted = await asyncio.to_thread(fingerprint, html) if entries else None
+        if fingerprinted is None:
+            self.counters["misses"] += 1
+            return None
+
+        candidates = set()
+        for band in _bands(fingerprinted["minhash"]):
+            candidates |= self._buckets.get(band, set())
+
+        best = None
+        for entry_id in candidates:
+            scores = similarity(fingerprinted, entries[entry_id])
+            rank = (scores["similarity"], scores["content_similarity"])
+            if best is None or rank > (best[1]["similarity"], best[1]["content_similarity"]):
+                best = (entries[entry_id], scores)
+
+        if best is None or best[1]["similarity"] < settings.template_seed_threshold:
+            self.counters["misses"] += 1
+            return None
+
+        entry, scores = best
+        try:
+            generation = json.loads(await asyncio.to_thread((self.root / f"{entry['id']}.json").read_text))
+        except Exception as e:
+            print(f"⚠️ Template {entry['id']} generation unreadable, dropping it: {e}")
+            async with self._lock:
+                self._remove(entry["id"])
+            self.counters["misses"] += 1
+            return None
+
+        # Pages sharing a template but not their text (two posts on one theme) only seed generation
+        direct = (
+            scores["similarity"] >= settings.template_reuse_threshold
+            and scores["content_similarity"] >= settings.template_reuse_content_threshold
+        )
+        mode = "direct" if direct else "seed"
+        self.counters["direct" if mode == "direct" else "seeded"] += 1
+        return {"template_id": entry["id"], "source_url": entry["url"], "mode": mode, **scores, **generation}
+
+    async def add(self, url: str, source_html: str, generated_html: str, generated_css: str = "") -> Optional[str]:
+        """
+        Index a generation under its source page's fingerprint
+
+        Returns:
+            Optional[str]: The entry id (the existing one when the same page is already
+            indexed), or None if the page could not be fingerprinted or stored
+        """
+        fingerprinted = await asyncio.to_thread(fingerprint, source_html)
+        if fingerprinted is None or not generated_html:
+            return None
+
+        entries = await self._load()
+        for existing in entries.values():
+            if existing["url"] == url and all(existing.get(key) == fingerprinted[key] for key in ("simhash", "minhash", "text_simhash")):
+                return existing["id"]
+        entry = {"id": uuid.uuid4().hex, "url": url, "created_at": time.time(), **fingerprinted}
+        try:
+            async with self._lock:
+                await asyncio.to_thread(self._write, f"{entry['id']}.json", json.dumps({"html": generated_html, "css": generated_css}))
+                self._insert(entry)
+                while len(entries) > settings.template_index_max_entries:
+                    self._remove(min(entries.values(), key=lambda item: item["created_at"])["id"])
+                    self.counters["evicted"] += 1
+                snapshot = json.dumps([{**item, "simhash": format(item["simhash"], "016x")} for item in entries.values()])
+                await asyncio.to_thread(self._write, "index.json", snapshot)
+        except Exception as e:
+            print(f"⚠️ Failed to index generation for {url}: {e}")
+            return None
+
+        self.counters["added"] += 1
+        return entry["id"]
+
+    def _write(self, name: str, payload: str):
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f".{name}.{uuid.uuid4().hex}"
+        staging.write_text(payload)
+        staging.replace(self.root / name)
+
+    def stats(self) -> Dict[str, Any]:
+        reused = self.counters["direct"] + self.counters["seeded"]
+        return {
+            "entries": len(self._entries or {}),
+            "reuse_threshold": settings.template_reuse_threshold,
+            "seed_threshold": settings.template_seed_threshold,
+            "reuse_rate": round(reused / self.counters["lookups"], 3) if self.counters["lookups"] else 0.0,
+            **self.counters
+        }
+
+# Global template index shared by both clone pipelines
+template_index = TemplateIndex()
@@ -0,0 +1,546 @@
+import asyncio
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from playwright.async_api import Page
+
+from models import CloneOptions
+from config import settings
+from page_extractor import EXTRACTOR_SELECTORS, STYLE_FIELDS, StyleTable, element_budget
+
+# Computed styles requested from DOMSnapshot.captureSnapshot, in payload order
+SNAPSHOT_STYLES = [
+    'display', 'position', 'z-index', 'color', 'background-color', 'border-color',
+    'font-family', 'font-size', 'margin', 'padding', 'border', 'border-radius',
+    'cursor', 'transition', 'grid-template-columns', 'grid-template-rows', 'gap',
+    'flex-direction', 'justify-content', 'align-items', 'top', 'left', 'right',
+    'bottom', 'background-image'
+]
+
+# STYLE_FIELDS as snapshot property names (backgroundColor -> background-color)
+STYLE_PROPERTIES = tuple(re.sub(r'([A-Z])', r'-\1', field).lower() for field in STYLE_FIELDS)
+
+TRANSPARENT = 'rgba(0, 0, 0, 0)'
+ELEMENT_NODE = 1
+TEXT_NODE = 3
+FRAGMENT_NODE = 11
+
+_SIMPLE_SELECTOR = re.compile(
+    r'^(?P<tag>[a-z0-9]+)?(?:\.(?P<cls>[\w-]+))?'
+    r'(?:\[(?P<attr>[\w-]+)(?:(?P<op>\*?=)"(?P<value>[^"]*)")?\])?$'
+)
+_CSS_URL = re.compile(r'url\(["\']?([^"\']*)["\']?\)')
+
+def compile_selector(selector: str) -> List[Dict[str, Optional[str]]]:
+    """Compile a comma-separated list of simple selectors (tag, .class, [attr], [attr="v"], [attr*="v"])"""
+    compiled = []
+    for item in selector.split(','):
+        match = _SIMPLE_SELECTOR.match(item.strip())
+        if not match:
+            raise ValueError(f"Unsupported selector for snapshot matching: {item.strip()}")
+        compiled.append(match.groupdict())
+    return compiled
+
+COMPILED_SELECTORS = {name: compile_selector(selector) for name, selector in EXTRACTOR_SELECTORS.items()}
+
+def selector_matches(name: str, tag: str, attrs: Dict[str, str], classes: set) -> bool:
+    """Whether an element matches the named entry of EXTRACTOR_SELECTORS"""
+    for part in COMPILED_SELECTORS[name]:
+        if part['tag'] and part['tag'] != tag:
+            continue
+        if part['cls'] and part['cls'] not in classes:
+            continue
+        if part['attr']:
+            value = attrs.get(part['attr'])
+            if value is None:
+                continue
+            if part['op'] == '=' and value != part['value']:
+                continue
+            if part['op'] == '*=' and part['value'] not in value:
+                continue
+        return True
+    return False
+
+class _SnapshotElement:
+    """Decoded view of one element in a DOM snapshot"""
+
+    __slots__ = ('index', 'tag', 'attrs', 'classes', 'style', 'rect')
+
+    def __init__(self, index: int, tag: str, attrs: Dict[str, str], style: Dict[str, str], rect: Dict[str, float]):
+        self.index = index
+        self.tag = tag
+        self.attrs = attrs
+        self.classes = set(attrs.get('class', '').split())
+        self.style = style
+        self.rect = rect
+
+    @property
+    def class_name(self) -> str:
+        return self.attrs.get('class', '')
+
+    def matches(self, name: str) -> bool:
+        return selector_matches(name, self.tag, self.attrs, self.classes)
+
+class _SnapshotDocument:
+    """Builds the PageExtractor payload from a DOMSnapshot.captureSnapshot result"""
+
+    def __init__(self, snapshot: Dict[str, Any], viewport: Dict[str, int]):
+        self.strings: List[str] = snapshot['strings']
+        document = snapshot['documents'][0]
+        nodes = document['nodes']
+        layout = document['layout']
+
+        self.base_url = self._string(document.get('documentURL', -1))
+        self.viewport = viewport
+        self.content_width = document.get('contentWidth', 0)
+        self.content_height = document.get('contentHeight', 0)
+        self.scroll_x = document.get('scrollOffsetX', 0)
+        self.scroll_y = document.get('scrollOffsetY', 0)
+
+        self.parent: List[int] = nodes['parentIndex']
+        self.node_type: List[int] = nodes['nodeType']
+        self.node_name: List[int] = nodes['nodeName']
+        self.node_value: List[int] = nodes['nodeValue']
+        self.attributes: List[List[int]] = nodes['attributes']
+
+        self.children: List[List[int]] = [[] for _ in self.parent]
+        for index, parent in enumerate(self.parent):
+            if parent >= 0:
+                self.children[parent].append(index)
+
+        self.layout_index = {node: position for position, node in enumerate(layout['nodeIndex'])}
+        self.layout_styles: List[List[int]] = layout['styles']
+        self.layout_bounds: List[List[float]] = layout['bounds']
+        self._elements: Dict[int, _SnapshotElement] = {}
+
+    def _string(self, index: int) -> str:
+        return self.strings[index] if index >= 0 else ''
+
+    def _element(self, index: int) -> _SnapshotElement:
+        element = self._elements.get(index)
+        if element:
+            return element
+
+        raw = self.attributes[index] if index < len(self.attributes) else []
+        attrs = {self._string(raw[i]): self._string(raw[i + 1]) for i in range(0, len(raw) - 1, 2)}
+
+        position = self.layout_index.get(index)
+        if position is not None:
+            style = {
+                prop: self._string(value)
+                for prop, value in zip(SNAPSHOT_STYLES, self.layout_styles[position])
+            }
+            x, y, width, height = self.layout_bounds[position][:4]
+            rect = {'x': x - self.scroll_x, 'y': y - self.scroll_y, 'width': width, 'height': height}
+        else:
+            # Nodes without a layout object behave like display: none
+            style = {prop: '' for prop in SNAPSHOT_STYLES}
+            style['display'] = 'none'
+            rect = {'x': 0, 'y': 0, 'width': 0, 'height': 0}
+
+        element = _SnapshotElement(index, self._string(self.node_name[index]).lower(), attrs, style, rect)
+        self._elements[index] = element
+        return element
+
+    def _document_elements(self) -> List[int]:
+        """Element indices in document order, excluding shadow trees and pseudo elements"""
+        hidden = [False] * len(self.parent)
+        elements = []
+        for index, parent in enumerate(self.parent):
+            if parent >= 0 and (hidden[parent] or self.node_type[parent] == FRAGMENT_NODE):
+                hidden[index] = True
+                continue
+            if self.node_type[index] == ELEMENT_NODE and not self._string(self.node_name[index]).startswith('::'):
+                elements.append(index)
+        return elements
+
+    def _descendants(self, index: int, tags: set) -> List[int]:
+        found = []
+        stack = list(reversed(self.children[index]))
+        while stack:
+            node = stack.pop()
+            if self.node_type[node] == ELEMENT_NODE and self._string(self.node_name[node]).lower() in tags:
+                found.append(node)
+            stack.extend(reversed(self.children[node]))
+        return found
+
+    def _text(self, index: int, limit: Optional[int] = None) -> str:
+        """textContent of a node, read only as far as the limit requires"""
+        chunks = []
+        stack = list(reversed(self.children[index]))
+        while stack:
+            node = stack.pop()
+            if self.node_type[node] == TEXT_NODE:
+                chunks.append(self._string(self.node_value[node]))
+                if limit is not None and len(chunks) % 8 == 0:
+                    collected = ''.join(chunks)
+                    if len(collected.lstrip()) > limit:
+                        return collected.lstrip()[:limit]
+            stack.extend(reversed(self.children[node]))
+        text = ''.join(chunks).strip()
+        return text[:limit] if limit is not None else text
+
+    def _absolute(self, value: str) -> str:
+        return urljoin(self.base_url, value) if value else ''
+
+    @staticmethod
+    def _input_type(element: _SnapshotElement) -> str:
+        if element.tag == 'textarea':
+            return 'textarea'
+        if element.tag == 'select':
+            return 'select-multiple' if 'multiple' in element.attrs else 'select-one'
+        return element.attrs.get('type') or 'text'
+
+    @staticmethod
+    def _box(rect: Dict[str, float]) -> Dict[str, int]:
+        return {
+            'x': round(rect['x']),
+            'y': round(rect['y']),
+            'width': round(rect['width']),
+            'height': round(rect['height'])
+        }
+
+    def _element_info(self, element: _SnapshotElement, cache: Dict[int, Dict], styles: StyleTable) -> Dict:
+        info = cache.get(element.index)
+        if info:
+            return info
+
+        style = element.style
+        info = {
+            'tag': element.tag,
+            'text': self._text(element.index, 100),
+            'class': element.class_name,
+            'id': element.attrs.get('id', ''),
+            'position': self._box(element.rect),
+            'style': styles.intern(tuple(style[prop] for prop in STYLE_PROPERTIES)),
+            'visible': element.rect['width'] > 0 and element.rect['height'] > 0 and style['display'] != 'none'
+        }
+        cache[element.index] = info
+        return info
+
+    def _select_within_budget(
+        self,
+        element_indices: List[int],
+        budget: int,
+        fold_viewports: int
+    ) -> Tuple[List[int], Optional[Dict[str, Any]]]:
+        """Same prioritisation as the in-page selectWithinBudget helper, using snapshot bounds"""
+        if not budget or len(element_indices) <= budget:
+            return element_indices, None
+
+        fold_bottom = self.viewport.get('height', 0) * fold_viewports
+        scored = []
+        for order, index in enumerate(element_indices):
+            position = self.layout_index.get(index)
+            if position is None:
+                scored.append((2, 0, order, index))
+                continue
+            _, y, width, height = self.layout_bounds[position][:4]
+            area = width * height
+            if area <= 0:
+                scored.append((2, 0, order, index))
+            elif y < fold_bottom:
+                scored.append((0, 0, order, index))
+            else:
+                scored.append((1, -area, order, index))
+        scored.sort()
+
+        kept, skipped = scored[:budget], scored[budget:]
+        skipped_by_tag = Counter(self._string(self.node_name[index]).lower() for *_, index in skipped)
+        skipped_visible = sum(1 for tier, *_ in skipped if tier < 2)
+
+        return sorted(index for *_, index in kept), {
+            'budget': budget,
+            'fold_viewports': fold_viewports,
+            'total_elements': len(element_indices),
+            'processed': len(kept),
+            'skipped': len(skipped),
+            'skipped_visible': skipped_visible,
+            'skipped_hidden': len(skipped) - skipped_visible,
+            'skipped_by_tag': dict(skipped_by_tag.most_common(10))
+        }
+
+    def build(
+        self,
+        include_images: bool,
+        include_fonts: bool,
+        include_colors: bool,
+        budget: int = 0,
+        fold_viewports: int = 3
+    ) -> Dict:
+        document_elements = self._document_elements()
+        element_indices, budget_report = self._select_within_budget(document_elements, budget, fold_viewports)
+        info_cache: Dict[int, Dict] = {}
+        styles = StyleTable()
+
+        ui = {key: [] for key in ['buttons', 'inputs', 'navigation', 'cards', 'headers',
+                                  'content_blocks', 'images', 'layout_containers']}
+        layout = {
+            'page_structure': {
+                'width': self.content_width,
+                'height': self.content_height,
+                'viewport_width': self.viewport.get('width', 0),
+                'viewport_height': self.viewport.get('height', 0)
+            },
+            'grid_systems': [],
+            'flexbox_layouts': [],
+            'positioning': [],
+            'spacing_patterns': {}
+        }
+        interactive = {'clickable_elements': [], 'form_elements': [], 'hover_effects': [], 'animations': []}
+        analysis = {
+            'totalElements': len(document_elements),
+            'headings': 0, 'images': 0, 'links': 0, 'forms': 0, 'inputs': 0,
+            'buttons': 0, 'sections': 0, 'navigation': 0,
+            'flexboxElements': 0, 'gridElements': 0,
+            'visualHierarchy': [], 'colorDistribution': {}, 'fontUsage': {}
+        }
+
+        colors: Dict[str, None] = {}
+        fonts: Dict[str, None] = {}
+        image_urls: List[str] = []
+        background_urls: List[str] = []
+        margin_counts, padding_counts = Counter(), Counter()
+        color_counts, font_counts = Counter(), Counter()
+        meta = {}
+
+        # Meta tags have no box and would never survive the budget, so read them first
+        for index in document_elements:
+            if self._string(self.node_name[index]).lower() == 'meta':
+                el = self._element(index)
+                if el.attrs.get('name') in ('description', 'viewport'):
+                    meta.setdefault(el.attrs['name'], el.attrs.get('content'))
+
+        for index in element_indices:
+            el = self._element(index)
+            style, rect, tag = el.style, el.rect, el.tag
+            display = style['display']
+
+            # DOM structure counts
+            analysis['headings'] += el.matches('headings')
+            analysis['images'] += tag == 'img'
+            analysis['links'] += tag == 'a'
+            analysis['forms'] += tag == 'form'
+            analysis['inputs'] += el.matches('ui_inputs')
+            analysis['buttons'] += el.matches('buttons')
+            analysis['sections'] += el.matches('sections')
+            analysis['navigation'] += el.matches('navigation')
+            analysis['flexboxElements'] += display in ('flex', 'inline-flex')
+            analysis['gridElements'] += display in ('grid', 'inline-grid')
+
+            if rect['width'] > 100 and rect['height'] > 50:
+                analysis['visualHierarchy'].append({
+                    'tag': tag,
+                    'area': rect['width'] * rect['height'],
+                    'position': {'x': round(rect['x']), 'y': round(rect['y'])},
+                    'zIndex': style['z-index']
+                })
+            if style['background-color'] and style['background-color'] != TRANSPARENT:
+                color_counts[style['background-color']] += 1
+            if style['font-family']:
+                font_counts[style['font-family']] += 1
+
+            # UI elements
+            if rect['width'] > 0:
+                if el.matches('ui_buttons'):
+                    ui['buttons'].append(self._element_info(el, info_cache, styles))
+                if el.matches('ui_inputs'):
+                    ui['inputs'].append({
+                        **self._element_info(el, info_cache, styles),
+                        'type': self._input_type(el),
+                        'placeholder': el.attrs.get('placeholder', '')
+                    })
+                if el.matches('ui_navigation'):
+                    links = []
+                    for link_index in self._descendants(index, {'a'}):
+                        link = self._element(link_index)
+                        links.append({
+                            'text': self._text(link_index),
+                            'href': self._absolute(link.attrs.get('href', '')),
+                            **self._element_info(link, info_cache, styles)
+                        })
+                    ui['navigation'].append({**self._element_info(el, info_cache, styles), 'links': links})
+                if el.matches('ui_cards'):
+                    ui['cards'].append(self._element_info(el, info_cache, styles))
+                if el.matches('ui_headers'):
+                    ui['headers'].append(self._element_info(el, info_cache, styles))
+                if tag == 'img':
+                    ui['images'].append({
+                        **self._element_info(el, info_cache, styles),
+                        'src': self._absolute(el.attrs.get('src', '')),
+                        'alt': el.attrs.get('alt', '')
+                    })
+            if rect['width'] > 200 and el.matches('ui_content_blocks'):
+                ui['content_blocks'].append(self._element_info(el, info_cache, styles))
+            if rect['width'] > 300 and rect['height'] > 100 and el.matches('ui_layout_containers'):
+                child_elements = sum(1 for child in self.children[index] if self.node_type[child] == ELEMENT_NODE)
+                if display in ('flex', 'grid') or child_elements > 3:
+                    ui['layout_containers'].append(self._element_info(el, info_cache, styles))
+
+            # Layout systems
+            if display == 'grid' and rect['width'] > 0:
+                layout['grid_systems'].append({
+                    'element': tag,
+                    'class': el.class_name,
+                    'grid_template_columns': style['grid-template-columns'],
+                    'grid_template_rows': style['grid-template-rows'],
+                    'gap': style['gap'],
+                    'position': self._box(rect)
+                })
+            if display == 'flex' and rect['width'] > 0:
+                layout['flexbox_layouts'].append({
+                    'element': tag,
+                    'class': el.class_name,
+                    'flex_direction': style['flex-direction'],
+                    'justify_content': style['justify-content'],
+                    'align_items': style['align-items'],
+                    'gap': style['gap'],
+                    'position': self._box(rect)
+                })
+            if style['position'] in ('absolute', 'fixed'):
+                layout['positioning'].append({
+                    'element': tag,
+                    'class': el.class_name,
+                    'position_type': style['position'],
+                    'top': style['top'],
+                    'left': style['left'],
+                    'right': style['right'],
+                    'bottom': style['bottom'],
+                    'z_index': style['z-index']
+                })
+            if style['margin'] and style['padding'] and (style['margin'] != '0px' or style['padding'] != '0px'):
+                margin_counts[style['margin']] += 1
+                padding_counts[style['padding']] += 1
+
+            # Interactive elements
+            if rect['width'] > 0 and el.matches('clickable'):
+                interactive['clickable_elements'].append({
+                    'tag': tag,
+                    'text': self._text(index, 50),
+                    'class': el.class_name,
+                    'href': self._absolute(el.attrs.get('href', '')) if tag == 'a' else '',
+                    'cursor': style['cursor'],
+                    'position': self._box(rect)
+                })
+            if tag == 'form':
+                inputs = []
+                for input_index in self._descendants(index, {'input', 'textarea', 'select'}):
+                    field = self._element(input_index)
+                    attrs = field.attrs
+                    inputs.append({
+                        'type': self._input_type(field),
+                        'name': attrs.get('name', ''),
+                        'placeholder': attrs.get('placeholder', ''),
+                        'required': 'required' in attrs
+                    })
+                interactive['form_elements'].append({
+                    'action': self._absolute(el.attrs.get('action', '')) or self.base_url,
+                    'method': el.attrs.get('method', 'get'),
+                    'inputs': inputs
+                })
+            if style['cursor'] == 'pointer' or tag in ('a', 'button'):
+                interactive['hover_effects'].append({
+                    'tag': tag,
+                    'class': el.class_name,
+                    'cursor': style['cursor'],
+                    'transition': style['transition']
+                })
+
+            # Palette and typography
+            if include_colors:
+                for prop in ('color', 'background-color', 'border-color'):
+                    if style[prop] and style[prop] != TRANSPARENT:
+                        colors.setdefault(style[prop])
+            if include_fonts and style['font-family']:
+                for font in style['font-family'].split(','):
+                    cleaned = font.strip().replace('"', '').replace("'", '')
+                    if cleaned and 'serif' not in cleaned and 'monospace' not in cleaned:
+                        fonts.setdefault(cleaned)
+
+            # Images and background images
+            if include_images:
+                src = self._absolute(el.attrs.get('src', '')) if tag == 'img' else ''
+                if src.startswith('http') and rect['width'] > 0 and rect['height'] > 0:
+                    image_urls.append(src)
+                background = style['background-image']
+                if background and background != 'none':
+                    match = _CSS_URL.search(background)
+                    if match and match.group(1).startswith('http'):
+                        background_urls.append(match.group(1))
+
+        layout['spacing_patterns'] = {
+            'common_margins': [{'margin': m, 'count': c} for m, c in margin_counts.most_common(5)],
+            'common_paddings': [{'padding': p, 'count': c} for p, c in padding_counts.most_common(5)]
+        }
+        analysis['visualHierarchy'].sort(key=lambda item: item['area'], reverse=True)
+        analysis['visualHierarchy'] = analysis['visualHierarchy'][:20]
+        analysis['colorDistribution'] = dict(color_counts.most_common(10))
+        analysis['fontUsage'] = dict(font_counts.most_common(5))
+
+        return {
+            'dom_structure': analysis,
+            'ui_elements': ui,
+            'layout_info': layout,
+            'interactive_elements': interactive,
+            'colors': list(colors)[:20],
+            'fonts': list(fonts),
+            'images': list(dict.fromkeys(image_urls + background_urls)),
+            'meta_description': meta.get('description'),
+            'viewport_meta': meta.get('viewport'),
+            'style_table': styles.to_dict(),
+            'element_budget': budget_report
+        }
+
+def decode_snapshot(
+    snapshot: Dict[str, Any],
+    viewport: Dict[str, int],
+    include_images: bool = True,
+    include_fonts: bool = True,
+    include_colors: bool = True,
+    budget: int = 0,
+    fold_viewports: int = 3
+) -> Dict:
+    """Decode a DOMSnapshot.captureSnapshot result into the PageExtractor payload"""
+    return _SnapshotDocument(snapshot, viewport).build(
+        include_images, include_fonts, include_colors, budget, fold_viewports
+    )
+
+class SnapshotExtractor:
+    """Extracts the PageExtractor payload from one native DOMSnapshot.captureSnapshot call"""
+
+    async def extract(self, page: Page, options: CloneOptions) -> Dict:
+        """
+        Capture a DOM snapshot over CDP and decode it into the shared payload shape
+
+        Returns:
+            Dict with the same keys as PageExtractor.extract
+        """
+        try:
+            cdp = await page.context.new_cdp_session(page)
+            try:
+                snapshot = await cdp.send("DOMSnapshot.captureSnapshot", {
+                    "computedStyles": SNAPSHOT_STYLES,
+                    "includeDOMRects": True
+                })
+            finally:
+                await cdp.detach()
+
+            # Decoding is pure Python work, keep it off the event loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None,
+                decode_snapshot,
+                snapshot,
+                page.viewport_size or {},
+                options.include_images,
+                options.include_fonts,
+                options.extract_colors,
+                element_budget(options),
+                settings.extraction_fold_viewports
+            )
+
+        except Exception as e:
+            print(f"Snapshot extraction failed: {e}")
+            return {}
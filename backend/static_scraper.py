@@ -0,0 +1,314 @@
+import asyncio
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import lxml.html
+
+from models import ScrapedData, CloneOptions
+from services.http_client import http_client
+from services.job_events import PartialCallback, emit_partial
+from services.scrape_cache import validators_from_headers
+from snapshot_extractor import selector_matches
+
+# Mount points of client-rendered apps; an empty one means the content arrives via JavaScript
+SPA_ROOT_IDS = {"root", "app", "__next", "__nuxt", "___gatsby", "svelte", "main-app"}
+SPA_ROOT_ATTRIBUTES = ("ng-app", "ng-version", "data-reactroot", "data-server-rendered", "data-v-app")
+
+NOSCRIPT_HINTS = re.compile(r'enable javascript|requires javascript|javascript is (?:disabled|required)|turn on javascript', re.IGNORECASE)
+BOT_WALL_HINTS = re.compile(r'cf-browser-verification|challenge-platform|just a moment\.\.\.|checking your browser', re.IGNORECASE)
+
+FONT_FAMILY_PATTERN = re.compile(r'font-family\s*:\s*([^;{}]+)', re.IGNORECASE)
+COLOR_PATTERN = re.compile(r'#[0-9a-fA-F]{3,8}\b|rgba?\([^)]*\)|hsla?\([^)]*\)')
+GENERIC_FONTS = ("serif", "sans-serif", "monospace", "inherit", "initial", "var(")
+
+# dom_structure counters and ui_elements lists, keyed to EXTRACTOR_SELECTORS entries
+STRUCTURE_COUNTS = {
+    "headings": "headings",
+    "inputs": "ui_inputs",
+    "buttons": "buttons",
+    "sections": "sections",
+    "navigation": "navigation"
+}
+TAG_COUNTS = {"img": "images", "a": "links", "form": "forms"}
+UI_COLLECTIONS = {
+    "buttons": "ui_buttons",
+    "cards": "ui_cards",
+    "headers": "ui_headers",
+    "content_blocks": "ui_content_blocks"
+}
+
+MIN_BODY_TEXT = 200
+MAX_UI_ELEMENTS = 50
+
+class BrowserRequired(Exception):
+    """Raised when a page cannot be scraped faithfully without running its JavaScript"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+def _escalate(reason: str, force: bool):
+    """Hand the page to the browser scraper, or fail outright when static scraping was forced"""
+    if force:
+        raise Exception(f"Static scraping failed: {reason}")
+    raise BrowserRequired(reason)
+
+def needs_browser(doc: lxml.html.HtmlElement, html: str) -> Optional[str]:
+    """
+    Heuristic check for pages that render their content client-side
+
+    Returns:
+        Optional[str]: Why the page needs a browser, or None if the static HTML is enough
+    """
+    if BOT_WALL_HINTS.search(html[:20000]):
+        return "bot challenge page"
+
+    body = doc.find("body")
+    if body is None:
+        return "no body"
+
+    text_length = len(" ".join(body.xpath("string()").split()))
+    script_bytes = sum(len(script.text or "") for script in doc.iter("script"))
+
+    for noscript in body.iter("noscript"):
+        if NOSCRIPT_HINTS.search(noscript.text_content()):
+            return "noscript asks for JavaScript"
+
+    for element in body.iter():
+        if not isinstance(element.tag, str):
+            continue
+        is_root = element.get("id") in SPA_ROOT_IDS or any(attr in element.attrib for attr in SPA_ROOT_ATTRIBUTES)
+        if is_root and len(" ".join(element.text_content().split())) < MIN_BODY_TEXT:
+            return f"empty SPA root <{element.tag} id=\"{element.get('id', '')}\">"
+
+    if text_length < MIN_BODY_TEXT:
+        return "empty body"
+    if script_bytes > 20 * text_length and text_length < 2000:
+        return "script-heavy page with little server-rendered text"
+    return None
+
+def _clean_text(element: lxml.html.HtmlElement, limit: int) -> str:
+    return " ".join(element.text_content().split())[:limit]
+
+def _element_info(element: lxml.html.HtmlElement) -> Dict[str, Any]:
+    return {
+        "tag": element.tag,
+        "text": _clean_text(element, 100),
+        "class": element.get("class", ""),
+        "id": element.get("id", "")
+    }
+
+def _font_families(css_texts: List[str]) -> List[str]:
+    fonts = Counter()
+    for css in css_texts:
+        for declaration in FONT_FAMILY_PATTERN.findall(css):
+            for font in declaration.split(","):
+                cleaned = font.strip().strip("\"'").replace("!important", "").strip()
+                if cleaned and not any(generic in cleaned for generic in GENERIC_FONTS):
+                    fonts[cleaned] += 1
+    return [font for font, _ in fonts.most_common()]
+
+def _colors(css_texts: List[str]) -> List[str]:
+    counts = Counter()
+    for css in css_texts:
+        counts.update(color.lower() for color in COLOR_PATTERN.findall(css))
+    return [color for color, _ in counts.most_common(20)]
+
+def build_static_context(doc: lxml.html.HtmlElement, css_texts: List[str], options: CloneOptions) -> Dict[str, Any]:
+    """
+    Page context from parsed HTML and CSS, shaped like the browser extractors' payload
+
+    Geometry and computed styles need a render, so layout_info is left empty and
+    element records omit position and styles.
+
+    Returns:
+        Dict with dom_structure, ui_elements, layout_info, interactive_elements,
+        colors, fonts, images, meta_description and viewport_meta
+    """
+    analysis = Counter()
+    ui = {key: [] for key in ("buttons", "inputs", "navigation", "cards", "headers", "content_blocks", "images", "layout_containers")}
+    interactive = {"clickable_elements": [], "form_elements": [], "hover_effects": [], "animations": []}
+    images: List[str] = []
+    inline_styles: List[str] = []
+    total = 0
+
+    for element in doc.iter():
+        if not isinstance(element.tag, str):
+            continue
+        total += 1
+        tag = element.tag
+        attrs = element.attrib
+        classes = set(attrs.get("class", "").split())
+
+        def matches(name: str) -> bool:
+            return selector_matches(name, tag, attrs, classes)
+
+        # DOM structure counts
+        for key, selector in STRUCTURE_COUNTS.items():
+            if matches(selector):
+                analysis[key] += 1
+        if tag in TAG_COUNTS:
+            analysis[TAG_COUNTS[tag]] += 1
+
+        if attrs.get("style"):
+            inline_styles.append(attrs["style"])
+
+        # UI elements
+        for key, selector in UI_COLLECTIONS.items():
+            if len(ui[key]) < MAX_UI_ELEMENTS and matches(selector):
+                ui[key].append(_element_info(element))
+        if len(ui["inputs"]) < MAX_UI_ELEMENTS and matches("ui_inputs"):
+            ui["inputs"].append({**_element_info(element), "type": attrs.get("type", "text"), "placeholder": attrs.get("placeholder", "")})
+        if len(ui["navigation"]) < MAX_UI_ELEMENTS and matches("ui_navigation"):
+            links = [{**_element_info(link), "href": link.get("href", "")} for link in element.iter("a")]
+            ui["navigation"].append({**_element_info(element), "links": links})
+        if tag == "img":
+            if len(ui["images"]) < MAX_UI_ELEMENTS:
+                ui["images"].append({**_element_info(element), "src": attrs.get("src", ""), "alt": attrs.get("alt", "")})
+            src = attrs.get("src") or attrs.get("data-src") or ""
+            if options.include_images and src.startswith("http"):
+                images.append(src)
+
+        if len(interactive["clickable_elements"]) < MAX_UI_ELEMENTS and matches("clickable"):
+            interactive["clickable_elements"].append({
+                "tag": tag,
+                "text": _clean_text(element, 50),
+                "class": attrs.get("class", ""),
+                "href": attrs.get("href", "")
+            })
+        if tag == "form" and len(interactive["form_elements"]) < MAX_UI_ELEMENTS:
+            interactive["form_elements"].append({
+                "action": attrs.get("action", ""),
+                "method": attrs.get("method", "get"),
+                "inputs": [{
+                    "type": field.get("type", "text"),
+                    "name": field.get("name", ""),
+                    "placeholder": field.get("placeholder", ""),
+                    "required": "required" in field.attrib
+                } for field in element.iter("input", "textarea", "select")]
+            })
+
+    style_sources = css_texts + inline_styles
+
+    def meta_content(name: str) -> Optional[str]:
+        found = doc.xpath(f'//meta[@name="{name}"]/@content')
+        return found[0] if found else None
+
+    return {
+        "dom_structure": {"totalElements": total, **dict(analysis), "rendered": False},
+        "ui_elements": ui,
+        "layout_info": {
+            "page_structure": {},
+            "grid_systems": [],
+            "flexbox_layouts": [],
+            "positioning": [],
+            "spacing_patterns": {}
+        },
+        "interactive_elements": interactive,
+        "colors": _colors(style_sources) if options.extract_colors else [],
+        "fonts": _font_families(style_sources) if options.include_fonts else [],
+        "images": list(dict.fromkeys(images)),
+        "meta_description": meta_content("description"),
+        "viewport_meta": meta_content("viewport")
+    }
+
+class StaticScraper:
+    """Browserless scraper for server-rendered pages: pooled HTTP fetch plus lxml parsing"""
+
+    async def scrape_website(
+        self,
+        url: str,
+        options: CloneOptions,
+        force: bool = False,
+        on_partial: Optional[PartialCallback] = None
+    ) -> ScrapedData:
+        """
+        Scrape a page without a browser
+
+        Raises BrowserRequired when the page looks client-rendered or cannot be
+        parsed or extracted (empty or undecodable bodies, lxml errors), unless
+        force is set. on_partial receives the same partials as WebScraper's,
+        minus the screenshot; an extraction failure after the html and css
+        partials escalates and the browser scrape sends them again.
+        """
+        started = time.perf_counter()
+        result = await http_client.fetch(url)
+        content_type = result["headers"].get("content-type", "")
+
+        if result["body"] is None:
+            _escalate(f"fetch failed ({result['error'] or result['status']})", force)
+        if "html" not in content_type and not force:
+            raise BrowserRequired(f"non-HTML response ({content_type or 'unknown type'})")
+
+        html = result["body"]
+        loop = asyncio.get_event_loop()
+        try:
+            doc = await loop.run_in_executor(None, lxml.html.document_fromstring, html)
+        except Exception as e:
+            # Empty documents, or str bodies with an XML encoding declaration
+            _escalate(f"unparseable HTML ({type(e).__name__}: {e})", force)
+
+        reason = await loop.run_in_executor(None, needs_browser, doc, html)
+        if reason and not force:
+            raise BrowserRequired(reason)
+
+        # Resolve relative URLs (honouring <base href>) so assets match what a browser would load
+        doc.make_links_absolute(url, resolve_base_href=True)
+
+        title = doc.findtext(".//title")
+        title = title.strip() if title else None
+        await emit_partial(on_partial, "html", {"url": url, "title": title, "html": html})
+
+        css_styles = [style.text for style in doc.iter("style") if style.text]
+        stylesheet_urls = [
+            link.get("href") for link in doc.iter("link")
+            if "stylesheet" in (link.get("rel") or "").lower().split() and link.get("href")
+        ]
+        external_css, stylesheet_timings = await http_client.fetch_stylesheets(stylesheet_urls)
+        css_styles.extend(external_css)
+        await emit_partial(on_partial, "css", {"css": css_styles, "stylesheets": stylesheet_timings})
+
+        try:
+            page_context = await loop.run_in_executor(None, build_static_context, doc, css_styles, options)
+        except Exception as e:
+            _escalate(f"static extraction failed ({type(e).__name__}: {e})", force)
+
+        enhanced_dom_structure = {
+            **page_context["dom_structure"],
+            "ui_elements": page_context["ui_elements"],
+            "layout_info": page_context["layout_info"],
+            "interactive_elements": page_context["interactive_elements"]
+        }
+        await emit_partial(on_partial, "layout", {
+            "dom_structure": enhanced_dom_structure,
+            "meta_description": page_context["meta_description"],
+            "viewport_meta": page_context["viewport_meta"]
+        })
+        for kind in ("colors", "fonts", "images"):
+            await emit_partial(on_partial, kind, {kind: page_context[kind]})
+
+        return ScrapedData(
+            url=url,
+            title=title,
+            html=html,
+            css=css_styles,
+            images=page_context["images"],
+            fonts=page_context["fonts"],
+            colors=page_context["colors"],
+            screenshot_path=None,
+            dom_structure=enhanced_dom_structure,
+            meta_description=page_context["meta_description"],
+            viewport_meta=page_context["viewport_meta"],
+            scrape_metrics={
+                "mode": "static",
+                "document": {"elapsed_ms": result["elapsed_ms"], "bytes": result["bytes"]},
+                "stylesheets": stylesheet_timings,
+                "total_ms": round((time.perf_counter() - started) * 1000, 1)
+            },
+            validators=validators_from_headers(result["headers"])
+        )
+
+# Global static scraper instance
+static_scraper = StaticScraper()
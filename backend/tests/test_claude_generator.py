@@ -0,0 +1,39 @@
+import asyncio
+
+from config import settings
+from models import CapturedResponse
+from services import claude_generator
+from services.claude_generator import ClaudeGenerator
+
+GENERATED = """```html
+<!DOCTYPE html>
+<html><head><link rel="stylesheet" href="/assets/site.css"></head><body><h1>Clone</h1></body></html>
+```"""
+
+def test_captured_stylesheet_is_inlined(monkeypatch):
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    generator = ClaudeGenerator(api_key="test")
+
+    async def stream_html(prompt):
+        metrics = {"time_to_first_token_ms": 5.0, "generation_ms": 10.0, "output_tokens": 40, "tokens_per_second": 4000.0}
+        return GENERATED, {"input_tokens": 100, "output_tokens": 40}, metrics
+
+    async def fetch(url, as_text=True, headers=None):
+        raise AssertionError(f"captured stylesheet fetched again from {url}")
+
+    monkeypatch.setattr(generator, "_stream_html", stream_html)
+    monkeypatch.setattr(claude_generator.http_client, "fetch", fetch)
+    captured = {
+        "https://example.com/assets/site.css": CapturedResponse(
+            url="https://example.com/assets/site.css",
+            resource_type="stylesheet",
+            content_type="text/css; charset=utf-8",
+            body=b"h1 { color: rebeccapurple; }"
+        )
+    }
+
+    result = asyncio.run(generator.generate_html("prompt", "https://example.com/page", captured, use_cache=False))
+
+    assert result["success"]
+    assert "<style>\nh1 { color: rebeccapurple; }\n</style>" in result["html"]
+    assert "<link" not in result["html"]
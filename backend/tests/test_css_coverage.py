@@ -0,0 +1,28 @@
+from services.css_coverage import applies_at_viewport, prune_stylesheet
+
+DESKTOP = {"width": 1920, "height": 1080}
+
+def usage(css: str, selector: str, used: bool) -> dict:
+    start = css.index(selector)
+    return {"startOffset": start, "endOffset": css.index("}", start) + 1, "used": used}
+
+def test_keeps_unused_rules_of_other_breakpoints():
+    css = ".a{color:red}\n@media (max-width:600px){.b{color:blue}}\n@media (min-width:600px){.d{color:gray}}\n.c{color:green}"
+    rules = [usage(css, ".a", True), usage(css, ".b", False), usage(css, ".d", False), usage(css, ".c", False)]
+
+    pruned, stats = prune_stylesheet(css, rules, DESKTOP)
+
+    assert ".a{color:red}" in pruned
+    assert "@media (max-width:600px) {\n.b{color:blue}\n}" in pruned
+    # Applied at the render viewport and still unmatched: genuinely unused
+    assert ".d" not in pruned
+    assert ".c" not in pruned
+    assert stats["rules_responsive"] == 1
+
+def test_media_queries_against_viewport():
+    assert applies_at_viewport("@media (max-width: 600px)", DESKTOP) is False
+    assert applies_at_viewport("@media screen and (min-width: 48em)", DESKTOP) is True
+    assert applies_at_viewport("@media (width <= 1024px), print", DESKTOP) is False
+    assert applies_at_viewport("@media (orientation: portrait)", DESKTOP) is False
+    assert applies_at_viewport("@media (prefers-color-scheme: dark)", DESKTOP) is None
+    assert applies_at_viewport("@media (min-width: 1px)", None) is False
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from config import settings
+from services.http_client import HttpClient
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "governor_backoff_base_ms", 10)
+    monkeypatch.setattr(settings, "governor_max_retries", 2)
+
+async def serve(handler, scenario):
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    client = HttpClient()
+    try:
+        return await scenario(client, f"http://127.0.0.1:{port}/")
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+def test_non_200_bodies_are_kept_only_on_request():
+    async def handler(request):
+        return web.Response(status=404, text="<html>not here</html>", content_type="text/html")
+
+    async def scenario(client, url):
+        return await client.fetch(url), await client.fetch(url, any_status=True)
+
+    default, any_status = asyncio.run(serve(handler, scenario))
+    assert (default["status"], default["body"]) == (404, None)
+    assert (any_status["status"], any_status["body"]) == (404, "<html>not here</html>")
+    assert any_status["retries"] == 0
+
+def test_throttled_responses_are_retried_after_backoff():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.path)
+        if len(calls) < 3:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        return web.Response(text="ok")
+
+    async def scenario(client, url):
+        return await client.fetch(url)
+
+    result = asyncio.run(serve(handler, scenario))
+    assert (result["status"], result["body"], result["retries"]) == (200, "ok", 2)
+    assert len(calls) == 3
+
+def test_retries_give_up_with_the_last_status():
+    async def handler(request):
+        return web.Response(status=503, text="busy")
+
+    async def scenario(client, url):
+        return await client.fetch(url, any_status=True)
+
+    result = asyncio.run(serve(handler, scenario))
+    assert (result["status"], result["body"], result["retries"]) == (503, "busy", 2)
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from config import settings
+from services import llm_cache as llm_cache_module
+from services.llm_cache import LLMCache, normalize_prompt
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "llm_cache_enabled", True)
+    return LLMCache(str(tmp_path), max_bytes=10 * 1024 * 1024, ttl_seconds=3600)
+
+def test_normalize_prompt_ignores_insignificant_whitespace():
+    assert normalize_prompt("  Clone this\r\nsite   \n\n\n\n\tplease\t\n") == "Clone this\nsite\n\n\tplease"
+    assert normalize_prompt(None) == ""
+
+def test_key_is_stable_across_whitespace_and_param_order(cache):
+    first = cache.key("anthropic", "m", "system", "Clone\r\n\n\n\nthis  ", {"max_tokens": 10, "temperature": 0})
+    second = cache.key("anthropic", "m", "system ", "Clone\n\nthis", {"temperature": 0, "max_tokens": 10})
+    assert first == second
+
+@pytest.mark.parametrize("changed", [
+    ("openai", "m", "system", "prompt", {"max_tokens": 10}),
+    ("anthropic", "other", "system", "prompt", {"max_tokens": 10}),
+    ("anthropic", "m", "other", "prompt", {"max_tokens": 10}),
+    ("anthropic", "m", "system", "other", {"max_tokens": 10}),
+    ("anthropic", "m", "system", "prompt", {"max_tokens": 20}),
+    ("anthropic", "m", "system", "Prompt", {"max_tokens": 10})
+])
+def test_key_changes_with_anything_that_changes_the_output(cache, changed):
+    assert cache.key("anthropic", "m", "system", "prompt", {"max_tokens": 10}) != cache.key(*changed)
+
+def test_round_trip_counts_saved_tokens(cache):
+    async def scenario():
+        key = cache.key("anthropic", "m", "", "prompt", {})
+        missed = await cache.get(key)
+        await cache.put(key, "anthropic", "m", "<html></html>", {"output_tokens": 120, "total_cost_usd": 0.5})
+        return missed, await cache.get(key)
+
+    missed, entry = asyncio.run(scenario())
+    assert missed is None
+    assert entry["response"] == "<html></html>"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 1, 1)
+    assert (stats["saved_output_tokens"], stats["saved_cost_usd"]) == (120, 0.5)
+
+def test_expired_entries_miss_and_are_removed(cache, monkeypatch):
+    key = cache.key("anthropic", "m", "", "prompt", {})
+    asyncio.run(cache.put(key, "anthropic", "m", "response"))
+    later = time.time() + 3601
+    monkeypatch.setattr(llm_cache_module.time, "time", lambda: later)
+
+    assert asyncio.run(cache.get(key)) is None
+    assert cache.expired == 1
+    assert not (cache.root / f"{key}.json").exists()
+
+def test_least_recently_used_entries_are_evicted(cache):
+    keys = [cache.key("anthropic", "m", "", f"prompt {i}", {}) for i in range(3)]
+
+    async def scenario():
+        for key in keys[:2]:
+            await cache.put(key, "anthropic", "m", "x" * 100)
+        # The first entry was read more recently than the second
+        os.utime(cache.root / f"{keys[0]}.json", (time.time(), time.time()))
+        os.utime(cache.root / f"{keys[1]}.json", (time.time() - 60, time.time() - 60))
+        cache.max_bytes = 2 * (cache.root / f"{keys[0]}.json").stat().st_size
+        await cache.put(keys[2], "anthropic", "m", "x" * 100)
+        return [await cache.get(key) is not None for key in keys]
+
+    assert asyncio.run(scenario()) == [True, False, True]
+    assert cache.evictions == 1
+
+def test_disabled_cache_neither_stores_nor_serves(cache, monkeypatch):
+    key = cache.key("anthropic", "m", "", "prompt", {})
+    asyncio.run(cache.put(key, "anthropic", "m", "response"))
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+
+    assert asyncio.run(cache.get(key)) is None
+    asyncio.run(cache.put(cache.key("anthropic", "m", "", "other", {}), "anthropic", "m", "response"))
+    assert cache.stats()["entries"] == 1
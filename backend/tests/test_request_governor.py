@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import pytest
+
+from config import settings
+from services.request_governor import RequestGovernor, _retry_after_seconds
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "governor_max_concurrent_per_host", 2)
+    monkeypatch.setattr(settings, "governor_rate_per_host", 20.0)
+    monkeypatch.setattr(settings, "governor_burst_per_host", 2)
+    monkeypatch.setattr(settings, "governor_backoff_base_ms", 1000)
+    monkeypatch.setattr(settings, "governor_backoff_max_ms", 8000)
+    monkeypatch.setattr(settings, "governor_max_hosts", 2)
+
+def test_token_bucket_allows_a_burst_then_paces():
+    governor = RequestGovernor()
+
+    async def scenario():
+        started = time.monotonic()
+        for _ in range(2):
+            await governor.admit("https://example.com/a")
+        burst = time.monotonic() - started
+        await governor.admit("https://example.com/b")
+        return burst, time.monotonic() - started
+
+    burst, total = asyncio.run(scenario())
+    assert burst < 0.03
+    # One token refills every 1/20s
+    assert total >= 0.04
+    assert governor.stats()["by_host"]["example.com"]["requests"] == 3
+
+def test_slots_cap_concurrent_requests_per_host():
+    governor = RequestGovernor()
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with governor.slot("https://example.com/"):
+            peak = max(peak, governor.stats()["by_host"]["example.com"]["in_flight"])
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(*(request() for _ in range(4)))
+
+    asyncio.run(scenario())
+    assert peak == 2
+
+def test_backoff_grows_exponentially_and_resets():
+    governor = RequestGovernor()
+    delays = [governor.observe("example.com", 503) for _ in range(5)]
+    assert delays == [1.0, 2.0, 4.0, 8.0, 8.0]
+
+    assert governor.observe("example.com", 200) is None
+    assert governor.observe("example.com", 429) == 1.0
+    state = governor._hosts["example.com"]
+    assert state.tokens == 0.0
+    assert state.statuses == {"503": 5, "200": 1, "429": 1}
+
+def test_retry_after_overrides_exponential_backoff():
+    governor = RequestGovernor()
+    assert governor.observe("example.com", 429, {"Retry-After": "3"}) == 3.0
+    assert governor.observe("example.com", 429, {"Retry-After": "120"}) == 8.0
+    assert _retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert _retry_after_seconds("soon") is None
+
+def test_backed_off_host_waits_before_next_request(monkeypatch):
+    monkeypatch.setattr(settings, "governor_backoff_base_ms", 50)
+    governor = RequestGovernor()
+
+    async def scenario():
+        await governor.admit("https://example.com/")
+        governor.observe("example.com", 429)
+        started = time.monotonic()
+        await governor.admit("https://example.com/")
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.05
+
+def test_least_recently_used_idle_hosts_are_pruned():
+    governor = RequestGovernor()
+
+    async def scenario():
+        await governor.admit("https://a.example/")
+        await governor.admit("https://b.example/")
+        await governor.admit("https://a.example/")
+        await governor.admit("https://c.example/")
+
+    asyncio.run(scenario())
+    assert list(governor._hosts) == ["a.example", "c.example"]
+
+def test_backed_off_hosts_are_never_pruned():
+    governor = RequestGovernor()
+    governor.observe("a.example", 429)
+    governor.observe("b.example", 200)
+    governor.observe("c.example", 200)
+    assert list(governor._hosts) == ["a.example", "c.example"]
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import pytest
+
+from config import settings
+from models import CloneOptions, ScrapedData
+from services import scrape_cache as scrape_cache_module
+from services.scrape_cache import ScrapeCache, normalize_url
+
+URL = "https://example.com/page"
+
+def scraped(html: str = "<html><body>cached</body></html>", etag: str = '"v1"') -> ScrapedData:
+    return ScrapedData(url=URL, html=html, validators={"etag": etag})
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "scrape_cache_revalidate_after_seconds", 300)
+    monkeypatch.setattr(settings, "screenshots_path", str(tmp_path / "screenshots"))
+    return ScrapeCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024, ttl_seconds=3600)
+
+def test_normalize_url_drops_tracking_and_fragments():
+    assert normalize_url("https://Example.com:443/page/?utm_source=x&b=2&a=1#top") == "https://example.com/page?a=1&b=2"
+
+def test_round_trip_hit(cache):
+    async def scenario():
+        await cache.put_scraped_data(URL, None, scraped())
+        return await cache.get_scraped_data(URL + "?utm_campaign=spring", CloneOptions())
+
+    data = asyncio.run(scenario())
+    assert data.html == "<html><body>cached</body></html>"
+    assert data.scrape_metrics["cache"] == "hit"
+    assert (cache.hits, cache.misses) == (1, 0)
+
+def test_scrape_options_change_the_key(cache):
+    async def scenario():
+        await cache.put_scraped_data(URL, None, scraped())
+        return await cache.get_scraped_data(URL, CloneOptions(viewport_width=390))
+
+    assert asyncio.run(scenario()) is None
+
+def test_expired_entries_miss_and_are_removed(cache, monkeypatch):
+    asyncio.run(cache.put_scraped_data(URL, None, scraped()))
+    later = time.time() + 3601
+    monkeypatch.setattr(scrape_cache_module.time, "time", lambda: later)
+
+    assert asyncio.run(cache.get_scraped_data(URL, None)) is None
+    assert not any(path.is_dir() for path in cache.root.iterdir())
+
+@pytest.mark.parametrize("status, etag, reused", [(304, None, True), (200, '"v1"', True), (200, '"v2"', False)])
+def test_etag_revalidation(cache, monkeypatch, status, etag, reused):
+    monkeypatch.setattr(settings, "scrape_cache_revalidate_after_seconds", 0)
+    requests = []
+
+    async def fetch(url, as_text=True, headers=None):
+        requests.append(headers)
+        return {"status": status, "headers": {"etag": etag} if etag else {}, "body": b"", "error": None}
+
+    monkeypatch.setattr(scrape_cache_module.http_client, "fetch", fetch)
+
+    async def scenario():
+        await cache.put_scraped_data(URL, None, scraped())
+        return await cache.get_scraped_data(URL, None)
+
+    assert (asyncio.run(scenario()) is not None) == reused
+    assert requests == [{"If-None-Match": '"v1"'}]
+    assert cache.revalidations == 1
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.max_bytes = len(scraped().model_dump_json()) + 10
+
+    async def scenario():
+        await cache.put_scraped_data("https://example.com/a", None, scraped())
+        await cache.put_scraped_data("https://example.com/b", None, scraped())
+        return (
+            await cache.get_scraped_data("https://example.com/a", None),
+            await cache.get_scraped_data("https://example.com/b", None)
+        )
+
+    first, second = asyncio.run(scenario())
+    assert first is None and second is not None
+    assert cache.evictions == 1
+
+def test_entry_evicted_mid_read_is_a_miss(cache):
+    asyncio.run(cache.put_scraped_data(URL, None, scraped()))
+    (cache.root / cache.key("scraped", URL, None) / "data.json").unlink()
+
+    assert asyncio.run(cache.get_scraped_data(URL, None)) is None
+    assert (cache.hits, cache.misses) == (0, 1)
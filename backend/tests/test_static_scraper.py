@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+import static_scraper
+from models import CloneOptions
+from static_scraper import BrowserRequired
+
+def serve(monkeypatch, body, content_type="text/html"):
+    async def fetch(url, as_text=True, headers=None):
+        return {"url": url, "status": 200, "headers": {"content-type": content_type}, "body": body,
+                "bytes": len(body or ""), "elapsed_ms": 1.0, "retries": 0, "error": None}
+
+    async def fetch_stylesheets(urls, lookup=None):
+        return [], []
+
+    monkeypatch.setattr(static_scraper.http_client, "fetch", fetch)
+    monkeypatch.setattr(static_scraper.http_client, "fetch_stylesheets", fetch_stylesheets)
+
+def scrape(force=False):
+    return asyncio.run(static_scraper.static_scraper.scrape_website("https://example.com/", CloneOptions(), force=force))
+
+def test_empty_body_escalates_to_the_browser(monkeypatch):
+    serve(monkeypatch, "")
+    with pytest.raises(BrowserRequired, match="unparseable HTML"):
+        scrape()
+
+def test_non_utf8_body_escalates_to_the_browser(monkeypatch):
+    # A windows-1252 XHTML page keeps its encoding declaration after decoding, which lxml rejects for str input
+    body = b'<?xml version="1.0" encoding="windows-1252"?><html><body><p>caf\xe9</p></body></html>'
+    serve(monkeypatch, body.decode("utf-8", errors="replace"))
+    with pytest.raises(BrowserRequired, match="unparseable HTML"):
+        scrape()
+
+def test_extraction_errors_escalate(monkeypatch):
+    serve(monkeypatch, "<html><body>" + "<p>Server rendered text.</p>" * 20 + "</body></html>")
+
+    def broken(*args):
+        raise KeyError("style")
+
+    monkeypatch.setattr(static_scraper, "build_static_context", broken)
+    with pytest.raises(BrowserRequired, match="static extraction failed"):
+        scrape()
+
+def test_forced_static_scrape_reports_the_failure(monkeypatch):
+    serve(monkeypatch, "")
+    with pytest.raises(Exception, match="Static scraping failed: unparseable HTML"):
+        scrape(force=True)
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from config import settings
+from services.template_index import (
+    LSH_BANDS, TemplateIndex, _bands, fingerprint, is_new_generation, similarity
+)
+
+def page(title: str, body: str, extra: str = "") -> str:
+    return (
+        '<html><body class="home blog wp-theme-astra"><header class="site-header">'
+        '<nav class="main-nav"><ul class="menu"><li class="menu-item">Home</li><li class="menu-item">About</li></ul></nav>'
+        f'</header><main class="site-main"><article class="post post-{len(title)} hentry"><h1 class="entry-title">{title}</h1>'
+        f'<div class="entry-content"><p>{body}</p></div></article>{extra}</main>'
+        '<footer class="site-footer"><p class="copyright">c</p></footer><script>var a = 1</script></body></html>'
+    )
+
+BREAD = page("How to bake bread", "Flour water salt and yeast: knead the dough and let it rise overnight before baking hot.")
+BIKE = page("Choosing a bicycle", "Frame size, gearing, tyres and brakes matter most when picking a commuter bike for the city.")
+OTHER = (
+    '<html><body><div class="container"><div class="row"><div class="col-md-6 card">x</div>'
+    '<form class="form-inline"><input class="form-control"><button class="btn btn-primary">go</button></form>'
+    '</div></div></body></html>'
+)
+GENERATED = {
+    "success": True,
+    "html": "<html>bread clone</html>",
+    "generation_metrics": {"output_tokens": 1200, "cached": False}
+}
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "template_reuse_threshold", 0.97)
+    monkeypatch.setattr(settings, "template_reuse_content_threshold", 0.95)
+    monkeypatch.setattr(settings, "template_seed_threshold", 0.8)
+    monkeypatch.setattr(settings, "template_index_max_entries", 10)
+    return TemplateIndex(str(tmp_path))
+
+def test_fingerprint_ignores_scripts_and_folds_digits():
+    assert fingerprint(BREAD)["simhash"] == fingerprint(BREAD.replace("var a = 1", "var b = 2"))["simhash"]
+    assert fingerprint(BREAD)["minhash"] == fingerprint(BREAD.replace("post-17", "post-4242"))["minhash"]
+
+def test_fingerprint_needs_a_class_vocabulary():
+    assert fingerprint("<html><body><p>plain</p></body></html>") is None
+    assert fingerprint("") is None
+
+def test_same_template_scores_high_on_structure_low_on_text():
+    scores = similarity(fingerprint(BREAD), fingerprint(BIKE))
+    assert scores["similarity"] >= 0.97
+    assert scores["content_similarity"] < 0.95
+    assert similarity(fingerprint(BREAD), fingerprint(OTHER))["similarity"] < 0.8
+
+def test_lsh_bands_are_stable_and_shared_by_identical_vocabularies():
+    bands = _bands(fingerprint(BREAD)["minhash"])
+    assert len(bands) == LSH_BANDS
+    assert bands == _bands(fingerprint(BIKE)["minhash"])
+
+def test_direct_reuse_needs_identical_text(index):
+    async def scenario():
+        await index.add("https://blog.example/bread", BREAD, GENERATED["html"])
+        return await index.find(BREAD), await index.find(BIKE), await index.find(OTHER)
+
+    same, sibling, unrelated = asyncio.run(scenario())
+    assert same["mode"] == "direct" and same["html"] == GENERATED["html"]
+    assert sibling["mode"] == "seed" and sibling["source_url"] == "https://blog.example/bread"
+    assert unrelated is None
+
+def test_readding_the_same_page_does_not_duplicate(index):
+    async def scenario():
+        first = await index.add("https://blog.example/bread", BREAD, "<html>a</html>")
+        second = await index.add("https://blog.example/bread", BREAD, "<html>a</html>")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert index.stats()["entries"] == 1
+
+def test_failed_generation_is_never_indexed(index):
+    failed = {
+        "success": False,
+        "html": "<html><body><div class='error'>Generation Error</div></body></html>",
+        "token_usage": {"input_tokens": 0, "output_tokens": 0, "total_cost_usd": 0.0}
+    }
+    cached = {**GENERATED, "generation_metrics": {"output_tokens": 0, "cached": True}}
+    assert not is_new_generation(failed)
+    assert not is_new_generation(cached)
+    assert is_new_generation(GENERATED)
+
+    async def scenario():
+        for result in (failed, cached):
+            if is_new_generation(result):
+                await index.add("https://blog.example/bread", BREAD, result["html"])
+        return await index.find(BREAD)
+
+    assert asyncio.run(scenario()) is None
+    assert index.stats()["added"] == 0
+
+def test_index_persists_and_evicts_oldest(index, monkeypatch):
+    monkeypatch.setattr(settings, "template_index_max_entries", 1)
+
+    async def scenario():
+        await index.add("https://blog.example/bread", BREAD, "<html>bread</html>")
+        await index.add("https://shop.example/", OTHER, "<html>shop</html>")
+        return await TemplateIndex(str(index.root)).find(OTHER), await TemplateIndex(str(index.root)).find(BREAD)
+
+    shop, bread = asyncio.run(scenario())
+    assert shop["html"] == "<html>shop</html>"
+    assert bread is None
+    assert index.stats()["evicted"] == 1
@@ -1,6 +1,68 @@
 from PIL import Image
 import io
-from typing import Optional
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Pillow format names for the screenshot formats offered in CloneOptions
+SCREENSHOT_FORMATS = {"png": "PNG", "jpeg": "JPEG", "webp": "WEBP"}
+SCREENSHOT_EXTENSIONS = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+
+def _encode(image: Image.Image, image_format: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if image_format == "png":
+        # Fast zlib level: screenshots are large and rarely re-downloaded
+        image.save(buffer, format="PNG", compress_level=1)
+    else:
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(buffer, format=SCREENSHOT_FORMATS[image_format], quality=quality)
+    return buffer.getvalue()
+
+def save_screenshot_pair(
+    raw: bytes,
+    raw_format: str,
+    image_format: str,
+    quality: int,
+    viewport: Dict[str, int],
+    full_path: Path,
+    viewport_path: Path
+) -> Dict[str, Any]:
+    """
+    Write a full-page screenshot and its above-the-fold crop (blocking; run in a thread)
+
+    raw is reused as-is when the browser already encoded it in the target format.
+
+    Returns:
+        Dict with encode_ms, write_ms and path/bytes/size for the full and viewport images
+    """
+    started = time.perf_counter()
+    image = Image.open(io.BytesIO(raw))
+    width, height = image.size
+    full_bytes = raw if raw_format == image_format else _encode(image, image_format, quality)
+
+    crop_box = (0, 0, min(viewport.get("width", width), width), min(viewport.get("height", height), height))
+    viewport_image = image.crop(crop_box)
+    viewport_bytes = _encode(viewport_image, image_format, quality)
+    encode_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    full_path.parent.mkdir(parents=True, exist_ok=True)
+    full_path.write_bytes(full_bytes)
+    viewport_path.write_bytes(viewport_bytes)
+    write_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "encode_ms": round(encode_ms, 1),
+        "write_ms": round(write_ms, 1),
+        "full": {"path": str(full_path), "bytes": len(full_bytes), "width": width, "height": height},
+        "viewport": {
+            "path": str(viewport_path),
+            "bytes": len(viewport_bytes),
+            "width": viewport_image.width,
+            "height": viewport_image.height
+        }
+    }
 
 class ImageProcessor:
     def __init__(self, target_width: int = 400):
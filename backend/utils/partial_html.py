@@ -0,0 +1,99 @@
+import re
+from html.parser import HTMLParser
+from typing import List
+
+# Elements that never take a closing tag
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr"
+}
+
+DOCUMENT_START = re.compile(r"<!doctype|<html", re.IGNORECASE)
+DOCUMENT_END = re.compile(r"</html\s*>", re.IGNORECASE)
+
+class _OpenElements(HTMLParser):
+    """Tracks which elements are open at the point the parser has consumed"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(tag)
+
+    def handle_endtag(self, tag):
+        # Mis-nested markup: close back to the matching element, ignore stray end tags
+        if tag in self.stack:
+            del self.stack[len(self.stack) - 1 - self.stack[::-1].index(tag):]
+
+class PartialHTMLDocument:
+    """
+    Incrementally parses a streamed HTML document and renders what has arrived so far
+
+    Leading prose and code fences are skipped. A snapshot drops any half-received
+    tag or entity, keeps an open <style> up to its last complete rule, drops an
+    open <script>, and closes every open element, so a browser renders the
+    partial page as it will look once the rest arrives.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._start = None
+        self._fed = 0
+        self._parser = _OpenElements()
+        self.complete = False
+
+    def feed(self, chunk: str):
+        if self.complete:
+            return
+        self.text += chunk
+
+        if self._start is None:
+            match = DOCUMENT_START.search(self.text)
+            if not match:
+                return
+            self._start = match.start()
+            self._fed = self._start
+
+        end = DOCUMENT_END.search(self.text, max(self._fed - 8, self._start))
+        limit = end.end() if end else len(self.text)
+        self._parser.feed(self.text[self._fed:limit])
+        self._fed = limit
+        if end:
+            self.complete = True
+            self._parser.close()
+
+    def document(self) -> str:
+        """The streamed document between its start and </html>, without surrounding prose or fences"""
+        if self._start is None:
+            return ""
+        return self.text[self._start:self._fed]
+
+    def snapshot(self) -> str:
+        """
+        Render the received part as a well-formed document
+
+        Returns:
+            str: HTML safe to hand to a browser, or "" until the document has started
+        """
+        if self._start is None:
+            return ""
+        if self.complete:
+            return self.document()
+
+        pending = self._parser.rawdata
+        consumed = self.text[self._start:self._fed - len(pending)]
+        stack = list(self._parser.stack)
+        parts = [consumed]
+
+        open_raw = self._parser.cdata_elem
+        if open_raw == "style":
+            # Keep whole rules only; a half-written declaration block could swallow later CSS
+            rules_end = pending.rfind("}")
+            parts.append(pending[:rules_end + 1] if rules_end >= 0 else "")
+        if open_raw and stack and stack[-1] == open_raw:
+            parts.append(f"</{stack.pop()}>")
+
+        parts.extend(f"</{tag}>" for tag in reversed(stack))
+        return "".join(parts)
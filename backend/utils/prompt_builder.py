@@ -53,8 +53,8 @@ STYLE DIRECTION: {target_style.value.upper()}
             memory_hints = self._build_memory_hints(similar_memories)
             prompt_parts.append(f"\nSITE MEMORY (similar designs to reference):\n{memory_hints}")
         
-        # Add truncated CSS
-        css_summary = self._truncate_css(artifacts.css_content)
+        # Add truncated CSS, picked from only the rules that matched the page when coverage ran
+        css_summary = self._truncate_css(artifacts.used_css if artifacts.used_css is not None else artifacts.css_content)
         prompt_parts.append(f"\nORIGINAL CSS PATTERNS:\n{css_summary}")
         
         # Add simplified DOM